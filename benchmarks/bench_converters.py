@@ -0,0 +1,463 @@
+"""
+Benchmark harness for the XML to JSON and the ProAlpha to List & Label converters
+
+Generates synthetic PDI exports and proALPHA form JSON documents from the schema
+embedded in Empty_List_Label.pdi, runs every stage of both converters over them and
+reports throughput, latency percentiles and peak memory per stage. Results can be
+stored as a baseline and later runs compared against it.
+
+Usage:
+    python benchmarks/bench_converters.py --forms 20 --rows 200 --save-baseline baseline.json
+    python benchmarks/bench_converters.py --forms 20 --rows 200 --baseline baseline.json
+"""
+import argparse
+import base64
+import contextlib
+import importlib.util
+import json
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+XML_MODULE_PATH = os.path.join(REPO_ROOT, "modules", "XML_to_Json", "xml_to_json_converter.py")
+PDI_MODULE_PATH = os.path.join(REPO_ROOT, "modules", "Old-Pdi_to_New-Pdi", "proalpha_to_listlabel_converter.py")
+TEMPLATE_PATH = os.path.join(REPO_ROOT, "modules", "Old-Pdi_to_New-Pdi", "Empty_List_Label.pdi")
+
+XSD_NS = "{http://www.w3.org/2001/XMLSchema}"
+PRODATA_NS = "{urn:schemas-progress-com:xml-prodata:0001}"
+
+# Metrics compared against the baseline; a higher value is a regression
+COMPARED_METRICS = ("p50_ms", "p95_ms", "peak_kb")
+
+
+def load_module(name: str, path: str):
+    """Import a converter module from its file path (module directories are not packages)"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# ---------------------------------------------------------------------------
+# Synthetic data generation
+# ---------------------------------------------------------------------------
+
+def load_schema(template_path: str) -> Dict[str, List[Dict[str, str]]]:
+    """
+    Read the table definitions from the xsd:schema embedded in a PDI template
+
+    Returns:
+        Mapping of table name to its columns (name, type, format, default)
+    """
+    root = ET.parse(template_path).getroot()
+    schema = root.find(f"{XSD_NS}schema")
+    dataset = schema.find(f"{XSD_NS}element/{XSD_NS}complexType/{XSD_NS}sequence")
+
+    tables = {}
+    for table in dataset.findall(f"{XSD_NS}element"):
+        columns = []
+        for column in table.findall(f"{XSD_NS}complexType/{XSD_NS}sequence/{XSD_NS}element"):
+            columns.append({
+                "name": column.get("name"),
+                "type": column.get("type", "xsd:string"),
+                "format": column.get(f"{PRODATA_NS}format", ""),
+                "default": column.get("default"),
+            })
+        tables[table.get("name")] = columns
+    return tables
+
+
+def _schema_header(template_path: str) -> str:
+    """Return the template text up to and including the closing xsd:schema tag"""
+    with open(template_path, "r", encoding="utf-8") as f:
+        content = f.read()
+    return content[:content.index("</xsd:schema>") + len("</xsd:schema>")]
+
+
+class SyntheticDataGenerator:
+    """Generates PDI exports and form JSON documents shaped like real proALPHA forms"""
+
+    def __init__(self, template_path: str = TEMPLATE_PATH, rows: int = 100, translations: int = 2,
+                 text_size: int = 40, malformed: float = 0.0, seed: int = 0):
+        """
+        Args:
+            template_path: PDI template providing the schema
+            rows: Number of field rows per form
+            translations: Number of languages per translated row
+            text_size: Maximum length of generated free-text values
+            malformed: Fraction of documents (0..1) that are deliberately broken
+            seed: Random seed, so runs are reproducible
+        """
+        self.schema = load_schema(template_path)
+        self.header = _schema_header(template_path)
+        self.rows = rows
+        self.translations = translations
+        self.text_size = text_size
+        self.malformed = malformed
+        self.random = random.Random(seed)
+        self.languages = ["D", "E", "F", "I", "NL", "PL", "CS", "ES"][:max(1, translations)]
+
+    def _text(self, width: int) -> str:
+        length = self.random.randint(1, max(1, min(width, self.text_size)))
+        return "".join(self.random.choice(string.ascii_letters + "  ") for _ in range(length)).strip() or "x"
+
+    def _value(self, column: Dict[str, str]) -> str:
+        """Generate a value matching a column's declared type and display format"""
+        col_type, col_format = column["type"], column["format"]
+        if col_type == "xsd:int":
+            digits = sum(col_format.count(c) for c in "z9>") or 3
+            return str(self.random.randint(0, 10 ** digits - 1))
+        if col_type == "xsd:boolean":
+            return self.random.choice(["true", "false"])
+        if col_type == "xsd:date":
+            return f"2025-{self.random.randint(1, 12):02d}-{self.random.randint(1, 28):02d}"
+        if col_type == "xsd:dateTime":
+            return f"2025-07-{self.random.randint(1, 28):02d}T12:00:00.000+02:00"
+        if col_type == "xsd:base64Binary":
+            return base64.b64encode(self.random.randbytes(self.text_size)).decode("ascii")
+        width = 1
+        if col_format.startswith("x(") and col_format.endswith(")"):
+            width = int(col_format[2:-1])
+        return self._text(width)
+
+    def _row(self, table: str, fixed: Dict[str, Any]) -> str:
+        parts = [f"  <{table}>"]
+        for column in self.schema[table]:
+            name = column["name"]
+            value = fixed[name] if name in fixed else self._value(column)
+            parts.append(f"    <{name}>{value}</{name}>")
+        parts.append(f"  </{table}>")
+        return "\n".join(parts)
+
+    def _is_malformed(self) -> bool:
+        return self.malformed > 0 and self.random.random() < self.malformed
+
+    def pdi_document(self, form_nr: int) -> str:
+        """Generate one PDI export holding a single form"""
+        key = {"Firma": str(1 + form_nr % 3), "Formular": f"F{form_nr % 1000:03d}", "FormularNr": str(form_nr % 100)}
+        sections = [f"S{i}" for i in range(1 + self.rows // 20)]
+
+        rows = [self._row("ttBG_FKopf", key)]
+        rows += [self._row("ttBG_FKopfSpr", {**key, "Sprache": lang}) for lang in self.languages]
+        rows += [self._row("ttBG_FAbschnitt", {**key, "Abschnitt": section}) for section in sections]
+        for field_nr in range(self.rows):
+            field_key = {**key, "Abschnitt": sections[field_nr % len(sections)], "UnterAbschnitt": "",
+                         "FeldNummer": str(field_nr % 1000)}
+            rows.append(self._row("ttBG_FFeld", field_key))
+            rows += [self._row("ttBG_FFeldSpr", {**field_key, "Sprache": lang}) for lang in self.languages]
+        for text_nr in range(1 + self.rows // 20):
+            text_key = {**key, "TextArt": "FT", "Schluessel": str(text_nr % 1000)}
+            rows.append(self._row("ttBG_FText", text_key))
+            rows += [self._row("ttBT_Kopf", {"TextArt": "FT", "Sprache": lang, "Firma": key["Firma"]})
+                     for lang in self.languages]
+
+        document = f'{self.header}\n{chr(10).join(rows)}\n</dsBG_Form>\n'
+        if self._is_malformed():
+            document = self._break_pdi(document)
+        return document
+
+    def _break_pdi(self, document: str) -> str:
+        """Apply one kind of damage seen in real exports"""
+        kind = self.random.randrange(3)
+        if kind == 0:
+            # Bare ampersands, fixed up by the preprocessor
+            return document.replace("<Feldinhalt>", "<Feldinhalt>A & B ", 5)
+        if kind == 1:
+            # Control characters, stripped by the preprocessor
+            return document.replace("<Bezeichnung>", "<Bezeichnung>\x01\x02", 5)
+        # Truncated export, expected to fail
+        return document[:int(len(document) * 0.9)]
+
+    def form_document(self, form_nr: int) -> Dict[str, Any]:
+        """Generate one form in the JSON layout read by JsonToListLabelConverter"""
+        sections = [f"S{i}" for i in range(1 + self.rows // 20)]
+        document = {
+            "form": {"Firma": str(1 + form_nr % 3), "Formular": f"F{form_nr % 1000:03d}",
+                     "FormularNr": form_nr % 100, "Anzahl_Zeilen": 65, "Anzahl_Spalten": 80, "Generatortyp": "L"},
+            "descriptions": [{"language": lang, "text": self._text(30)} for lang in self.languages],
+            "sections": [{"id": section, "fruehester_Beginn": 1, "spaetester_Beginn": 10, "spaetestes_Ende": 60}
+                         for section in sections],
+            "fields": [{
+                "id": str(field_nr), "section": sections[field_nr % len(sections)], "subsection": "",
+                "FeldTyp": "F", "TabellenName": self._text(25), "SpaltenName": self._text(32),
+                "Zeile": field_nr % 60 + 1, "Spalte": field_nr % 80 + 1, "FeldFormat": "x(20)",
+                "translations": [{"language": lang, "text": self._text(60)} for lang in self.languages],
+            } for field_nr in range(self.rows)],
+            "texts": [{"TextArt": "FT", "Schluessel": str(text_nr),
+                       "content": {lang: self._text(self.text_size) for lang in self.languages}}
+                      for text_nr in range(1 + self.rows // 20)],
+        }
+        if self._is_malformed():
+            return self._break_form(document)
+        return document
+
+    def _break_form(self, document: Dict[str, Any]) -> Any:
+        kind = self.random.randrange(3)
+        if kind == 0:
+            # Fields without a section are skipped with a warning
+            for field in document["fields"][::2]:
+                field.pop("section", None)
+            return document
+        if kind == 1:
+            # Non-string values where the converter expects text, expected to fail
+            document["fields"][0]["FeldTyp"] = 7
+            return document
+        # Truncated JSON, expected to fail
+        return json.dumps(document)[:-20]
+
+
+def write_dataset(generator: SyntheticDataGenerator, forms: int, directory: str) -> Tuple[List[str], List[str]]:
+    """
+    Write one PDI export and one form JSON file per form
+
+    Returns:
+        (pdi_paths, json_paths)
+    """
+    pdi_paths, json_paths = [], []
+    for form_nr in range(forms):
+        pdi_path = os.path.join(directory, f"form_{form_nr:05d}.pdi")
+        with open(pdi_path, "w", encoding="utf-8") as f:
+            f.write(generator.pdi_document(form_nr))
+        pdi_paths.append(pdi_path)
+
+        json_path = os.path.join(directory, f"form_{form_nr:05d}.json")
+        document = generator.form_document(form_nr)
+        with open(json_path, "w", encoding="utf-8") as f:
+            if isinstance(document, str):
+                f.write(document)
+            else:
+                json.dump(document, f, indent=2, ensure_ascii=False)
+        json_paths.append(json_path)
+    return pdi_paths, json_paths
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(percent / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def measure_stage(call: Callable[[Any], Any], inputs: List[Tuple[Any, int]], repeat: int) -> Dict[str, float]:
+    """
+    Time a stage over all inputs and capture its peak traced memory
+
+    Args:
+        call: Stage function, called with one input at a time
+        inputs: (input, size_in_bytes) pairs
+        repeat: Number of timed passes over the inputs
+
+    Returns:
+        Dictionary of metrics for the stage
+    """
+    latencies = []
+    errors = 0
+    total_bytes = 0
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for item, size in inputs:
+                t0 = time.perf_counter()
+                try:
+                    call(item)
+                except Exception:
+                    errors += 1
+                latencies.append(time.perf_counter() - t0)
+                total_bytes += size
+        elapsed = time.perf_counter() - started
+
+        # Separate, untimed pass: tracemalloc slows allocations down considerably
+        peak = 0
+        tracemalloc.start()
+        try:
+            for item, _ in inputs:
+                tracemalloc.reset_peak()
+                try:
+                    call(item)
+                except Exception:
+                    pass
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+
+    latencies.sort()
+    calls = len(latencies)
+    return {
+        "calls": calls,
+        "errors": errors // max(1, repeat),
+        "throughput_mb_s": total_bytes / elapsed / 1e6 if elapsed else 0.0,
+        "throughput_docs_s": calls / elapsed if elapsed else 0.0,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "peak_kb": peak / 1024,
+    }
+
+
+def run_benchmarks(pdi_paths: List[str], json_paths: List[str], output_dir: str, repeat: int,
+                   stages: Optional[List[str]] = None, intern_strings: bool = True) -> Dict[str, Dict[str, float]]:
+    """Run every stage of both converters and return metrics keyed by stage name"""
+    xml_module = load_module("xml_to_json_converter", XML_MODULE_PATH)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        pdi_module = load_module("proalpha_to_listlabel_converter", PDI_MODULE_PATH)
+        pdi_converter = pdi_module.JsonToListLabelConverter(TEMPLATE_PATH)
+
+    xml_converter = xml_module.XMLToJsonConverter(
+        xml_module.ConversionOptions(debug_mode=False, intern_strings=intern_strings))
+    options = xml_converter.options
+
+    def size(path: str) -> int:
+        return os.path.getsize(path)
+
+    def out_path(path: str, suffix: str) -> str:
+        return os.path.join(output_dir, os.path.splitext(os.path.basename(path))[0] + suffix)
+
+    # Intermediate results feeding the later stages
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        xml_texts = [(xml_converter._read_xml_file(p, options), p) for p in pdi_paths]
+        xml_dicts = []
+        for text, path in xml_texts:
+            try:
+                xml_dicts.append((xml_converter._parse_xml_content(text, path, options), len(text)))
+            except Exception:
+                pass
+        json_bytes = []
+        for path in json_paths:
+            with open(path, "rb") as f:
+                json_bytes.append((f.read(), size(path)))
+        json_docs = []
+        for raw, raw_size in json_bytes:
+            try:
+                json_docs.append((json.loads(raw), raw_size))
+            except ValueError:
+                pass
+        trees = []
+        for doc, doc_size in json_docs:
+            try:
+                trees.append((pdi_converter._build_tree(doc), doc_size))
+            except Exception:
+                pass
+
+    plan = {
+        "xml.read": (lambda p: xml_converter._read_xml_file(p, options), [(p, size(p)) for p in pdi_paths]),
+        "xml.preprocess": (lambda item: xml_converter.preprocess_xml(item[0], options),
+                           [((t, p), len(t)) for t, p in xml_texts]),
+        "xml.parse": (lambda item: xml_converter._parse_xml_content(item[0], item[1], options),
+                      [((t, p), len(t)) for t, p in xml_texts]),
+        "xml.serialize": (lambda d: json.dumps(d, indent=2, ensure_ascii=False), xml_dicts),
+        "xml.convert_file": (lambda p: xml_converter.convert_file(p, out_path(p, ".json")),
+                             [(p, size(p)) for p in pdi_paths]),
+        "pdi.load": (json.loads, json_bytes),
+        "pdi.build": (pdi_converter._build_tree, json_docs),
+        "pdi.render": (pdi_converter._render_pdi, trees),
+        "pdi.convert_file": (lambda p: pdi_converter.convert_file(p, out_path(p, ".pdi")),
+                             [(p, size(p)) for p in json_paths]),
+    }
+
+    results = {}
+    for name, (call, inputs) in plan.items():
+        if stages and not any(name.startswith(stage) for stage in stages):
+            continue
+        results[name] = measure_stage(call, inputs, repeat)
+    return results
+
+
+def compare_to_baseline(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any],
+                        threshold: float) -> List[str]:
+    """
+    Compare results against a stored baseline
+
+    Args:
+        results: Metrics of the current run
+        baseline: Stored baseline document (as written by --save-baseline)
+        threshold: Allowed relative increase before a metric counts as regressed (0.2 = 20%)
+
+    Returns:
+        Human readable descriptions of all regressions
+    """
+    regressions = []
+    for stage, metrics in results.items():
+        reference = baseline.get("results", {}).get(stage)
+        if not reference:
+            continue
+        for metric in COMPARED_METRICS:
+            old, new = reference.get(metric), metrics.get(metric)
+            if old and new is not None and new > old * (1 + threshold):
+                regressions.append(f"{stage} {metric}: {old:.2f} -> {new:.2f} (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def print_report(results: Dict[str, Dict[str, float]]) -> None:
+    header = (f"{'stage':<18}{'docs/s':>10}{'MB/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+              f"{'peak KB':>11}{'err':>6}")
+    print(header)
+    print("-" * len(header))
+    for stage, m in results.items():
+        print(f"{stage:<18}{m['throughput_docs_s']:>10.1f}{m['throughput_mb_s']:>9.2f}{m['p50_ms']:>10.2f}"
+              f"{m['p95_ms']:>10.2f}{m['p99_ms']:>10.2f}{m['peak_kb']:>11.0f}{m['errors']:>6}")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark both converter modules on synthetic data")
+    parser.add_argument("--forms", type=int, default=10, help="number of forms (one document each)")
+    parser.add_argument("--rows", type=int, default=100, help="field rows per form")
+    parser.add_argument("--translations", type=int, default=2, help="languages per translated row")
+    parser.add_argument("--text-size", type=int, default=40, help="maximum length of free-text values")
+    parser.add_argument("--malformed", type=float, default=0.0, help="fraction of deliberately broken documents")
+    parser.add_argument("--repeat", type=int, default=3, help="timed passes over the data set")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stage", action="append", help="only run stages with this prefix (repeatable)")
+    parser.add_argument("--no-intern", action="store_true", help="disable string interning in the XML converter")
+    parser.add_argument("--baseline", help="compare against this baseline file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown (default 0.25)")
+    parser.add_argument("--save-baseline", help="store the results of this run as a baseline")
+    args = parser.parse_args(argv)
+
+    generator = SyntheticDataGenerator(rows=args.rows, translations=args.translations,
+                                       text_size=args.text_size, malformed=args.malformed, seed=args.seed)
+    params = {k: getattr(args, k) for k in ("forms", "rows", "translations", "text_size", "malformed", "seed")}
+
+    with tempfile.TemporaryDirectory(prefix="converter_bench_") as workdir:
+        pdi_paths, json_paths = write_dataset(generator, args.forms, workdir)
+        output_dir = os.path.join(workdir, "out")
+        os.makedirs(output_dir)
+        results = run_benchmarks(pdi_paths, json_paths, output_dir, args.repeat, args.stage,
+                                 intern_strings=not args.no_intern)
+
+    print(f"Data set: {params}")
+    print_report(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"params": params, "python": sys.version.split()[0], "results": results}, f, indent=2)
+        print(f"Baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("params") != params:
+            print(f"Warning: baseline was recorded with different parameters: {baseline.get('params')}")
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\nNo regressions above {args.threshold:.0%} against {args.baseline}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,307 @@
 import xml.etree.ElementTree as ET
+import importlib
+import io
 import os
 import json
 import logging
 import copy
-import shutil
-from typing import Dict, Any, List, Optional
+import struct
+import threading
+from typing import (TYPE_CHECKING, Dict, Any, AsyncIterator, Callable, IO, Iterable, Iterator,
+                    List, NamedTuple, Optional, Tuple)
 import re
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, filename='json_to_listlabel_conversion.log',
-                    format='%(asctime)s - %(levelname)s - %(message)s')
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+
+def _configure_logging() -> None:
+    """Configure the conversion log on first use instead of at import time (no-op once configured)"""
+    logging.basicConfig(level=logging.INFO, filename='json_to_listlabel_conversion.log',
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+# Compressed files are recognised by suffix and streamed through the matching stdlib codec,
+# which is only imported when such a file is actually opened
+COMPRESSION_CODECS = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'lzma'}
+
+
+def _compression_suffix(path: str) -> str:
+    """Return the compression suffix of a path ('.gz', '.bz2', '.xz') or an empty string"""
+    suffix = os.path.splitext(path)[1].lower()
+    return suffix if suffix in COMPRESSION_CODECS else ''
+
+
+def _strip_compression_suffix(path: str) -> str:
+    """Return the path without its compression suffix, e.g. 'a.json.gz' -> 'a.json'"""
+    suffix = _compression_suffix(path)
+    return path[:-len(suffix)] if suffix else path
+
+
+def _open_file(path: str, mode: str = 'rb', encoding: str = None, compression_level: int = None) -> IO:
+    """Open a file, transparently (de)compressing it when it has a compression suffix"""
+    codec_name = COMPRESSION_CODECS.get(_compression_suffix(path))
+    if codec_name is None:
+        return open(path, mode, encoding=encoding)
+
+    codec = importlib.import_module(codec_name)
+
+    # The codecs default to binary mode, while open() defaults to text mode
+    if 'b' not in mode and 't' not in mode:
+        mode += 't'
+
+    kwargs = {}
+    if compression_level is not None and 'r' not in mode:
+        kwargs['preset' if codec.__name__ == 'lzma' else 'compresslevel'] = compression_level
+    return codec.open(path, mode, encoding=encoding, **kwargs)
+
+
+# Compact binary intermediate format written by the XML_to_Json module (output_format='binary'),
+# see BinaryWriter there for the layout. Files are recognised by their magic bytes.
+BINARY_MAGIC = b'CVB1'
+BINARY_SUFFIX = '.bjson'
+
+
+class BinaryFormatError(ValueError):
+    """Raised for input that is not a valid binary intermediate document"""
+
+
+class BinaryReader:
+    """
+    Streaming reader of the compact binary intermediate format
+
+    The stream is read in chunks of chunk_size bytes, so a document is decoded without
+    first loading the whole file into memory. Bytes already read from the stream (e.g.
+    while sniffing the format) can be handed back through initial. Every container
+    carries its element count, so a document cut short anywhere fails to decode.
+    """
+    # Fixed-size payload following each value tag, checked when a value starts near the end of the stream
+    PAYLOAD_SIZES = {0x03: 8, 0x04: 8, 0x05: 4, 0x06: 4, 0x07: 1, 0x08: 4, 0x09: 2, 0x0A: 4, 0x0B: 4,
+                     0x0C: 4, 0x0D: 1, 0x0E: 1, 0x10: 1, 0x11: 2}
+
+    def __init__(self, stream: IO, chunk_size: int = 1 << 16, initial: bytes = b''):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._buffer = bytes(initial)
+        self._pos = 0
+        self._table: List[Optional[str]] = [None]  # Entries are numbered from 1
+        self._shapes: List[Tuple[Tuple[str, ...], struct.Struct]] = []
+
+    def load(self) -> Any:
+        """Read the header and the single value of a document"""
+        self._fill(len(BINARY_MAGIC))
+        if self._buffer[:len(BINARY_MAGIC)] != BINARY_MAGIC:
+            raise BinaryFormatError("Not a binary intermediate document")
+        self._pos = len(BINARY_MAGIC)
+        try:
+            value = self.read()
+        except BinaryFormatError:
+            raise
+        except (IndexError, UnicodeDecodeError, struct.error, ValueError, TypeError) as e:
+            raise BinaryFormatError(f"Truncated or corrupt binary document: {e}")
+        if self._pos < len(self._buffer) or self._stream.read(1):
+            raise BinaryFormatError("Unexpected data after the end of the binary document")
+        return value
+
+    def read(self) -> Any:
+        """Decode the next value"""
+        if self._pos + 9 > len(self._buffer):
+            self._fill(9)
+            if len(self._buffer) < 9:
+                self._check_available(1 + self.PAYLOAD_SIZES.get(self._buffer[0], 0) if self._buffer else 1)
+        buffer = self._buffer
+        pos = self._pos
+        tag = buffer[pos]
+        pos += 1
+
+        # Ordered by frequency in converted PDI exports
+        if tag == 0x09:
+            self._pos = pos + 2
+            return self._table[buffer[pos] | buffer[pos + 1] << 8]
+        if tag == 0x11:
+            self._pos = pos + 2
+            return self._read_row(*self._shapes[buffer[pos] | buffer[pos + 1] << 8])
+        if tag == 0x10:
+            self._pos = pos + 1
+            keys = tuple(self.read() for _ in range(buffer[pos]))
+            shape = (keys, struct.Struct(f'<{len(keys)}H'))
+            self._shapes.append(shape)
+            return self._read_row(*shape)
+        if tag == 0x0E:
+            self._pos = pos + 1
+            return self._read_dict(buffer[pos])
+        if tag == 0x07:
+            return self._read_string(pos + 1, buffer[pos], True)
+        if tag == 0x0D:
+            self._pos = pos + 1
+            return self._read_list(buffer[pos])
+        if tag == 0x00:
+            self._pos = pos
+            return None
+        if tag == 0x0C:
+            self._pos = pos + 4
+            return self._read_dict(int.from_bytes(buffer[pos:pos + 4], 'little'))
+        if tag == 0x0B:
+            self._pos = pos + 4
+            return self._read_list(int.from_bytes(buffer[pos:pos + 4], 'little'))
+        if tag == 0x06 or tag == 0x08:
+            return self._read_string(pos + 4, int.from_bytes(buffer[pos:pos + 4], 'little'), tag == 0x06)
+        if tag == 0x0A:
+            self._pos = pos + 4
+            return self._table[int.from_bytes(buffer[pos:pos + 4], 'little')]
+        if tag == 0x01 or tag == 0x02:
+            self._pos = pos
+            return tag == 0x02
+        if tag == 0x03:
+            self._pos = pos + 8
+            return int.from_bytes(buffer[pos:pos + 8], 'little', signed=True)
+        if tag == 0x04:
+            self._pos = pos + 8
+            return struct.unpack_from('<d', buffer, pos)[0]
+        if tag == 0x05:
+            length = int.from_bytes(buffer[pos:pos + 4], 'little')
+            self._pos = pos + 4
+            self._fill(length)
+            self._check_available(length)
+            digits = self._buffer[self._pos:self._pos + length]
+            self._pos += length
+            return int(digits)
+        raise BinaryFormatError(f"Unknown value tag 0x{tag:02x} at offset {pos - 1}")
+
+    def _read_row(self, keys: Tuple[str, ...], indices: struct.Struct) -> Dict[str, Any]:
+        # The string indices of a row are resolved in one go, only the inline values
+        # (index 0) are decoded one by one
+        if self._pos + indices.size > len(self._buffer):
+            self._fill(indices.size)
+            self._check_available(indices.size)
+        slots = indices.unpack_from(self._buffer, self._pos)
+        self._pos += indices.size
+        values = list(map(self._table.__getitem__, slots))
+        position = -1
+        for _ in range(slots.count(0)):
+            position = slots.index(0, position + 1)
+            values[position] = self.read()
+        return dict(zip(keys, values))
+
+    def _read_dict(self, count: int) -> Dict[str, Any]:
+        # Strings are the common case for keys and values, decode them inline and leave
+        # everything else (and strings near the end of the buffer) to read()
+        result = {}
+        table = self._table
+        buffer = self._buffer
+        pos = self._pos
+        end = len(buffer)
+        for _ in range(count):
+            if pos + 3 <= end and buffer[pos] == 0x09:
+                key = table[buffer[pos + 1] | buffer[pos + 2] << 8]
+                pos += 3
+            else:
+                self._pos = pos
+                key = self.read()
+                buffer = self._buffer
+                pos = self._pos
+                end = len(buffer)
+
+            tag = buffer[pos] if pos + 1 < end else -1
+            if tag == 0x09 and pos + 3 <= end:
+                value = table[buffer[pos + 1] | buffer[pos + 2] << 8]
+                pos += 3
+            elif tag == 0x07 and pos + 2 + buffer[pos + 1] <= end:
+                value = buffer[pos + 2:pos + 2 + buffer[pos + 1]].decode('utf-8')
+                table.append(value)
+                pos += 2 + buffer[pos + 1]
+            else:
+                self._pos = pos
+                value = self.read()
+                buffer = self._buffer
+                pos = self._pos
+                end = len(buffer)
+            result[key] = value
+        self._pos = pos
+        return result
+
+    def _read_list(self, count: int) -> List[Any]:
+        result = []
+        append = result.append
+        table = self._table
+        buffer = self._buffer
+        pos = self._pos
+        end = len(buffer)
+        for _ in range(count):
+            if pos + 3 <= end and buffer[pos] == 0x09:
+                append(table[buffer[pos + 1] | buffer[pos + 2] << 8])
+                pos += 3
+            else:
+                self._pos = pos
+                append(self.read())
+                buffer = self._buffer
+                pos = self._pos
+                end = len(buffer)
+        self._pos = pos
+        return result
+
+    def _read_string(self, pos: int, length: int, add_to_table: bool) -> str:
+        if pos + length > len(self._buffer):
+            self._pos = pos
+            self._fill(length)
+            pos = self._pos
+            self._check_available(length)
+        end = pos + length
+        text = self._buffer[pos:end].decode('utf-8')
+        self._pos = end
+        if add_to_table:
+            self._table.append(text)
+        return text
+
+    def _check_available(self, size: int) -> None:
+        if self._pos + size > len(self._buffer):
+            raise BinaryFormatError(f"Binary document ends within a value ({size} bytes needed, "
+                                    f"{len(self._buffer) - self._pos} left)")
+
+    def _fill(self, size: int) -> None:
+        """Make at least size unread bytes available, fewer only at the end of the stream"""
+        chunks = [self._buffer[self._pos:]]
+        available = len(chunks[0])
+        while available < size:
+            chunk = self._stream.read(max(self._chunk_size, size - available))
+            if not chunk:
+                break
+            chunks.append(chunk)
+            available += len(chunk)
+        self._buffer = b''.join(chunks)
+        self._pos = 0
+
+
+def load_binary(input_stream: IO) -> Any:
+    """Read a document in the compact binary intermediate format from a binary stream"""
+    return BinaryReader(input_stream).load()
+
+
+def _load_document(input_stream: IO) -> Any:
+    """Load JSON or a binary intermediate document from a binary stream, telling them apart by the magic bytes"""
+    head = input_stream.read(len(BINARY_MAGIC))
+    if head == BINARY_MAGIC:
+        return BinaryReader(input_stream, initial=head).load()
+    return json.loads(head + input_stream.read())
 
 
 class JsonToListLabelConverter:
-    """Converts JSON files to List & Label .pdi format"""
+    """
+    Converts JSON files to List & Label .pdi format
+
+    The parsed template is loaded once in __init__ and treated as read-only afterwards:
+    every conversion works on its own deep copy. A single instance can therefore be
+    shared between threads (e.g. a ThreadPoolExecutor) and called concurrently.
 
-    def __init__(self, template_path: str = "Empty_List_Label.pdi", additional_files: List[str] = None):
+    With validation set, every generated row is checked against the xsd:schema embedded
+    in the template while the form is built: 'fail_fast' rejects a form at its first
+    invalid row, 'collect' reports all invalid rows of the form at once. Either way an
+    invalid form raises SchemaValidationError instead of producing a .pdi.
+    """
+
+    def __init__(self, template_path: str = "Empty_List_Label.pdi", additional_files: List[str] = None,
+                 compression_level: int = None, validation: str = None):
+        _configure_logging()
         print(f"[DEBUG] JsonToListLabelConverter init:")
         print(f"  template_path: {template_path}")
         print(f"  additional_files: {additional_files}")
@@ -56,6 +342,13 @@ class JsonToListLabelConverter:
                 raise FileNotFoundError(f"Template file Empty_List_Label.pdi not found in any of: {possible_paths}")
 
         self.template_path = template_path
+        self.compression_level = compression_level  # Level for compressed output, codec default if None
+        # Check generated rows against the template schema: 'fail_fast', 'collect' or None (off)
+        self.validation = _normalize_validation(validation)
+        self._compiled_template: Optional[_CompiledTemplate] = None  # Built on first bulk conversion
+        self._schema_validator: Optional[SchemaValidator] = None  # Built on first validated conversion
+        self._compile_lock = threading.Lock()
+        self._compiled = False
         print(f"[DEBUG] Final template path: {self.template_path}")
 
         # Store the original template content as text to preserve formatting
@@ -84,21 +377,17 @@ class JsonToListLabelConverter:
             Path to generated .pdi file
         """
         try:
-            # Load JSON data
-            with open(json_file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            # Load JSON data (or the binary intermediate format, detected by its magic bytes)
+            with _open_file(json_file_path, 'rb') as f:
+                data = _load_document(f)
 
             # Create output path if not specified
             if not output_path:
-                base_name = os.path.splitext(os.path.basename(json_file_path))[0]
+                base_name = os.path.splitext(os.path.basename(_strip_compression_suffix(json_file_path)))[0]
                 output_path = os.path.join(os.path.dirname(json_file_path), f"{base_name}.pdi")
 
-            # Create a copy of the template
-            new_tree = copy.deepcopy(self.template_tree)
-            new_root = new_tree.getroot()
-
-            # Apply data from JSON to the template
-            self._apply_json_to_template(new_root, data)
+            # Apply data from JSON to a copy of the template
+            new_tree = self._build_tree(data)
 
             # Write the modified template with preserved formatting
             self._write_with_preserved_formatting(new_tree, output_path)
@@ -106,33 +395,289 @@ class JsonToListLabelConverter:
             logging.info(f"Successfully converted {json_file_path} to {output_path}")
             return output_path
 
-        except json.JSONDecodeError as e:
+        except (json.JSONDecodeError, BinaryFormatError) as e:
             logging.error(f"Invalid JSON in {json_file_path}: {str(e)}")
             raise Exception(f"Failed to parse JSON in {json_file_path}: {str(e)}")
         except Exception as e:
             logging.error(f"Error converting {json_file_path}: {str(e)}")
             raise Exception(f"Error converting JSON to List & Label: {str(e)}")
 
-    def _write_with_preserved_formatting(self, tree: ET.ElementTree, output_path: str) -> None:
-        """Write XML with preserved namespace prefixes and formatting"""
-        # First, let's write using ElementTree to get the structure
-        import tempfile
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.xml', delete=False, encoding='utf-8') as tmp_file:
-            tree.write(tmp_file.name, encoding='utf-8', xml_declaration=True)
-            temp_path = tmp_file.name
+    def convert_dict(self, data: Dict[str, Any], output_stream: IO = None) -> bytes:
+        """
+        Convert already loaded JSON data to List & Label .pdi content, without touching the filesystem
+
+        Args:
+            data: Parsed JSON document
+            output_stream: Binary or text stream to receive the .pdi content (optional)
+
+        Returns:
+            Generated .pdi content as UTF-8 bytes
+        """
+        try:
+            content = self._render_pdi(self._build_tree(data))
+        except Exception as e:
+            logging.error(f"Error converting JSON data: {str(e)}")
+            raise Exception(f"Error converting JSON to List & Label: {str(e)}")
+
+        pdi_bytes = content.encode('utf-8')
+        if output_stream is not None:
+            if isinstance(output_stream, io.TextIOBase):
+                output_stream.write(content)
+            else:
+                output_stream.write(pdi_bytes)
+
+        return pdi_bytes
+
+    def convert_stream(self, input_stream: IO, output_stream: IO = None) -> bytes:
+        """
+        Convert JSON read from a file-like object to List & Label .pdi content
+
+        Args:
+            input_stream: Text stream with a JSON document, or binary stream with a JSON or
+                binary intermediate document
+            output_stream: Binary or text stream to receive the .pdi content (optional)
+
+        Returns:
+            Generated .pdi content as UTF-8 bytes
+        """
+        try:
+            if isinstance(input_stream, io.TextIOBase):
+                data = json.load(input_stream)
+            else:
+                data = _load_document(input_stream)
+        except (json.JSONDecodeError, BinaryFormatError) as e:
+            logging.error(f"Invalid JSON in stream: {str(e)}")
+            raise Exception(f"Failed to parse JSON: {str(e)}")
+
+        return self.convert_dict(data, output_stream)
+
+    async def convert_file_async(self, json_file_path: str, output_path: str = None,
+                                 executor: 'Executor' = None) -> str:
+        """
+        Asynchronous variant of convert_file that never blocks the event loop
+
+        File reads and writes run in worker threads; JSON parsing and template rendering
+        run in the given executor, or the event loop's default executor if none is given.
+
+        Args:
+            json_file_path: Path to input JSON file
+            output_path: Path for output .pdi file (optional)
+            executor: Executor for the CPU-bound work (optional)
+
+        Returns:
+            Path to generated .pdi file
+        """
+        import asyncio
+        loop = asyncio.get_running_loop()
+
+        # Create output path if not specified
+        if not output_path:
+            base_name = os.path.splitext(os.path.basename(_strip_compression_suffix(json_file_path)))[0]
+            output_path = os.path.join(os.path.dirname(json_file_path), f"{base_name}.pdi")
+
+        try:
+            json_bytes = await asyncio.to_thread(_read_bytes, json_file_path)
+            pdi_bytes = await loop.run_in_executor(executor, self._convert_json_bytes, json_bytes)
+            await asyncio.to_thread(_write_bytes, output_path, pdi_bytes, self.compression_level)
+
+        except (json.JSONDecodeError, BinaryFormatError) as e:
+            logging.error(f"Invalid JSON in {json_file_path}: {str(e)}")
+            raise Exception(f"Failed to parse JSON in {json_file_path}: {str(e)}")
+        except Exception as e:
+            logging.error(f"Error converting {json_file_path}: {str(e)}")
+            raise Exception(f"Error converting JSON to List & Label: {str(e)}")
+
+        logging.info(f"Successfully converted {json_file_path} to {output_path}")
+        return output_path
+
+    def _convert_json_bytes(self, json_bytes: bytes) -> bytes:
+        """Parse raw JSON or binary intermediate data and render it to .pdi bytes (CPU-bound part of a conversion)"""
+        data = _load_document(io.BytesIO(json_bytes))
+        return self._render_pdi(self._build_tree(data)).encode('utf-8')
+
+    def convert_documents(self, documents: Iterable[Any], group_by_firma: bool = False,
+                          failed_forms: List[Tuple[int, str]] = None) -> Iterator[Tuple[str, bytes]]:
+        """
+        Convert many form documents in one pass, with the template compiled once
+
+        Forms that fail to convert (or to validate) are logged and skipped, so one bad form
+        does not stop the others. In a combined document the object IDs of every form name
+        the form, so forms of one Firma do not collide, and a form occurring twice is refused.
+
+        Args:
+            documents: Form documents as loaded from JSON (e.g. from iter_documents)
+            group_by_firma: Combine all forms of a company (Firma) into one ProDataSet instead
+                of producing one .pdi per form
+            failed_forms: List receiving a (position, error message) tuple for every skipped
+                form, counted from 1 (optional)
+
+        Yields:
+            (name, .pdi content) tuples. The name is Firma_Formular_FormularNr of a form, or
+            the Firma of a combined document; combined documents are yielded once all
+            documents have been read.
+        """
+        groups: Dict[str, ET.Element] = {}
+        group_forms: Dict[str, set] = {}  # Firma, Formular and FormularNr of the forms per document
+        group_keys: Dict[str, Dict[str, Dict[tuple, ET.Element]]] = {}  # Unique keys taken per document
+        for index, data in enumerate(documents, 1):
+            validation = None
+            try:
+                if not isinstance(data, dict):
+                    raise ValueError(f"Expected a JSON object, got {type(data).__name__}")
+                if not group_by_firma:
+                    root = self._start_document()
+                    validation = self._start_validation(document=root)
+                    self._apply_json_to_template(root, data, validation=validation)
+                    if validation is not None:
+                        validation.finish()
+                    yield '_'.join(map(str, self._form_identity(root.find('ttBG_FKopf')))), self._finish_document(root)
+                    continue
+
+                form_info = data.get('form') if isinstance(data.get('form'), dict) else {}
+                firma = str(form_info.get('Firma', self._form_identity(self._template_header())[0]))
+                root = groups.get(firma)
+                if root is None:
+                    # The first form fills in the template's own header, further forms a copy of it
+                    form_root = self._start_document()
+                    header = form_root.find('ttBG_FKopf')
+                    if header is None:
+                        raise ValueError(f"Template {self.template_path} has no ttBG_FKopf element")
+                    unique_keys = {}
+                    validation = self._start_validation(unique_keys, form_root)
+                else:
+                    validation = self._start_validation(group_keys[firma])
+                    # Rows of further forms are built apart and only added once complete, so a
+                    # failing form leaves the document untouched
+                    form_root = ET.Element(root.tag)
+                    header = copy.deepcopy(self._template_header())
+                    form_root.append(header)
+                header_obj = header.find('BG_FKopf_Obj')
+                if header_obj is not None:
+                    header_obj.text = None  # Set from the form's key below
+                self._apply_json_to_template(form_root, data, header, validation)
+
+                identity = self._form_identity(header)
+                if identity in group_forms.setdefault(firma, set()):
+                    raise ValueError("Form {}_{}_{} occurs more than once for Firma {}".format(*identity, firma))
+                if header_obj is not None:
+                    header_obj.text = "PA0173:zWLD:{}_{}_{}".format(*identity)
+                if validation is not None:
+                    validation.check_row(header)
+                    validation.finish()
+                group_forms[firma].add(identity)
+                if root is None:
+                    groups[firma] = form_root
+                    group_keys[firma] = unique_keys
+                else:
+                    root.extend(list(form_root))
+            except Exception as e:
+                if validation is not None:
+                    validation.rollback()
+                logging.error(f"Error converting form {index}: {str(e)}")
+                print(f"[ERROR] Error converting form {index}: {str(e)}")
+                if failed_forms is not None:
+                    failed_forms.append((index, str(e)))
+
+        for firma, root in groups.items():
+            yield firma, self._finish_document(root)
+
+    def convert_bulk_file(self, input_path: str, output_dir: str = None, group_by_firma: bool = False,
+                          compression_suffix: str = '', failed_forms: List[Tuple[int, str]] = None) -> List[str]:
+        """
+        Convert a file holding many form documents (JSON array or NDJSON) to .pdi files
 
-        # Read the generated content
-        with open(temp_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        Args:
+            input_path: Path to the bulk input file
+            output_dir: Directory for the .pdi files (defaults to the input file's directory)
+            group_by_firma: Write one combined .pdi per Firma instead of one per form
+            compression_suffix: Compression suffix for the output files ('' for none)
+            failed_forms: List receiving the skipped forms (see convert_documents)
 
-        # Clean up temp file
-        os.unlink(temp_path)
+        Returns:
+            Paths of the generated .pdi files, named <input name>_<form or Firma>.pdi
+        """
+        output_dir = output_dir or os.path.dirname(input_path)
+        os.makedirs(output_dir or '.', exist_ok=True)
+        stem = os.path.basename(_strip_compression_suffix(input_path)).rsplit('.', 1)[0]
+
+        output_files = []
+        used_names = set()
+        with _open_file(input_path, 'rb') as f:
+            for name, pdi_bytes in self.convert_documents(iter_documents(f), group_by_firma, failed_forms):
+                name = re.sub(r'[^\w.-]+', '_', f"{stem}_{name}")
+                unique_name, count = name, 1
+                while unique_name in used_names:
+                    count += 1
+                    unique_name = f"{name}_{count}"
+                used_names.add(unique_name)
+                output_path = os.path.join(output_dir, unique_name + '.pdi' + compression_suffix)
+                _write_bytes(output_path, pdi_bytes, self.compression_level)
+                output_files.append(output_path)
+        return output_files
+
+    def _compile(self) -> Optional['_CompiledTemplate']:
+        """Return the compiled template, built on first use; None if the template cannot be split"""
+        with self._compile_lock:
+            if not self._compiled:
+                self._compiled_template = _CompiledTemplate.build(self)
+                self._compiled = True
+            return self._compiled_template
+
+    def _start_validation(self, unique_keys: Dict[str, Dict[tuple, ET.Element]] = None,
+                          document: ET.Element = None) -> Optional['_RowValidation']:
+        """Begin validating one form, None if validation is off (see SchemaValidator.start)"""
+        if self.validation is None:
+            return None
+        with self._compile_lock:
+            if self._schema_validator is None:
+                self._schema_validator = SchemaValidator.from_template(self.template_root)
+        return self._schema_validator.start(self.validation == 'fail_fast', unique_keys, document)
+
+    def _template_header(self) -> ET.Element:
+        """Return the template's form header (ttBG_FKopf), to be copied before use"""
+        header = self.template_root.find('ttBG_FKopf')
+        if header is None:
+            raise ValueError(f"Template {self.template_path} has no ttBG_FKopf element")
+        return header
+
+    def _start_document(self) -> ET.Element:
+        """Return a fresh root for one output document; only the data rows if the template compiled"""
+        compiled = self._compile()
+        if compiled is None:
+            return copy.deepcopy(self.template_root)
+        root = ET.Element(compiled.root_tag)
+        root.extend(copy.deepcopy(compiled.rows))
+        return root
+
+    def _finish_document(self, root: ET.Element) -> bytes:
+        """Render a root from _start_document to .pdi bytes, identical to _render_pdi of the full tree"""
+        compiled = self._compile()
+        if compiled is None:
+            return self._render_pdi(ET.ElementTree(root)).encode('utf-8')
+        rows = ET.tostring(root, encoding='unicode')
+        rows = rows[rows.index('>') + 1:-len(f'</{compiled.root_tag}>')] if len(root) else ''
+        return (compiled.prefix + self._fix_xml_formatting(rows) + compiled.suffix).encode('utf-8')
+
+    def _build_tree(self, data: Dict[str, Any]) -> ET.ElementTree:
+        """Apply JSON data to a fresh copy of the template"""
+        new_tree = copy.deepcopy(self.template_tree)
+        validation = self._start_validation(document=new_tree.getroot())
+        self._apply_json_to_template(new_tree.getroot(), data, validation=validation)
+        if validation is not None:
+            validation.finish()
+        return new_tree
+
+    def _render_pdi(self, tree: ET.ElementTree) -> str:
+        """Serialize the tree in memory and fix namespace prefixes and formatting"""
+        buffer = io.BytesIO()
+        tree.write(buffer, encoding='utf-8', xml_declaration=True)
+        return self._fix_xml_formatting(buffer.getvalue().decode('utf-8'))
 
-        # Fix the namespace prefixes and formatting
-        content = self._fix_xml_formatting(content)
+    def _write_with_preserved_formatting(self, tree: ET.ElementTree, output_path: str) -> None:
+        """Write XML with preserved namespace prefixes and formatting"""
+        content = self._render_pdi(tree)
 
-        # Write the corrected content
-        with open(output_path, 'w', encoding='utf-8') as f:
+        with _open_file(output_path, 'w', encoding='utf-8', compression_level=self.compression_level) as f:
             f.write(content)
 
     def _fix_xml_formatting(self, content: str) -> str:
@@ -184,30 +729,40 @@ class JsonToListLabelConverter:
 
         return content
 
-    def _apply_json_to_template(self, root: ET.Element, data: Dict[str, Any]) -> None:
-        """Apply JSON data to the template"""
+    def _apply_json_to_template(self, root: ET.Element, data: Dict[str, Any], kopf_elem: ET.Element = None,
+                                validation: '_RowValidation' = None) -> None:
+        """
+        Apply JSON data to the template
+
+        Rows are created for the form header kopf_elem, the template's own ttBG_FKopf by
+        default. Documents holding several forms pass the header of each form explicitly;
+        the object IDs of the rows then include Formular and FormularNr so they stay unique
+        across the forms. Every row is handed to validation (if given) as soon as it is
+        complete.
+        """
         # Extract form information
         form_info = data.get('form', {})
+        header_elem = kopf_elem if kopf_elem is not None else self._find_element(root, 'ttBG_FKopf')
 
         # Update ttBG_FKopf element
-        if form_info and self._find_element(root, 'ttBG_FKopf'):
-            kopf_elem = self._find_element(root, 'ttBG_FKopf')
-
+        if form_info and header_elem is not None:
             # Set form identification
             if 'Firma' in form_info:
-                self._update_element_text(kopf_elem, 'Firma', str(form_info['Firma']))
+                self._update_element_text(header_elem, 'Firma', str(form_info['Firma']))
             if 'Formular' in form_info:
-                self._update_element_text(kopf_elem, 'Formular', str(form_info['Formular']))
+                self._update_element_text(header_elem, 'Formular', str(form_info['Formular']))
             if 'FormularNr' in form_info:
-                self._update_element_text(kopf_elem, 'FormularNr', str(form_info['FormularNr']))
+                self._update_element_text(header_elem, 'FormularNr', str(form_info['FormularNr']))
 
             # Set layout information
             if 'Anzahl_Zeilen' in form_info:
-                self._update_element_text(kopf_elem, 'Anzahl_Zeilen', str(form_info['Anzahl_Zeilen']))
+                self._update_element_text(header_elem, 'Anzahl_Zeilen', str(form_info['Anzahl_Zeilen']))
             if 'Anzahl_Spalten' in form_info:
-                self._update_element_text(kopf_elem, 'Anzahl_Spalten', str(form_info['Anzahl_Spalten']))
+                self._update_element_text(header_elem, 'Anzahl_Spalten', str(form_info['Anzahl_Spalten']))
             if 'Generatortyp' in form_info:
-                self._update_element_text(kopf_elem, 'Generatortyp', str(form_info['Generatortyp']))
+                self._update_element_text(header_elem, 'Generatortyp', str(form_info['Generatortyp']))
+        if validation is not None and header_elem is not None and kopf_elem is None:
+            validation.check_row(header_elem)
 
         # Update language descriptions
         if 'descriptions' in data and isinstance(data['descriptions'], list):
@@ -216,22 +771,22 @@ class JsonToListLabelConverter:
                 text = desc.get('text', '')
 
                 # Find or create a ttBG_FKopfSpr element for this language
-                self._update_description(root, language, text)
+                self._update_description(root, language, text, kopf_elem, validation)
 
         # Create sections from JSON data
         if 'sections' in data and isinstance(data['sections'], list):
             for section_data in data['sections']:
-                self._create_section(root, section_data)
+                self._create_section(root, section_data, kopf_elem, validation)
 
         # Add fields from JSON data
         if 'fields' in data and isinstance(data['fields'], list):
             for field_data in data['fields']:
-                self._create_field(root, field_data)
+                self._create_field(root, field_data, kopf_elem, validation)
 
         # Add text elements from JSON data
         if 'texts' in data and isinstance(data['texts'], list):
             for text_data in data['texts']:
-                self._create_text(root, text_data)
+                self._create_text(root, text_data, kopf_elem, validation)
 
     def _find_element(self, parent: ET.Element, tag_name: str) -> Optional[ET.Element]:
         """Find first element with given tag name"""
@@ -243,23 +798,37 @@ class JsonToListLabelConverter:
         if elem is not None:
             elem.text = text
 
-    def _update_description(self, root: ET.Element, language: str, text: str) -> None:
+    def _form_identity(self, kopf_elem: ET.Element) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        """Return Firma, Formular and FormularNr of a form header, the key columns of all its rows"""
+        firma = kopf_elem.find('Firma')
+        formular = kopf_elem.find('Formular')
+        formular_nr = kopf_elem.find('FormularNr')
+        return (firma.text if firma is not None else '1',
+                formular.text if formular is not None else '',
+                formular_nr.text if formular_nr is not None else '0')
+
+    def _update_description(self, root: ET.Element, language: str, text: str, kopf_elem: ET.Element = None,
+                            validation: '_RowValidation' = None) -> None:
         """Update or create language description"""
-        # Look for existing description for this language
+        # Look for existing description for this language (of the given form only, if there is one)
+        identity = self._form_identity(kopf_elem) if kopf_elem is not None else None
         for desc_elem in root.findall('ttBG_FKopfSpr'):
+            if identity is not None and self._form_identity(desc_elem) != identity:
+                continue
             if desc_elem.find('Sprache') is not None and desc_elem.find('Sprache').text == language:
                 # Update existing description
                 bezeichnung_elem = desc_elem.find('Bezeichnung')
                 if bezeichnung_elem is not None:
                     bezeichnung_elem.text = text
+                if validation is not None:
+                    validation.check_row(desc_elem)
                 return
 
         # No existing description found, create a new one
-        kopf_elem = self._find_element(root, 'ttBG_FKopf')
+        if kopf_elem is None:
+            kopf_elem = self._find_element(root, 'ttBG_FKopf')
         if kopf_elem is not None:
-            firma = kopf_elem.find('Firma').text if kopf_elem.find('Firma') is not None else '1'
-            formular = kopf_elem.find('Formular').text if kopf_elem.find('Formular') is not None else ''
-            formular_nr = kopf_elem.find('FormularNr').text if kopf_elem.find('FormularNr') is not None else '0'
+            firma, formular, formular_nr = self._form_identity(kopf_elem)
 
             desc_elem = ET.SubElement(root, 'ttBG_FKopfSpr')
             ET.SubElement(desc_elem, 'Firma').text = firma
@@ -267,8 +836,11 @@ class JsonToListLabelConverter:
             ET.SubElement(desc_elem, 'FormularNr').text = formular_nr
             ET.SubElement(desc_elem, 'Sprache').text = language
             ET.SubElement(desc_elem, 'Bezeichnung').text = text
+            if validation is not None:
+                validation.check_row(desc_elem)
 
-    def _create_section(self, root: ET.Element, section_data: Dict[str, Any]) -> None:
+    def _create_section(self, root: ET.Element, section_data: Dict[str, Any], kopf_elem: ET.Element = None,
+                        validation: '_RowValidation' = None) -> None:
         """Create a section element from JSON data"""
         section_id = section_data.get('id', '')
         if not section_id:
@@ -276,14 +848,13 @@ class JsonToListLabelConverter:
             return
 
         # Get form information from ttBG_FKopf
-        kopf_elem = self._find_element(root, 'ttBG_FKopf')
+        if kopf_elem is None:
+            kopf_elem = self._find_element(root, 'ttBG_FKopf')
         if kopf_elem is None:
             logging.warning("No ttBG_FKopf element found")
             return
 
-        firma = kopf_elem.find('Firma').text if kopf_elem.find('Firma') is not None else '1'
-        formular = kopf_elem.find('Formular').text if kopf_elem.find('Formular') is not None else ''
-        formular_nr = kopf_elem.find('FormularNr').text if kopf_elem.find('FormularNr') is not None else '0'
+        firma, formular, formular_nr = self._form_identity(kopf_elem)
 
         # Create a new section
         section_elem = ET.SubElement(root, 'ttBG_FAbschnitt')
@@ -303,8 +874,11 @@ class JsonToListLabelConverter:
         # Generate a unique object ID
         obj_id = f"PA0170:zWLD:{section_id}_{formular_nr}_{formular}"
         ET.SubElement(section_elem, 'BG_FAbschnitt_Obj').text = obj_id
+        if validation is not None:
+            validation.check_row(section_elem)
 
-    def _create_field(self, root: ET.Element, field_data: Dict[str, Any]) -> None:
+    def _create_field(self, root: ET.Element, field_data: Dict[str, Any], kopf_elem: ET.Element = None,
+                      validation: '_RowValidation' = None) -> None:
         """Create a field element from JSON data"""
         field_id = field_data.get('id', '')
         section_id = field_data.get('section', '')
@@ -315,14 +889,14 @@ class JsonToListLabelConverter:
             return
 
         # Get form information from ttBG_FKopf
-        kopf_elem = self._find_element(root, 'ttBG_FKopf')
+        form_scoped = kopf_elem is not None  # Several forms share the document
+        if kopf_elem is None:
+            kopf_elem = self._find_element(root, 'ttBG_FKopf')
         if kopf_elem is None:
             logging.warning("No ttBG_FKopf element found")
             return
 
-        firma = kopf_elem.find('Firma').text if kopf_elem.find('Firma') is not None else '1'
-        formular = kopf_elem.find('Formular').text if kopf_elem.find('Formular') is not None else ''
-        formular_nr = kopf_elem.find('FormularNr').text if kopf_elem.find('FormularNr') is not None else '0'
+        firma, formular, formular_nr = self._form_identity(kopf_elem)
 
         # Create a new field
         field_elem = ET.SubElement(root, 'ttBG_FFeld')
@@ -373,12 +947,19 @@ class JsonToListLabelConverter:
                 ET.SubElement(trans_elem, 'Feldinhalt').text = text
                 if format_text:
                     ET.SubElement(trans_elem, 'FeldFormat').text = format_text
+                if validation is not None:
+                    validation.check_row(trans_elem)
 
         # Generate a unique object ID
         obj_id = f"PA0172:zWLD:{field_id}_{formular_nr}_{section_id}"
+        if form_scoped:
+            obj_id += f"_{formular}"
         ET.SubElement(field_elem, 'BG_FFeld_Obj').text = obj_id
+        if validation is not None:
+            validation.check_row(field_elem)
 
-    def _create_text(self, root: ET.Element, text_data: Dict[str, Any]) -> None:
+    def _create_text(self, root: ET.Element, text_data: Dict[str, Any], kopf_elem: ET.Element = None,
+                     validation: '_RowValidation' = None) -> None:
         """Create a text element from JSON data"""
         text_art = text_data.get('TextArt', '')
         schluessel = text_data.get('Schluessel', '')
@@ -388,14 +969,14 @@ class JsonToListLabelConverter:
             return
 
         # Get form information from ttBG_FKopf
-        kopf_elem = self._find_element(root, 'ttBG_FKopf')
+        form_scoped = kopf_elem is not None  # Several forms share the document
+        if kopf_elem is None:
+            kopf_elem = self._find_element(root, 'ttBG_FKopf')
         if kopf_elem is None:
             logging.warning("No ttBG_FKopf element found")
             return
 
-        firma = kopf_elem.find('Firma').text if kopf_elem.find('Firma') is not None else '1'
-        formular = kopf_elem.find('Formular').text if kopf_elem.find('Formular') is not None else ''
-        formular_nr = kopf_elem.find('FormularNr').text if kopf_elem.find('FormularNr') is not None else '0'
+        firma, formular, formular_nr = self._form_identity(kopf_elem)
 
         # Create a new text element
         text_elem = ET.SubElement(root, 'ttBG_FText')
@@ -407,7 +988,11 @@ class JsonToListLabelConverter:
 
         # Generate a unique object ID
         obj_id = f"PA0171:zWLD:{text_art}_{schluessel}_{formular_nr}"
+        if form_scoped:
+            obj_id += f"_{formular}"
         ET.SubElement(text_elem, 'BG_FText_Obj').text = obj_id
+        if validation is not None:
+            validation.check_row(text_elem)
 
         # Add text content if provided
         if 'content' in text_data and isinstance(text_data['content'], dict):
@@ -421,19 +1006,515 @@ class JsonToListLabelConverter:
 
                 # Generate a unique object ID for the text content
                 text_obj_id = f"PA0174:zWLD:{text_art}_{schluessel}_{language}"
+                if form_scoped:
+                    text_obj_id += f"_{formular_nr}_{formular}"
                 ET.SubElement(text_kopf_elem, 'BT_Kopf_Obj').text = text_obj_id
+                if validation is not None:
+                    validation.check_row(text_kopf_elem)
+
+
+class _CompiledTemplate:
+    """
+    A template split into its static part, rendered once, and the data rows it starts with
+
+    Everything before the first data row (the embedded xsd:schema) is the same for every
+    output, so it is copied, serialized and fixed up once instead of for every form. Per
+    form only the data rows are built and rendered, and the result matches the full
+    rendering byte for byte. Templates whose data rows use namespaces (which would make
+    the row serialization depend on the rest of the document) are not compiled.
+    """
+
+    MARKER = 'rows of the converted form'
+
+    def __init__(self, root_tag: str, rows: List[ET.Element], prefix: str, suffix: str):
+        self.root_tag = root_tag
+        self.rows = rows
+        self.prefix = prefix
+        self.suffix = suffix
+
+    @classmethod
+    def build(cls, converter: 'JsonToListLabelConverter') -> Optional['_CompiledTemplate']:
+        root = converter.template_root
+        children = list(root)
+        static_count = 0
+        while static_count < len(children) and children[static_count].tag.startswith('{'):
+            static_count += 1
+        rows = children[static_count:]
+        if root.tag.startswith('{') or any(elem.tag.startswith('{') or any(key.startswith('{') for key in elem.attrib)
+                                           for row in rows for elem in row.iter()):
+            return None
+
+        skeleton = ET.Element(root.tag, root.attrib)
+        skeleton.text = root.text
+        skeleton.extend(children[:static_count])
+        skeleton.append(ET.Comment(cls.MARKER))
+        parts = converter._render_pdi(ET.ElementTree(skeleton)).split(f'<!--{cls.MARKER}-->')
+        if len(parts) != 2:
+            return None
+        return cls(root.tag, rows, parts[0], parts[1])
+
+
+XSD_NAMESPACE = 'http://www.w3.org/2001/XMLSchema'
+PRODATA_NAMESPACE = 'urn:schemas-progress-com:xml-prodata:0001'
+XSI_NIL = '{http://www.w3.org/2001/XMLSchema-instance}nil'
+VALIDATION_MODES = ('fail_fast', 'collect')
+
+_INTEGER = re.compile(r'^[+-]?\d+$')
+_DECIMAL = re.compile(r'^[+-]?(?:\d+(?:\.\d*)?|\.\d+)$')
+_BASE64 = re.compile(r'^[A-Za-z0-9+/\s]*=?=?\s*$')
+# Lexical forms of xsd:date and xsd:dateTime including the optional timezone; the calendar is checked separately
+_XSD_TIMEZONE = r'(?:Z|[+-](?:(?:0\d|1[0-3]):[0-5]\d|14:00))?'
+_XSD_DATE = re.compile(r'^(-?\d{4,})-(\d\d)-(\d\d)' + _XSD_TIMEZONE + '$')
+_XSD_DATETIME = re.compile(r'^(-?\d{4,})-(\d\d)-(\d\d)'
+                           r'T(?:(?:[01]\d|2[0-3]):[0-5]\d:[0-5]\d(?:\.\d+)?|24:00:00(?:\.0+)?)' + _XSD_TIMEZONE + '$')
+_FORMAT_REPEAT = re.compile(r'(.)\((\d+)\)')
+_INTEGER_RANGES = {'int': (-2 ** 31, 2 ** 31 - 1), 'long': (-2 ** 63, 2 ** 63 - 1),
+                   'short': (-2 ** 15, 2 ** 15 - 1), 'integer': (None, None)}
+
+
+class RowError(NamedTuple):
+    """One problem found in a generated row"""
+    table: str
+    column: Optional[str]
+    value: Optional[str]
+    message: str
+
+    def __str__(self) -> str:
+        column = f".{self.column}" if self.column else ''
+        value = f" (value {self.value!r})" if self.value is not None else ''
+        return f"{self.table}{column}: {self.message}{value}"
+
+
+class SchemaValidationError(ValueError):
+    """Raised for generated rows that do not match the schema embedded in the template"""
+
+    def __init__(self, errors: List[RowError]):
+        self.errors = errors
+        shown = '; '.join(str(error) for error in errors[:10])
+        more = f" and {len(errors) - 10} more" if len(errors) > 10 else ''
+        super().__init__(f"{len(errors)} schema violation(s): {shown}{more}")
+
+
+def _expand_format(display_format: str) -> str:
+    """Expand the repeat counts of a Progress display format, e.g. x(3) to xxx"""
+    return _FORMAT_REPEAT.sub(lambda match: match.group(1) * int(match.group(2)), display_format)
+
+
+def _is_calendar_date(year: str, month: str, day: str) -> bool:
+    """Check the date part of an xsd:date or xsd:dateTime; there is no year 0000 and no zero-padded year past 9999"""
+    import calendar
+    digits = year.lstrip('-')
+    if int(digits) == 0 or (len(digits) > 4 and digits.startswith('0')):
+        return False
+    month, day = int(month), int(day)
+    if not 1 <= month <= 12:
+        return False
+    return 1 <= day <= (29 if month == 2 and calendar.isleap(int(year)) else calendar.mdays[month])
+
+
+def _compile_column_check(column: ET.Element) -> Callable[[Optional[str]], Optional[str]]:
+    """
+    Compile the check of one column from its xsd:element declaration
+
+    The returned function takes the text of a cell and returns an error message, or None
+    if the value fits the declared XML type and Progress display format.
+    """
+    xsd_type = column.get('type', 'xsd:string').split(':')[-1]
+    display_format = column.get(f'{{{PRODATA_NAMESPACE}}}format')
+
+    if xsd_type == 'string':
+        expanded = _expand_format(display_format or '')
+        if not expanded or set(expanded.lower()) != {'x'}:
+            return lambda value: None  # No format, or a display mask rather than a length
+        width = len(expanded)
+        message = f"longer than {width} characters (format {display_format})"
+        return lambda value: message if value is not None and len(value) > width else None
+
+    if xsd_type in _INTEGER_RANGES or xsd_type in ('decimal', 'double', 'float'):
+        minimum, maximum = _INTEGER_RANGES.get(xsd_type, (None, None))
+        integer_format = _expand_format(display_format or '').partition('.')[0]
+        digits = sum(integer_format.count(char) for char in '9zZ>*') if display_format else None
+        signed = not display_format or any(char in display_format for char in '-+(')
+        pattern = _INTEGER if xsd_type in _INTEGER_RANGES else _DECIMAL
+
+        def check_number(value: Optional[str]) -> Optional[str]:
+            if value is None or not pattern.match(value.strip()):
+                return f"not a valid xsd:{xsd_type}"
+            value = value.strip()
+            if minimum is not None and not minimum <= int(value) <= maximum:
+                return f"out of range for xsd:{xsd_type}"
+            if value.startswith('-') and not signed:
+                return f"negative, but format {display_format} has no sign"
+            if digits is not None and len(value.lstrip('+-').split('.')[0].lstrip('0')) > digits:
+                return f"more than {digits} digits (format {display_format})"
+            return None
+        return check_number
+
+    if xsd_type == 'boolean':
+        return lambda value: None if value in ('true', 'false', '1', '0') else "not a valid xsd:boolean"
+
+    if xsd_type in ('date', 'dateTime'):
+        # Not date.fromisoformat: it accepts ISO 8601 forms xsd does not (20240101, week dates)
+        # and rejects timezones on dates
+        pattern = _XSD_DATE if xsd_type == 'date' else _XSD_DATETIME
+
+        def check_date(value: Optional[str]) -> Optional[str]:
+            match = pattern.match(value) if value is not None else None
+            if match is None or not _is_calendar_date(*match.groups()):
+                return f"not a valid xsd:{xsd_type}"
+            return None
+        return check_date
+
+    if xsd_type == 'base64Binary':
+        return lambda value: None if value is None or _BASE64.match(value) else "not valid xsd:base64Binary"
+
+    return lambda value: None
+
+
+class SchemaValidator:
+    """
+    Row checks compiled from the xsd:schema embedded in a template
+
+    Every table of the ProDataSet becomes a map of column name to a compiled check, and
+    every xsd:unique constraint a tuple of key columns. Compiling happens once per
+    template; checking a row is then one dictionary lookup and one call per cell.
+    """
+
+    def __init__(self, tables: Dict[str, Dict[str, Tuple[Callable[[Optional[str]], Optional[str]], bool]]],
+                 unique_keys: Dict[str, List[Tuple[str, Tuple[str, ...]]]]):
+        self.tables = tables
+        self.unique_keys = unique_keys
+
+    @classmethod
+    def from_template(cls, template_root: ET.Element) -> 'SchemaValidator':
+        """Compile the validator from the root of a parsed template"""
+        schema = template_root.find(f'{{{XSD_NAMESPACE}}}schema')
+        if schema is None:
+            raise ValueError("Template has no embedded xsd:schema to validate against")
+        element_tag = f'{{{XSD_NAMESPACE}}}element'
+        sequence_path = f'{{{XSD_NAMESPACE}}}complexType/{{{XSD_NAMESPACE}}}sequence'
+
+        tables = {}
+        unique_keys: Dict[str, List[Tuple[str, Tuple[str, ...]]]] = {}
+        for dataset in schema.findall(element_tag):
+            sequence = dataset.find(sequence_path)
+            if sequence is None:
+                continue
+            for table in sequence.findall(element_tag):
+                table_sequence = table.find(sequence_path)
+                if table_sequence is None:
+                    continue
+                tables[table.get('name')] = {
+                    column.get('name'): (_compile_column_check(column), column.get('nillable') == 'true')
+                    for column in table_sequence.findall(element_tag)
+                }
+            for unique in dataset.findall(f'{{{XSD_NAMESPACE}}}unique'):
+                selector = unique.find(f'{{{XSD_NAMESPACE}}}selector')
+                if selector is None:
+                    continue
+                table_name = selector.get('xpath', '').split('/')[-1]
+                fields = tuple(field.get('xpath') for field in unique.findall(f'{{{XSD_NAMESPACE}}}field'))
+                unique_keys.setdefault(table_name, []).append((unique.get('name'), fields))
+        return cls(tables, unique_keys)
+
+    def check_row(self, row: ET.Element) -> List[RowError]:
+        """Check the cells of one row (uniqueness needs the whole document, see start())"""
+        columns = self.tables.get(row.tag)
+        if columns is None:
+            return [RowError(row.tag, None, None, "table not declared in the template schema")]
+        errors = []
+        for cell in row:
+            declared = columns.get(cell.tag)
+            if declared is None:
+                errors.append(RowError(row.tag, cell.tag, None, "column not declared in the template schema"))
+                continue
+            check, nillable = declared
+            if cell.get(XSI_NIL) == 'true':
+                if not nillable:
+                    errors.append(RowError(row.tag, cell.tag, None, "nil, but the column is not nillable"))
+                continue
+            message = check(cell.text)
+            if message is not None:
+                errors.append(RowError(row.tag, cell.tag, cell.text, message))
+        return errors
+
+    def start(self, fail_fast: bool = True, unique_keys: Dict[str, Dict[tuple, ET.Element]] = None,
+              document: ET.Element = None) -> '_RowValidation':
+        """
+        Begin validating the rows of one form
+
+        Args:
+            fail_fast: Raise at the first invalid row instead of collecting all errors
+            unique_keys: Unique keys already used by the document the form goes into (for
+                documents combining several forms), updated with the keys of the form
+            document: Root of a new output document; the rows it starts with (the sample
+                rows of the template) are registered as taken keys without being checked
+        """
+        return _RowValidation(self, fail_fast, unique_keys, document)
+
+
+class _RowValidation:
+    """Validation state of one form: the errors so far and the unique keys taken"""
+
+    def __init__(self, validator: SchemaValidator, fail_fast: bool,
+                 unique_keys: Dict[str, Dict[tuple, ET.Element]] = None, document: ET.Element = None):
+        self.validator = validator
+        self.fail_fast = fail_fast
+        self.errors: List[RowError] = []
+        self._seen = unique_keys if unique_keys is not None else {}  # Index name -> key -> row holding it
+        self._added: List[Tuple[Dict[tuple, ET.Element], tuple]] = []
+        self._row_keys: Dict[ET.Element, List[Tuple[Dict[tuple, ET.Element], tuple]]] = {}
+        if document is not None:
+            for row in document:
+                if row.tag in validator.unique_keys:
+                    self._take_keys(row)
+
+    def _take_keys(self, row: ET.Element) -> List[RowError]:
+        """Register the unique keys of a row, returning an error for each key another row holds"""
+        # A row checked again after an update in place gives up the keys it held before
+        for seen, key in self._row_keys.pop(row, ()):
+            if seen.get(key) is row:
+                del seen[key]
+        errors = []
+        taken = []
+        for name, fields in self.validator.unique_keys.get(row.tag, ()):
+            key = tuple(row.findtext(field) for field in fields)
+            seen = self._seen.setdefault(name, {})
+            if seen.setdefault(key, row) is not row:
+                errors.append(RowError(row.tag, None, '/'.join(map(str, key)), f"duplicate key of unique index {name}"))
+            else:
+                taken.append((seen, key))
+        self._row_keys[row] = taken
+        self._added.extend(taken)
+        return errors
+
+    def check_row(self, row: ET.Element) -> None:
+        """Check a completed row; raises at the first invalid row in fail-fast mode"""
+        errors = self.validator.check_row(row)
+        errors.extend(self._take_keys(row))
+        if errors:
+            self.errors.extend(errors)
+            if self.fail_fast:
+                raise SchemaValidationError(self.errors)
+
+    def finish(self) -> None:
+        """Raise for the errors collected in collect mode"""
+        if self.errors:
+            raise SchemaValidationError(self.errors)
+
+    def rollback(self) -> None:
+        """Release the unique keys of a form that was rejected after all"""
+        for seen, key in self._added:
+            seen.pop(key, None)
+        self._added.clear()
+        self._row_keys.clear()
+
+
+def _normalize_validation(validation: Optional[str]) -> Optional[str]:
+    """Check a validation option ('fail_fast', 'collect' or None)"""
+    if validation not in (None,) + VALIDATION_MODES:
+        raise ValueError(f"Unsupported validation mode: {validation}")
+    return validation
+
+
+def iter_documents(input_stream: IO, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """
+    Yield the documents of a bulk input stream one at a time
+
+    Accepts a JSON array of documents, NDJSON (or any whitespace separated sequence of
+    JSON documents) and a single document; a binary intermediate document holding a list
+    is read as a whole. Only one document is held in memory at a time otherwise.
+
+    Args:
+        input_stream: Binary stream with the bulk input
+        chunk_size: Number of bytes read at a time
+
+    Yields:
+        The parsed documents in input order
+    """
+    import codecs
+
+    head = input_stream.read(len(BINARY_MAGIC))
+    if head == BINARY_MAGIC:
+        data = BinaryReader(input_stream, initial=head).load()
+        yield from (data if isinstance(data, list) else [data])
+        return
+
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    buffer = text_decoder.decode(head)
+    pos = 0
+    at_end = False
+    in_array = None  # Unknown until the first character
+    expect_value = True
+    after_comma = False  # A ',' must be followed by another element, JSON has no trailing commas
+    read_size = chunk_size
+
+    while True:
+        # Skip whitespace, and in an array the commas between elements
+        while pos < len(buffer) and (buffer[pos].isspace() or (in_array and not expect_value and buffer[pos] == ',')):
+            if buffer[pos] == ',':
+                expect_value = after_comma = True
+            pos += 1
+        if pos == len(buffer):
+            if at_end:
+                break
+            chunk = input_stream.read(read_size)
+            at_end = not chunk
+            buffer = buffer[pos:] + text_decoder.decode(chunk, final=at_end)
+            pos = 0
+            continue
+
+        if in_array is None:
+            in_array = buffer[pos] == '['
+            if in_array:
+                pos += 1
+                continue
+        if in_array and buffer[pos] == ']':
+            if expect_value and after_comma:
+                raise json.JSONDecodeError("Expecting value after ',' in the array", buffer, pos)
+            if buffer[pos + 1:].strip() or (not at_end and input_stream.read().strip()):
+                raise json.JSONDecodeError("Extra data after the array", buffer, pos + 1)
+            return
+        if in_array and not expect_value:
+            raise json.JSONDecodeError("Expected ',' or ']' between array elements", buffer, pos)
+
+        try:
+            document, end = decoder.raw_decode(buffer, pos)
+            complete = end < len(buffer) or at_end
+        except json.JSONDecodeError:
+            if at_end:
+                raise
+            complete = False
+        if not complete:
+            # Document continues in the next chunk; read ever larger chunks so a large
+            # document is not parsed again for every chunk
+            chunk = input_stream.read(read_size)
+            at_end = not chunk
+            buffer = buffer[pos:] + text_decoder.decode(chunk, final=at_end)
+            pos = 0
+            read_size = max(read_size, len(buffer))
+            continue
+
+        yield document
+        pos = end
+        expect_value = not in_array
+        after_comma = False
+        read_size = chunk_size
+        if pos > chunk_size:
+            buffer = buffer[pos:]
+            pos = 0
+
+    if in_array:
+        raise json.JSONDecodeError("Unterminated array", buffer, pos)
+
+
+def _read_bytes(path: str) -> bytes:
+    with _open_file(path, 'rb') as f:
+        return f.read()
+
+
+def _write_bytes(path: str, data: bytes, compression_level: int = None) -> None:
+    with _open_file(path, 'wb', compression_level=compression_level) as f:
+        f.write(data)
+
+
+def _normalize_compression(compression: Optional[str]) -> str:
+    """Map an output_compression option ('gz', 'bz2', 'xz' or None) to a file suffix"""
+    if not compression:
+        return ''
+    suffix = '.' + compression.lower().lstrip('.')
+    if suffix == '.gzip':
+        suffix = '.gz'
+    if suffix not in COMPRESSION_CODECS:
+        raise ValueError(f"Unsupported output compression: {compression}")
+    return suffix
+
+
+def _normalize_bulk_mode(bulk_mode: Optional[str]) -> Optional[str]:
+    """Check a bulk_mode option ('per_form', 'per_firma' or None)"""
+    if bulk_mode not in (None, 'per_form', 'per_firma'):
+        raise ValueError(f"Unsupported bulk mode: {bulk_mode}")
+    return bulk_mode
+
+
+def _is_supported_input(input_file: str, bulk: bool = False) -> bool:
+    """Check the input suffix, looking through any compression suffix"""
+    suffixes = ('.json', BINARY_SUFFIX, '.ndjson', '.jsonl') if bulk else ('.json', BINARY_SUFFIX)
+    return _strip_compression_suffix(input_file).lower().endswith(suffixes)
+
+
+def _output_path_for(input_file: str, output_dir: Optional[str],
+                     compression_suffix: str = '') -> Optional[str]:
+    """Return the .pdi output path for an input file, or None to write next to it"""
+    if not output_dir and not compression_suffix:
+        return None
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    filename = os.path.basename(_strip_compression_suffix(input_file)).rsplit('.', 1)[0] + '.pdi'
+    return os.path.join(output_dir or os.path.dirname(input_file), filename + compression_suffix)
+
+
+def _convert_bulk_input(converter: JsonToListLabelConverter, input_file: str, output_dir: Optional[str],
+                        bulk_mode: str, compression_suffix: str) -> Tuple[List[str], List[Tuple[int, str]]]:
+    """Convert one bulk input file, returning the generated .pdi paths and the forms that failed"""
+    failed_forms = []
+    result_paths = converter.convert_bulk_file(input_file, output_dir, bulk_mode == 'per_firma', compression_suffix,
+                                               failed_forms)
+    print(f"[DEBUG] Converted {len(result_paths)} .pdi files from: {input_file}")
+    if failed_forms:
+        logging.error(f"{len(failed_forms)} forms of {input_file} failed to convert")
+        print(f"[ERROR] {len(failed_forms)} forms of {input_file} failed to convert")
+    return result_paths, failed_forms
+
+
+def _profiling_hooks() -> Any:
+    """Import modules/profiling_hooks.py (shared by the converter modules) by path on first use"""
+    import importlib.util
+    import sys
+    module = sys.modules.get('profiling_hooks')
+    if module is None:
+        path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'profiling_hooks.py')
+        spec = importlib.util.spec_from_file_location('profiling_hooks', path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules['profiling_hooks'] = module
+    return module
 
 
 def convert(input_files: List[str], output_dir: str = None, template_path: str = "Empty_List_Label.pdi",
-            additional_files: List[str] = None, **options) -> List[str]:
+            additional_files: List[str] = None, converter: JsonToListLabelConverter = None,
+            **options) -> List[str]:
     """
     Main conversion function for the module system
 
+    Profiling (off by default) is enabled with the profile_dir option. Selected files are
+    converted under cProfile and tracemalloc and get a .prof dump and an .alloc.txt report
+    in that directory; profile_every=N selects every Nth file, profile_min_size only files
+    of at least that many bytes and profile_top sets the length of the allocation report.
+
+    Bulk input (a JSON array or NDJSON stream of form documents per file, also .ndjson and
+    .jsonl) is read with bulk_mode='per_form', writing one .pdi per form, or
+    bulk_mode='per_firma', writing one combined .pdi per Firma; the template is compiled
+    once for all forms.
+
+    Schema validation (off by default) is enabled with validation='fail_fast', stopping a
+    form at its first invalid row, or validation='collect', reporting all invalid rows of
+    the form. Rows are checked against the template's xsd:schema as they are generated;
+    an invalid form is reported like any failed conversion and no .pdi is written for it.
+
+    Input files that fail to convert (or are skipped) are appended to the failed_files
+    list if one is passed, so callers can tell failures apart from bulk inputs producing
+    several or no outputs. A bulk input counts as failed if any of its forms failed, even
+    though the .pdi files of its other forms are written.
+
     Args:
         input_files: List of JSON file paths to convert
         output_dir: Directory for output .pdi files
         template_path: Path to the template .pdi file
         additional_files: List of additional files from pipeline
+        converter: Already initialized converter to use instead of loading the template again
+            (e.g. one kept warm by a long-running service)
         **options: Additional conversion options
 
     Returns:
@@ -447,42 +1528,155 @@ def convert(input_files: List[str], output_dir: str = None, template_path: str =
     print(f"  options: {options}")
 
     try:
-        converter = JsonToListLabelConverter(template_path, additional_files)
+        if converter is None:
+            converter = JsonToListLabelConverter(template_path, additional_files,
+                                                 compression_level=options.get('compression_level'),
+                                                 validation=options.get('validation'))
+        compression_suffix = _normalize_compression(options.get('output_compression'))
+        bulk_mode = _normalize_bulk_mode(options.get('bulk_mode'))
     except Exception as e:
         logging.error(f"Failed to initialize converter: {str(e)}")
         print(f"[ERROR] Failed to initialize converter: {str(e)}")
+        if options.get('failed_files') is not None:
+            options['failed_files'].extend(input_files)
         return []
 
     output_files = []
+    file_index = 0
 
     for input_file in input_files:
         print(f"[DEBUG] Processing input file: {input_file}")
         try:
-            if not input_file.lower().endswith('.json'):
+            if not _is_supported_input(input_file, bulk=bulk_mode is not None):
                 logging.warning(f"Skipping non-JSON file: {input_file}")
                 print(f"[WARNING] Skipping non-JSON file: {input_file}")
+                if options.get('failed_files') is not None:
+                    options['failed_files'].append(input_file)
                 continue
 
-            if output_dir:
-                os.makedirs(output_dir, exist_ok=True)
-                filename = os.path.basename(input_file).rsplit('.', 1)[0] + '.pdi'
-                output_path = os.path.join(output_dir, filename)
-            else:
-                output_path = None
+            if bulk_mode is not None:
+                result_paths, failed_forms = _convert_bulk_input(converter, input_file, output_dir, bulk_mode,
+                                                                 compression_suffix)
+                output_files.extend(result_paths)
+                if failed_forms and options.get('failed_files') is not None:
+                    options['failed_files'].append(input_file)
+                continue
+
+            output_path = _output_path_for(input_file, output_dir, compression_suffix)
 
             print(f"[DEBUG] Converting to output path: {output_path}")
-            result_path = converter.convert_file(input_file, output_path)
+            profiling = _profiling_hooks().profiling_context(input_file, file_index, options)
+            file_index += 1
+            with profiling:
+                result_path = converter.convert_file(input_file, output_path)
             output_files.append(result_path)
             print(f"[DEBUG] Successfully converted to: {result_path}")
 
         except Exception as e:
             logging.error(f"Error converting {input_file}: {str(e)}")
             print(f"[ERROR] Error converting {input_file}: {str(e)}")
+            if options.get('failed_files') is not None:
+                options['failed_files'].append(input_file)
 
     print(f"[DEBUG] convert() returning: {output_files}")
     return output_files
 
 
+async def convert_async(input_files: Iterable[str], output_dir: str = None,
+                        template_path: str = "Empty_List_Label.pdi", additional_files: List[str] = None,
+                        executor: 'Executor' = None, max_concurrency: int = 4,
+                        **options) -> AsyncIterator[Tuple[str, Optional[str]]]:
+    """
+    Asynchronous conversion function for asyncio based callers
+
+    At most max_concurrency files are in flight at any time. New files are only started
+    while the caller keeps consuming results, so a slow consumer applies backpressure.
+    Cancelling the consumer or closing the generator cancels all files still in flight.
+
+    The bulk_mode option reads bulk inputs as convert() does. A bulk input yields one tuple
+    per generated .pdi, and an additional (input_file, None) if any of its forms failed.
+
+    Args:
+        input_files: Iterable of JSON file paths to convert
+        output_dir: Directory for output .pdi files
+        template_path: Path to the template .pdi file
+        additional_files: List of additional files from pipeline
+        executor: Executor for the CPU-bound rendering work (defaults to the loop's executor)
+        max_concurrency: Maximum number of files converted at the same time
+        **options: Additional conversion options
+
+    Yields:
+        (input_file, result_path) tuples in completion order; result_path is None if
+        the file failed to convert
+    """
+    import asyncio
+
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+
+    try:
+        converter = await asyncio.to_thread(JsonToListLabelConverter, template_path, additional_files,
+                                            options.get('compression_level'), options.get('validation'))
+        compression_suffix = _normalize_compression(options.get('output_compression'))
+        bulk_mode = _normalize_bulk_mode(options.get('bulk_mode'))
+    except Exception as e:
+        logging.error(f"Failed to initialize converter: {str(e)}")
+        print(f"[ERROR] Failed to initialize converter: {str(e)}")
+        return
+
+    remaining = iter(input_files)
+    pending: Dict[asyncio.Future, str] = {}
+
+    try:
+        while True:
+            # Top up the in-flight set from the input
+            while len(pending) < max_concurrency:
+                input_file = next(remaining, None)
+                if input_file is None:
+                    break
+                if not _is_supported_input(input_file, bulk=bulk_mode is not None):
+                    logging.warning(f"Skipping non-JSON file: {input_file}")
+                    print(f"[WARNING] Skipping non-JSON file: {input_file}")
+                    continue
+
+                if bulk_mode is not None:
+                    task = asyncio.get_running_loop().run_in_executor(
+                        executor, _convert_bulk_input, converter, input_file, output_dir, bulk_mode,
+                        compression_suffix)
+                else:
+                    task = asyncio.ensure_future(converter.convert_file_async(
+                        input_file, _output_path_for(input_file, output_dir, compression_suffix), executor=executor))
+                pending[task] = input_file
+
+            if not pending:
+                break
+
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                input_file = pending.pop(task)
+                try:
+                    result = task.result()
+                except Exception as e:
+                    logging.error(f"Error converting {input_file}: {str(e)}")
+                    print(f"[ERROR] Error converting {input_file}: {str(e)}")
+                    result_paths = [None]
+                else:
+                    if bulk_mode is None:
+                        print(f"[DEBUG] Successfully converted to: {result}")
+                        result_paths = [result]
+                    else:
+                        result_paths, failed_forms = result
+                        result_paths = result_paths + [None] if failed_forms else result_paths
+                for result_path in result_paths:
+                    yield input_file, result_path
+
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
 if __name__ == "__main__":
     # Test the converter with example JSON files
     import glob
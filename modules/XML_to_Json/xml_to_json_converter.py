@@ -1,34 +1,401 @@
+import functools
+import importlib
+import io
 import json
 import xml.etree.ElementTree as ET
 import re
 import os
-from typing import Dict, Any, List, Optional
+import struct
+import sys
+import threading
+from dataclasses import asdict, dataclass, replace
+from typing import (TYPE_CHECKING, Dict, Any, AsyncIterator, FrozenSet, IO, Iterable, Iterator,
+                    List, Optional, Tuple)
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+# Compressed files are recognised by suffix and streamed through the matching stdlib codec,
+# which is only imported when such a file is actually opened
+COMPRESSION_CODECS = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'lzma'}
+
+
+def _compression_suffix(path: str) -> str:
+    """Return the compression suffix of a path ('.gz', '.bz2', '.xz') or an empty string"""
+    suffix = os.path.splitext(path)[1].lower()
+    return suffix if suffix in COMPRESSION_CODECS else ''
+
+
+def _strip_compression_suffix(path: str) -> str:
+    """Return the path without its compression suffix, e.g. 'a.xml.gz' -> 'a.xml'"""
+    suffix = _compression_suffix(path)
+    return path[:-len(suffix)] if suffix else path
+
+
+def _open_file(path: str, mode: str = 'rb', encoding: str = None, errors: str = None,
+               compression_level: int = None) -> IO:
+    """Open a file, transparently (de)compressing it when it has a compression suffix"""
+    codec_name = COMPRESSION_CODECS.get(_compression_suffix(path))
+    if codec_name is None:
+        return open(path, mode, encoding=encoding, errors=errors)
+
+    codec = importlib.import_module(codec_name)
+
+    # The codecs default to binary mode, while open() defaults to text mode
+    if 'b' not in mode and 't' not in mode:
+        mode += 't'
+
+    kwargs = {}
+    if compression_level is not None and 'r' not in mode:
+        kwargs['preset' if codec.__name__ == 'lzma' else 'compresslevel'] = compression_level
+    return codec.open(path, mode, encoding=encoding, errors=errors, **kwargs)
+
+
+# Fixes applied by preprocess_xml, shared with the streaming reader of the execution planner
+_XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8"?>'
+_STANDALONE_AMPERSAND = re.compile(r'&(?!amp;|lt;|gt;|quot;|apos;|#\d+;|#x[0-9a-fA-F]+;)')
+_CONTROL_CHARACTERS = re.compile(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]')
+
+
+@functools.lru_cache(maxsize=None)
+def _optional_module(name: str):
+    """Import an optional parser backend once per process, None if it is not installed"""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+def _xmltodict_arguments(options: 'ConversionOptions', interner: Optional['StringInterner']) -> Dict[str, Any]:
+    """Keyword arguments for xmltodict.parse shared by all conversion strategies"""
+    return dict(
+        attr_prefix=options.attribute_prefix,
+        cdata_key=options.text_key,
+        process_namespaces=True,
+        namespaces={},  # Collapse all namespaces
+        postprocessor=interner.xmltodict_postprocessor if interner is not None else None,
+    )
+
+
+@dataclass(frozen=True)
+class ConversionOptions:
+    """Immutable set of conversion options, passed per call or held by a converter"""
+    preserve_attributes: bool = True
+    attribute_prefix: str = "@"
+    text_key: str = "#text"
+    list_tags: FrozenSet[str] = frozenset()  # Tags that should always be arrays
+    debug_mode: bool = True  # Enable detailed debugging
+    compression_level: Optional[int] = None  # Level for compressed output, codec default if None
+    intern_strings: bool = True  # Share one string object per distinct key and short value
+    intern_max_entries: int = 65536  # Upper bound for the interning table of one conversion
+    intern_max_value_length: int = 40  # Longer values are assumed to be unique and not interned
+
+
+class StringInterner:
+    """
+    Bounded string table that hands out one shared object per distinct string
+
+    PDI exports repeat the same tag names (Firma, Formular, FormularNr, ...) and often the
+    same values in every row. Routing keys and short values of one conversion through an
+    interner makes the resulting dictionary reference a single object per distinct string.
+    Once the table is full, known strings are still shared and new ones are passed through.
+    """
+
+    def __init__(self, attribute_prefix: str = "@", max_entries: int = 65536, max_value_length: int = 40):
+        self.attribute_prefix = attribute_prefix
+        self.max_entries = max_entries
+        self.max_value_length = max_value_length
+        self._table: Dict[str, str] = {}
+        self._attribute_names: Dict[str, str] = {}
+
+    @classmethod
+    def from_options(cls, options: ConversionOptions) -> Optional['StringInterner']:
+        """Create an interner for one conversion, or None if interning is disabled"""
+        if not options.intern_strings:
+            return None
+        return cls(options.attribute_prefix, options.intern_max_entries, options.intern_max_value_length)
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def key(self, text: str) -> str:
+        """Return the shared object for a key"""
+        cached = self._table.get(text)
+        if cached is not None:
+            return cached
+        if len(self._table) < self.max_entries:
+            self._table[text] = text
+        return text
+
+    def value(self, text: str) -> str:
+        """Return the shared object for a value, leaving long (likely unique) values alone"""
+        if len(text) > self.max_value_length:
+            return text
+        return self.key(text)
+
+    def attribute_name(self, name: str) -> str:
+        """Return the shared, prefixed dictionary key for an XML attribute name"""
+        cached = self._attribute_names.get(name)
+        if cached is not None:
+            return cached
+        prefixed = self.key(f"{self.attribute_prefix}{name}")
+        if len(self._attribute_names) < self.max_entries:
+            self._attribute_names[name] = prefixed
+        return prefixed
+
+    def xmltodict_postprocessor(self, path: List[Any], key: str, value: Any) -> Tuple[str, Any]:
+        """Postprocessor for xmltodict.parse that interns every key and short string value"""
+        if isinstance(value, str):
+            value = self.value(value)
+        return self.key(key), value
+
+
+# Compact binary intermediate format, read by the Old-Pdi_to_New-Pdi module
+#
+#   header  b'CVB1'
+#   value   tag byte, followed by
+#     0x00 null, 0x01 false, 0x02 true
+#     0x03 int      8 byte little-endian signed
+#     0x04 float    8 byte little-endian IEEE 754 double
+#     0x05 big int  u32 length + ASCII digits
+#     0x06 string   u32 length + UTF-8, appended to the string table
+#     0x07 string   u8 length + UTF-8, appended to the string table
+#     0x08 string   u32 length + UTF-8, not added to the table
+#     0x09 string   u16 index into the string table
+#     0x0A string   u32 index into the string table
+#     0x0B list     u32 count + values      0x0D list  u8 count + values
+#     0x0C dict     u32 count + key/value pairs, keys are strings
+#     0x0E dict     u8 count + key/value pairs
+#     0x10 dict     new shape: u8 count + count key strings, appended to the shape table,
+#                   followed by the row
+#     0x11 dict     u16 index into the shape table, followed by the row
+#     row           one u16 string table index per key of the shape, 0 for values that
+#                   follow the indices inline, in key order
+#
+# The string table is built while writing: the first occurrence of a string defines the
+# next entry (numbered from 1) and later occurrences refer back to it, so neither side
+# needs a second pass. Shapes do the same for the key sequence of dictionaries, which all
+# rows of a table share, so a row is stored as an array of string indices.
+BINARY_MAGIC = b'CVB1'
+BINARY_SUFFIX = '.bjson'
+
+
+def _is_binary_path(path: str) -> bool:
+    """Check whether a path names a binary intermediate file, looking through any compression suffix"""
+    return _strip_compression_suffix(path).lower().endswith(BINARY_SUFFIX)
+
+
+class BinaryWriter:
+    """
+    Streaming writer of the compact binary intermediate format
+
+    Values are encoded into an internal buffer that is flushed to the stream whenever it
+    grows past flush_size, so a document can be written piece by piece with begin_dict,
+    begin_list and write without ever being held in memory as a whole.
+    """
+
+    def __init__(self, stream: IO, flush_size: int = 1 << 16, max_table_entries: int = 1 << 20,
+                 max_table_string_length: int = 255):
+        self._stream = stream
+        self._flush_size = flush_size
+        self._max_table_entries = max_table_entries
+        self._max_table_string_length = max_table_string_length
+        # Encoded reference of every string in the table, written as is on repetition
+        self._references: Dict[str, bytes] = {}
+        self._shapes: Dict[Tuple[str, ...], bytes] = {}
+        self._inline_slot = b'\x00\x00'
+        self._buffer = bytearray(BINARY_MAGIC)
+
+    def write(self, value: Any) -> None:
+        """Encode a JSON compatible value"""
+        value_type = type(value)
+        if value_type is str:
+            self.write_string(value)
+        elif value_type is dict:
+            self._write_dict(value)
+        elif value_type is list or value_type is tuple:
+            self._write_list(value)
+        elif value is None:
+            self._buffer.append(0x00)
+        elif value is True:
+            self._buffer.append(0x02)
+        elif value is False:
+            self._buffer.append(0x01)
+        elif isinstance(value, int):
+            if -(1 << 63) <= value < (1 << 63):
+                self._buffer.append(0x03)
+                self._buffer += value.to_bytes(8, 'little', signed=True)
+            else:
+                digits = str(value).encode('ascii')
+                self._buffer.append(0x05)
+                self._buffer += len(digits).to_bytes(4, 'little')
+                self._buffer += digits
+        elif isinstance(value, float):
+            self._buffer.append(0x04)
+            self._buffer += struct.pack('<d', value)
+        elif isinstance(value, str):
+            self.write_string(str(value))
+        elif isinstance(value, dict):
+            self._write_dict(value)
+        elif isinstance(value, (list, tuple)):
+            self._write_list(value)
+        else:
+            raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+    def write_string(self, text: str) -> None:
+        """Encode a string, as a reference if it was written before"""
+        reference = self._references.get(text)
+        if reference is not None:
+            self._buffer += reference
+            return
+
+        data = text.encode('utf-8')
+        buffer = self._buffer
+        if len(data) <= self._max_table_string_length and len(self._references) < self._max_table_entries:
+            index = len(self._references) + 1
+            self._references[text] = (b'\x09' + index.to_bytes(2, 'little') if index < 0x10000
+                                      else b'\x0a' + index.to_bytes(4, 'little'))
+            if len(data) < 0x100:
+                buffer.append(0x07)
+                buffer.append(len(data))
+            else:
+                buffer.append(0x06)
+                buffer += len(data).to_bytes(4, 'little')
+        else:
+            buffer.append(0x08)
+            buffer += len(data).to_bytes(4, 'little')
+        buffer += data
+
+    def begin_dict(self, count: int) -> None:
+        """Start a dictionary of count entries, to be followed by count write_string/write pairs"""
+        self._begin(0x0E, 0x0C, count)
+
+    def begin_list(self, count: int) -> None:
+        """Start a list of count items, to be followed by count values"""
+        self._begin(0x0D, 0x0B, count)
+
+    def flush(self) -> None:
+        """Write the buffered bytes to the stream"""
+        if self._buffer:
+            self._stream.write(self._buffer)
+            self._buffer = bytearray()
+
+    def _begin(self, short_tag: int, tag: int, count: int) -> None:
+        if count < 0x100:
+            self._buffer.append(short_tag)
+            self._buffer.append(count)
+        else:
+            self._buffer.append(tag)
+            self._buffer += count.to_bytes(4, 'little')
+
+    def _write_dict(self, value: Dict[Any, Any]) -> None:
+        if 1 < len(value) < 0x100:
+            self._write_shaped_dict(value)
+            return
+
+        self.begin_dict(len(value))
+        # Keys and values that were written before are the common case, handle them inline
+        references = self._references
+        for key, item in value.items():
+            reference = references.get(key)
+            if reference is not None:
+                self._buffer += reference
+            else:
+                # Same key conversion json.dumps applies
+                self.write_string(key if isinstance(key, str) else json.dumps(key))
+            reference = references.get(item) if type(item) is str else None
+            if reference is not None:
+                self._buffer += reference
+            else:
+                self.write(item)
+        if len(self._buffer) >= self._flush_size:
+            self.flush()
+
+    def _write_shaped_dict(self, value: Dict[Any, Any]) -> None:
+        keys = tuple(value)
+        shape = self._shapes.get(keys)
+        if shape is not None:
+            self._buffer.append(0x11)
+            self._buffer += shape
+        elif len(self._shapes) < 0x10000 and all(type(key) is str for key in keys):
+            self._shapes[keys] = len(self._shapes).to_bytes(2, 'little')
+            self._buffer.append(0x10)
+            self._buffer.append(len(keys))
+            for key in keys:
+                self.write_string(key)
+        else:
+            # Shape table full, or keys that need converting
+            self.begin_dict(len(value))
+            for key, item in value.items():
+                self.write_string(key if isinstance(key, str) else json.dumps(key))
+                self.write(item)
+            return
+
+        references = self._references
+        slots = []
+        inline = []
+        for item in value.values():
+            reference = references.get(item) if type(item) is str else None
+            if reference is not None and len(reference) == 3:
+                slots.append(reference[1:])
+            else:
+                slots.append(self._inline_slot)
+                inline.append(item)
+        self._buffer += b''.join(slots)
+        for item in inline:
+            self.write(item)
+        if len(self._buffer) >= self._flush_size:
+            self.flush()
+
+    def _write_list(self, value: List[Any]) -> None:
+        self.begin_list(len(value))
+        references = self._references
+        for item in value:
+            reference = references.get(item) if type(item) is str else None
+            if reference is not None:
+                self._buffer += reference
+            else:
+                self.write(item)
+        if len(self._buffer) >= self._flush_size:
+            self.flush()
+
+
+def dump_binary(json_data: Any, output_stream: IO) -> None:
+    """Write a value to a binary stream in the compact binary intermediate format"""
+    writer = BinaryWriter(output_stream)
+    writer.write(json_data)
+    writer.flush()
 
 
 class XMLToJsonConverter:
-    """Converts XML files to JSON format"""
+    """
+    Converts XML files to JSON format
 
-    def __init__(self):
-        self.preserve_attributes = True
-        self.attribute_prefix = "@"
-        self.text_key = "#text"
-        self.list_tags = []  # Tags that should always be arrays
-        self.debug_mode = True  # Enable detailed debugging
+    A converter holds no per-conversion state: its default options are an immutable
+    ConversionOptions object and every conversion works on local data only. A single
+    instance can therefore be shared between threads (e.g. a ThreadPoolExecutor) and
+    called concurrently, with per-call overrides passed through the options argument.
+    """
 
-    def preprocess_xml(self, xml_content: str) -> str:
+    def __init__(self, options: ConversionOptions = None):
+        self.options = options or ConversionOptions()
+
+    def preprocess_xml(self, xml_content: str, options: ConversionOptions = None) -> str:
         """
         Preprocess XML content to fix common issues that might cause parsing errors
 
         Args:
             xml_content: Raw XML content
+            options: Conversion options for this call (defaults to the converter's options)
 
         Returns:
             Preprocessed XML content
         """
+        options = options or self.options
         import time
         start_time = time.time()
 
-        if self.debug_mode:
+        if options.debug_mode:
             print(f"=== STARTING XML PREPROCESSING ===")
             print(f"Preprocessing XML content of length {len(xml_content)}")
             print(f"First 100 characters: {xml_content[:100].replace(chr(10), '\\n')}")
@@ -44,7 +411,7 @@ class XMLToJsonConverter:
                 # Always use a standard, well-formed XML declaration
                 clean_declaration = '<?xml version="1.0" encoding="UTF-8"?>'
 
-                if self.debug_mode:
+                if options.debug_mode:
                     original_declaration = xml_content[:decl_end + 2]
                     print(f"Original declaration: '{original_declaration}'")
                     print(f"Cleaned declaration: '{clean_declaration}'")
@@ -55,7 +422,7 @@ class XMLToJsonConverter:
                 # Handle case where ?> is missing - find the first tag after <?xml
                 possible_end = xml_content.find('<', 5)  # Find first tag after <?xml
                 if possible_end > 5:
-                    if self.debug_mode:
+                    if options.debug_mode:
                         incomplete_decl = xml_content[:possible_end].strip()
                         print(f"Incomplete declaration found: '{incomplete_decl}'")
 
@@ -67,45 +434,44 @@ class XMLToJsonConverter:
         else:
             # Add XML declaration if missing
             xml_content = '<?xml version="1.0" encoding="UTF-8"?>\n' + xml_content
-            if self.debug_mode:
+            if options.debug_mode:
                 print("Added XML declaration as it was missing")
 
         processed_content = xml_content
 
-        if self.debug_mode:
+        if options.debug_mode:
             print("=== SKIPPING QUOTE FIXING (XML appears well-formed) ===")
 
         # Only do essential, safe preprocessing steps
 
         # Fix standalone ampersands not part of entities (but be very conservative)
-        if self.debug_mode:
+        if options.debug_mode:
             # Count potential standalone ampersands
             standalone_ands = len(re.findall(r'&(?![a-zA-Z0-9#]+;)', processed_content))
             print(f"Found {standalone_ands} potential standalone ampersands")
 
         # Only fix obvious standalone ampersands
-        processed_content = re.sub(r'&(?!amp;|lt;|gt;|quot;|apos;|#\d+;|#x[0-9a-fA-F]+;)', '&amp;', processed_content)
+        processed_content = _STANDALONE_AMPERSAND.sub('&amp;', processed_content)
 
         # Fix unclosed CDATA sections
         if '<![CDATA[' in processed_content and ']]>' not in processed_content:
-            if self.debug_mode:
+            if options.debug_mode:
                 print("Found unclosed CDATA section, fixing...")
             processed_content = processed_content.replace('<![CDATA[', '')
 
         # Remove control characters that might cause XML parsing issues
-        control_char_pattern = r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]'
-        if self.debug_mode:
-            control_chars = re.findall(control_char_pattern, processed_content)
+        if options.debug_mode:
+            control_chars = _CONTROL_CHARACTERS.findall(processed_content)
             if control_chars:
                 print(f"Removing {len(control_chars)} control characters...")
 
-        processed_content = re.sub(control_char_pattern, '', processed_content)
+        processed_content = _CONTROL_CHARACTERS.sub('', processed_content)
 
         # SKIP attribute fixing - it's causing more problems than it solves
-        if self.debug_mode:
+        if options.debug_mode:
             print("Skipping attribute fixing to avoid false positives")
 
-        if self.debug_mode:
+        if options.debug_mode:
             elapsed_time = time.time() - start_time
             final_declaration = processed_content[:50].split('\n')[0] if '\n' in processed_content[
                                                                                  :50] else processed_content[:50]
@@ -114,298 +480,654 @@ class XMLToJsonConverter:
 
         return processed_content
 
-    def convert_file(self, xml_file_path: str, output_path: str = None) -> str:
+    def convert_file(self, xml_file_path: str, output_path: str = None,
+                     options: ConversionOptions = None) -> str:
         """
         Convert XML file to JSON
 
         Args:
             xml_file_path: Path to input XML file
             output_path: Path for output JSON file (optional)
+            options: Conversion options for this call (defaults to the converter's options)
 
         Returns:
             Path to generated JSON file
         """
-        if self.debug_mode:
+        options = options or self.options
+        if options.debug_mode:
             print(f"Converting file: {xml_file_path}")
 
         try:
-            # Try reading as text first, with binary fallback
-            xml_content = None
+            xml_content = self._read_xml_file(xml_file_path, options)
+            json_data = self._parse_xml_content(xml_content, xml_file_path, options)
 
-            # First try UTF-8
-            try:
-                with open(xml_file_path, 'r', encoding='utf-8', errors='replace') as f:
-                    xml_content = f.read()
-                    if self.debug_mode:
-                        print(f"Successfully read file with UTF-8 encoding")
-            except UnicodeDecodeError:
-                pass
-
-            # If that fails, try other encodings
-            if not xml_content:
-                encodings = ['latin-1', 'cp1252', 'iso-8859-1']
-                for encoding in encodings:
-                    try:
-                        with open(xml_file_path, 'r', encoding=encoding, errors='replace') as f:
-                            xml_content = f.read()
-                            if self.debug_mode:
-                                print(f"Successfully read file with {encoding} encoding")
-                            break
-                    except UnicodeDecodeError:
-                        continue
-
-            # Last resort: read as binary and decode
-            if not xml_content:
+            # Determine output path
+            if not output_path:
+                output_path = _strip_compression_suffix(xml_file_path).rsplit('.', 1)[0] + '.json'
+
+            # Write JSON file, or the binary intermediate format if the output path asks for it
+            if _is_binary_path(output_path):
+                with _open_file(output_path, 'wb', compression_level=options.compression_level) as f:
+                    self.write_binary(json_data, f)
+            else:
+                with _open_file(output_path, 'w', encoding='utf-8',
+                                compression_level=options.compression_level) as f:
+                    self.write_json(json_data, f)
+
+            if options.debug_mode:
+                print(f"Successfully converted to: {output_path}")
+            return output_path
+
+        except Exception as e:
+            self._raise_conversion_error(e, options)
+
+    def convert_bytes(self, xml_bytes: bytes, source_name: str = None,
+                      options: ConversionOptions = None) -> Dict[str, Any]:
+        """
+        Convert XML content held in memory to a dictionary, without touching the filesystem
+
+        Args:
+            xml_bytes: Raw XML document (bytes or already decoded str)
+            source_name: Optional file name, used for PDI detection and messages
+            options: Conversion options for this call (defaults to the converter's options)
+
+        Returns:
+            Dictionary representation of the XML document
+        """
+        options = options or self.options
+        try:
+            if isinstance(xml_bytes, str):
+                xml_content = xml_bytes
+            else:
+                # Decode like _read_xml_file does for files, so both paths yield the same result
+                xml_content = bytes(xml_bytes).decode('utf-8', errors='replace')
+            return self._parse_xml_content(xml_content, source_name, options)
+
+        except Exception as e:
+            self._raise_conversion_error(e, options)
+
+    def convert_stream(self, input_stream: IO, output_stream: IO = None, source_name: str = None,
+                       options: ConversionOptions = None) -> Dict[str, Any]:
+        """
+        Convert XML read from a file-like object, optionally writing JSON to another one
+
+        Args:
+            input_stream: Binary or text stream with the XML document
+            output_stream: Binary or text stream to receive the JSON (optional)
+            source_name: Optional file name, used for PDI detection and messages
+            options: Conversion options for this call (defaults to the converter's options)
+
+        Returns:
+            Dictionary representation of the XML document
+        """
+        if source_name is None:
+            source_name = getattr(input_stream, 'name', None)
+            if not isinstance(source_name, str):
+                source_name = None
+
+        json_data = self.convert_bytes(input_stream.read(), source_name, options)
+
+        if output_stream is not None:
+            self.write_json(json_data, output_stream)
+
+        return json_data
+
+    def write_json(self, json_data: Dict[str, Any], output_stream: IO) -> None:
+        """Write converted data as pretty-printed JSON to a text or binary stream"""
+        if isinstance(output_stream, io.TextIOBase):
+            json.dump(json_data, output_stream, indent=2, ensure_ascii=False)
+        else:
+            output_stream.write(json.dumps(json_data, indent=2, ensure_ascii=False).encode('utf-8'))
+
+    def write_binary(self, json_data: Dict[str, Any], output_stream: IO) -> None:
+        """Write converted data in the compact binary intermediate format to a binary stream"""
+        dump_binary(json_data, output_stream)
+
+    async def convert_file_async(self, xml_file_path: str, output_path: str = None,
+                                 options: ConversionOptions = None, executor: 'Executor' = None) -> str:
+        """
+        Asynchronous variant of convert_file that never blocks the event loop
+
+        File reads and writes run in worker threads; parsing and JSON serialization run
+        in the given executor, or the event loop's default executor if none is given.
+
+        Args:
+            xml_file_path: Path to input XML file
+            output_path: Path for output JSON file (optional)
+            options: Conversion options for this call (defaults to the converter's options)
+            executor: Executor for the CPU-bound work (optional)
+
+        Returns:
+            Path to generated JSON file
+        """
+        options = options or self.options
+        import asyncio
+        loop = asyncio.get_running_loop()
+
+        try:
+            xml_bytes = await asyncio.to_thread(_read_bytes, xml_file_path)
+        except Exception as e:
+            self._raise_conversion_error(e, options)
+
+        json_data = await loop.run_in_executor(executor, self.convert_bytes, xml_bytes, xml_file_path, options)
+
+        if not output_path:
+            output_path = _strip_compression_suffix(xml_file_path).rsplit('.', 1)[0] + '.json'
+
+        try:
+            output_bytes = await loop.run_in_executor(executor, _encode_output, json_data, output_path)
+            await asyncio.to_thread(_write_bytes, output_path, output_bytes, options.compression_level)
+        except Exception as e:
+            self._raise_conversion_error(e, options)
+
+        if options.debug_mode:
+            print(f"Successfully converted to: {output_path}")
+        return output_path
+
+    def convert_file_streaming(self, xml_file_path: str, output_path: str = None,
+                               options: ConversionOptions = None) -> str:
+        """
+        Convert XML file to JSON record by record, without holding the document in memory
+
+        The elements directly below the root (the records) are parsed one at a time and
+        spilled to temporary files, then written out with the same layout convert_file
+        produces. Memory use therefore depends on the largest record, not on the file size.
+        Unlike convert_file there is no recovery for malformed XML, unclosed CDATA sections
+        are not repaired and text next to the child elements of a record is dropped.
+
+        Args:
+            xml_file_path: Path to input XML file
+            output_path: Path for output JSON file (optional)
+            options: Conversion options for this call (defaults to the converter's options)
+
+        Returns:
+            Path to generated JSON file
+        """
+        options = options or self.options
+        if options.debug_mode:
+            print(f"Converting file (streaming): {xml_file_path}")
+
+        if not output_path:
+            output_path = _strip_compression_suffix(xml_file_path).rsplit('.', 1)[0] + '.json'
+
+        spill = _RecordSpill()
+        try:
+            with _open_file(xml_file_path, 'rb') as raw:
+                reader = _PreprocessingReader(raw)
+                if _optional_module('xmltodict') is not None:
+                    root_key, head = self._stream_with_xmltodict(reader, spill, options)
+                    force_list = frozenset()
+                else:
+                    root_key, head = self._stream_with_elementtree(reader, spill, options)
+                    force_list = options.list_tags
+
+            if not spill:
+                # Nothing below the root to stream, the in-memory path handles such documents
+                spill.close()
+                return self.convert_file(xml_file_path, output_path, options)
+
+            _write_spill(spill, output_path, root_key, head, force_list, options.compression_level)
+
+            if options.debug_mode:
+                print(f"Streamed {len(spill)} records to: {output_path}")
+            return output_path
+
+        except Exception as e:
+            self._raise_conversion_error(e, options)
+        finally:
+            spill.close()
+
+    def convert_file_sharded(self, xml_file_path: str, output_path: str = None, scan: 'FileScan' = None,
+                             shards: int = None, max_workers: int = None,
+                             options: ConversionOptions = None) -> str:
+        """
+        Convert a large XML file by parsing byte ranges of it in parallel worker processes
+
+        The file is cut at the start tags of its records. Each shard is wrapped in a copy of
+        the root start tag, parsed and serialized in a worker process; the main process only
+        concatenates the serialized records in file order. Requires an uncompressed file the
+        pre-scan marked as shardable.
+
+        Args:
+            xml_file_path: Path to input XML file
+            output_path: Path for output JSON file (optional)
+            scan: Pre-scan of the file (optional, scanned here if missing)
+            shards: Number of byte ranges to cut the file into (defaults to max_workers)
+            max_workers: Number of worker processes (defaults to the number of CPUs)
+            options: Conversion options for this call (defaults to the converter's options)
+
+        Returns:
+            Path to generated JSON file
+        """
+        options = options or self.options
+        if options.debug_mode:
+            print(f"Converting file (sharded): {xml_file_path}")
+
+        if not output_path:
+            output_path = _strip_compression_suffix(xml_file_path).rsplit('.', 1)[0] + '.json'
+
+        spill = _RecordSpill()
+        try:
+            scan = scan or prescan_file(xml_file_path)
+            if not scan.shardable:
+                raise ValueError(f"{xml_file_path} cannot be split at record boundaries")
+
+            workers = max_workers or os.cpu_count() or 1
+            use_xmltodict = _optional_module('xmltodict') is not None
+            shard_options = replace(options, debug_mode=False)
+            root_key, head = self._shard_root(scan, use_xmltodict, shard_options)
+            head_keys = frozenset(key for key, _ in head)
+
+            tasks = [(xml_file_path, start, end, scan.root_start_tag, scan.root_tag, use_xmltodict,
+                      head_keys, shard_options)
+                     for start, end in _shard_ranges(xml_file_path, scan, shards or workers)]
+            if options.debug_mode:
+                print(f"Split into {len(tasks)} shards for {workers} workers")
+
+            for records in _map_shards(tasks, workers, options.debug_mode):
+                for tag, text in records:
+                    spill.add_serialized(tag, text)
+
+            _write_spill(spill, output_path, root_key, head, frozenset() if use_xmltodict else options.list_tags,
+                         options.compression_level)
+
+            if options.debug_mode:
+                print(f"Merged {len(spill)} records to: {output_path}")
+            return output_path
+
+        except Exception as e:
+            self._raise_conversion_error(e, options)
+        finally:
+            spill.close()
+
+    def _stream_with_xmltodict(self, stream: IO, spill: '_RecordSpill',
+                               options: ConversionOptions) -> Tuple[Optional[str], List[Tuple[str, Any]]]:
+        """Stream the records of a document into a spill with xmltodict, returning the root key and entries"""
+        xmltodict = _optional_module('xmltodict')
+        interner = StringInterner.from_options(options)
+        expat_wrapper = _RecordLevelExpat()
+        root = []
+
+        def handle_record(path, item):
+            if not root:
+                root.append(path[0])
+            tag = path[-1][0]
+            if isinstance(item, str) or item is None:
+                # Streamed leaves skip the whitespace stripping and postprocessing xmltodict
+                # applies to nested elements, so do it here to get the same result
+                item = (item.strip() or None) if item else None
+                if item is not None and interner is not None:
+                    item = interner.value(item)
+            spill.add(interner.key(tag) if interner is not None else tag, item)
+            return True
+
+        xmltodict.parse(stream, expat=expat_wrapper, item_depth=2, item_callback=handle_record,
+                        **_xmltodict_arguments(options, interner))
+        if not root:
+            return None, []
+
+        root_key, attrs = root[0]
+        head = []
+        if options.preserve_attributes and attrs:
+            for key, value in attrs.items():
+                key = f"{options.attribute_prefix}{key}"
+                if interner is not None:
+                    key, value = interner.xmltodict_postprocessor(root, key, value)
+                head.append((key, value))
+        root_text = ''.join(expat_wrapper.root_text).strip()
+        if root_text:
+            head.append((options.text_key, interner.value(root_text) if interner is not None else root_text))
+        return interner.key(root_key) if interner is not None else root_key, head
+
+    def _stream_with_elementtree(self, stream: IO, spill: '_RecordSpill',
+                                 options: ConversionOptions) -> Tuple[Optional[str], List[Tuple[str, Any]]]:
+        """Stream the records of a document into a spill with ElementTree, like xml_to_dict would convert them"""
+        interner = StringInterner.from_options(options)
+        root = None
+        depth = 0
+
+        for event, element in ET.iterparse(stream, events=('start', 'end')):
+            if event == 'start':
+                depth += 1
+                if root is None:
+                    root = element
+                continue
+            depth -= 1
+            if depth == 1:
+                tag = interner.key(element.tag) if interner is not None else element.tag
+                spill.add(tag, self._element_to_dict(element, options, interner))
+                # Records are always the first child left, so removing them is cheap
+                root.remove(element)
+
+        head = []
+        if root is not None:
+            if options.preserve_attributes:
+                for key, value in root.attrib.items():
+                    if interner is not None:
+                        head.append((interner.attribute_name(key), interner.value(value)))
+                    else:
+                        head.append((f"{options.attribute_prefix}{key}", value))
+            text = root.text.strip() if root.text else None
+            if text:
+                head.append((options.text_key, interner.value(text) if interner is not None else text))
+        return None, head
+
+    def _shard_root(self, scan: 'FileScan', use_xmltodict: bool,
+                    options: ConversionOptions) -> Tuple[Optional[str], List[Tuple[str, Any]]]:
+        """Convert the root start tag of a sharded file alone, giving its root key and attribute entries"""
+        empty_root = self.preprocess_xml(f"{_XML_DECLARATION}\n{scan.root_start_tag}</{scan.root_tag}>", options)
+        interner = StringInterner.from_options(options)
+        if use_xmltodict:
+            parsed = _optional_module('xmltodict').parse(empty_root, **_xmltodict_arguments(options, interner))
+            root_key, attrs = next(iter(parsed.items()))
+            return root_key, list((attrs or {}).items())
+
+        element = ET.fromstring(empty_root)
+        attrs = self._element_to_dict(element, options, interner) if element.attrib else {}
+        return None, list(attrs.items()) if isinstance(attrs, dict) else []
+
+    def _read_xml_file(self, xml_file_path: str, options: ConversionOptions) -> str:
+        """Read an XML file from disk, trying several encodings"""
+        # Try reading as text first, with binary fallback
+        xml_content = None
+
+        # First try UTF-8
+        try:
+            with _open_file(xml_file_path, 'r', encoding='utf-8', errors='replace') as f:
+                xml_content = f.read()
+                if options.debug_mode:
+                    print(f"Successfully read file with UTF-8 encoding")
+        except UnicodeDecodeError:
+            pass
+
+        # If that fails, try other encodings
+        if not xml_content:
+            encodings = ['latin-1', 'cp1252', 'iso-8859-1']
+            for encoding in encodings:
                 try:
-                    with open(xml_file_path, 'rb') as f:
-                        binary_content = f.read()
-                        # Try to detect encoding from XML declaration
-                        encoding = 'utf-8'  # Default
-                        if binary_content.startswith(b'<?xml'):
-                            encoding_match = re.search(b'encoding=["\']([^"\']+)["\']', binary_content[:200])
-                            if encoding_match:
-                                encoding = encoding_match.group(1).decode('ascii')
-
-                        xml_content = binary_content.decode(encoding, errors='replace')
-                        if self.debug_mode:
-                            print(f"Read file in binary mode with {encoding} encoding")
-                except Exception as bin_err:
-                    raise Exception(f"Failed to read file in any mode: {bin_err}")
-
-            # Check if it looks like XML
-            if not (xml_content.strip().startswith('<?xml') or xml_content.strip().startswith('<')):
-                raise ValueError("File does not appear to be XML")
-
-            # Add special debug for PDI files
-            if xml_file_path.lower().endswith('.pdi'):
-                print("*** PDI FILE DETECTED: Enabling special processing mode ***")
-                print(f"File size: {len(xml_content)} bytes")
-
-                # Take a sample from the beginning of the file
-                sample_size = min(500, len(xml_content))
-                print(f"First {sample_size} characters:")
-                for i in range(0, sample_size, 50):
-                    chunk = xml_content[i:i+50].replace('\n', '\\n')
-                    print(f"  {i:04d}: {chunk}")
-
-            # PDI specific handling
-            if xml_file_path.lower().endswith('.pdi'):
-                self.debug_mode = True  # Force debug mode for PDI files
-
-            # Preprocess XML content to fix common issues
-            processed_xml = self.preprocess_xml(xml_content)
-
-            # Try different parsing approaches with fallbacks
-            json_data = None
-
-            # Approach 1: Try direct xmltodict parsing first (most tolerant)
+                    with _open_file(xml_file_path, 'r', encoding=encoding, errors='replace') as f:
+                        xml_content = f.read()
+                        if options.debug_mode:
+                            print(f"Successfully read file with {encoding} encoding")
+                        break
+                except UnicodeDecodeError:
+                    continue
+
+        # Last resort: read as binary and decode
+        if not xml_content:
+            try:
+                with _open_file(xml_file_path, 'rb') as f:
+                    binary_content = f.read()
+                    # Try to detect encoding from XML declaration
+                    encoding = 'utf-8'  # Default
+                    if binary_content.startswith(b'<?xml'):
+                        encoding_match = re.search(b'encoding=["\']([^"\']+)["\']', binary_content[:200])
+                        if encoding_match:
+                            encoding = encoding_match.group(1).decode('ascii')
+
+                    xml_content = binary_content.decode(encoding, errors='replace')
+                    if options.debug_mode:
+                        print(f"Read file in binary mode with {encoding} encoding")
+            except Exception as bin_err:
+                raise Exception(f"Failed to read file in any mode: {bin_err}")
+
+        return xml_content
+
+    def _parse_xml_content(self, xml_content: str, source_name: str,
+                           options: ConversionOptions) -> Dict[str, Any]:
+        """
+        Parse decoded XML content into a dictionary
+
+        Args:
+            xml_content: Decoded XML document
+            source_name: Optional file name, used for PDI detection
+            options: Conversion options for this call
+
+        Returns:
+            Dictionary representation of the XML document
+        """
+        is_pdi = bool(source_name) and _strip_compression_suffix(source_name).lower().endswith('.pdi')
+
+        # Check if it looks like XML
+        if not (xml_content.strip().startswith('<?xml') or xml_content.strip().startswith('<')):
+            raise ValueError("File does not appear to be XML")
+
+        # Add special debug for PDI files
+        if is_pdi:
+            print("*** PDI FILE DETECTED: Enabling special processing mode ***")
+            print(f"File size: {len(xml_content)} bytes")
+
+            # Take a sample from the beginning of the file
+            sample_size = min(500, len(xml_content))
+            print(f"First {sample_size} characters:")
+            for i in range(0, sample_size, 50):
+                chunk = xml_content[i:i+50].replace('\n', '\\n')
+                print(f"  {i:04d}: {chunk}")
+
+        # PDI specific handling
+        if is_pdi:
+            options = replace(options, debug_mode=True)  # Force debug mode for this PDI file only
+
+        # Preprocess XML content to fix common issues
+        processed_xml = self.preprocess_xml(xml_content, options)
+
+        # Try different parsing approaches with fallbacks
+        json_data = None
+
+        # Approach 1: Try direct xmltodict parsing first (most tolerant)
+        try:
+            xmltodict = _optional_module('xmltodict')
+            if xmltodict is None:
+                raise ImportError("xmltodict not available")
+            if options.debug_mode:
+                print("Trying xmltodict parsing...")
+
+            # Parse with xmltodict which is more tolerant of malformed XML
+            # Use force_list to handle array elements correctly
+            force_list = {}  # TODO: Detect array elements from data
+
+            # Add a more detailed error handler
+            def handle_xml_error(err):
+                if options.debug_mode:
+                    print(f"XMLDict parse error: {err}")
+                return True  # Continue parsing
+
+            interner = StringInterner.from_options(options)
+            xml_dict = xmltodict.parse(processed_xml, force_list=force_list,
+                                       **_xmltodict_arguments(options, interner))
+            json_data = xml_dict
+
+            if options.debug_mode:
+                print("Successfully parsed with xmltodict")
+
+        except Exception as xmltodict_err:
+            if options.debug_mode:
+                print(f"xmltodict parsing failed: {str(xmltodict_err)}")
+
+            # Try other parsing methods (ElementTree, lxml, etc.)
             try:
-                import xmltodict
-                if self.debug_mode:
-                    print("Trying xmltodict parsing...")
-
-                # Parse with xmltodict which is more tolerant of malformed XML
-                # Use force_list to handle array elements correctly
-                force_list = {}  # TODO: Detect array elements from data
-
-                # Add a more detailed error handler
-                def handle_xml_error(err):
-                    if self.debug_mode:
-                        print(f"XMLDict parse error: {err}")
-                    return True  # Continue parsing
-
-                xml_dict = xmltodict.parse(
-                    processed_xml,
-                    attr_prefix=self.attribute_prefix,
-                    cdata_key=self.text_key,
-                    force_list=force_list,
-                    process_namespaces=True,
-                    namespaces={},  # Collapse all namespaces
-                )
-                json_data = xml_dict
-
-                if self.debug_mode:
-                    print("Successfully parsed with xmltodict")
-
-            except Exception as xmltodict_err:
-                if self.debug_mode:
-                    print(f"xmltodict parsing failed: {str(xmltodict_err)}")
-
-                # Try other parsing methods (ElementTree, lxml, etc.)
+                # Try multiple parsing methods
+                root = None
+                errors = []
+
+                # Method 1: Standard ElementTree
                 try:
-                    # Try multiple parsing methods
-                    root = None
-                    errors = []
+                    root = ET.fromstring(processed_xml)
+                    if options.debug_mode:
+                        print("Successfully parsed with standard ElementTree")
+                except ET.ParseError as e:
+                    errors.append(f"Standard XML parsing failed: {e}")
 
-                    # Method 1: Standard ElementTree
+                    # Method 2: Try with lxml which is more lenient
                     try:
-                        root = ET.fromstring(processed_xml)
-                        if self.debug_mode:
-                            print("Successfully parsed with standard ElementTree")
-                    except ET.ParseError as e:
-                        errors.append(f"Standard XML parsing failed: {e}")
-
-                        # Method 2: Try with lxml which is more lenient
+                        lxml_ET = _optional_module('lxml.etree')
+                        if lxml_ET is None:
+                            raise ImportError("lxml not available")
+                        parser = lxml_ET.XMLParser(recover=True)
+                        root = lxml_ET.fromstring(processed_xml.encode('utf-8'), parser)
+                        if options.debug_mode:
+                            print("Successfully parsed XML using lxml with recovery mode")
+                        # Convert lxml Element to ElementTree Element
+                        root_str = lxml_ET.tostring(root, encoding='utf-8').decode('utf-8')
+                        root = ET.fromstring(root_str)
+                    except ImportError:
+                        errors.append("lxml not available")
+
+                        # Method 3: Try with XMLBuilder
                         try:
-                            import lxml.etree as lxml_ET
-                            parser = lxml_ET.XMLParser(recover=True)
-                            root = lxml_ET.fromstring(processed_xml.encode('utf-8'), parser)
-                            if self.debug_mode:
-                                print("Successfully parsed XML using lxml with recovery mode")
-                            # Convert lxml Element to ElementTree Element
-                            root_str = lxml_ET.tostring(root, encoding='utf-8').decode('utf-8')
-                            root = ET.fromstring(root_str)
-                        except ImportError:
-                            errors.append("lxml not available")
-
-                            # Method 3: Try with XMLBuilder
-                            try:
-                                from xml.sax.saxutils import escape
-
-                                # Escape special characters in XML
-                                safe_xml = escape(processed_xml)
-
-                                # Try again with escaped content
-                                root = ET.fromstring(safe_xml)
-                                if self.debug_mode:
-                                    print("Successfully parsed with escaped XML")
-                            except Exception as builder_err:
-                                errors.append(f"XMLBuilder failed: {builder_err}")
-
-                                # Method 4: Try reading directly with minidom
-                                try:
-                                    from xml.dom import minidom
-                                    dom = minidom.parseString(processed_xml)
-                                    # Convert DOM to ElementTree
-                                    xml_str = dom.toxml()
-                                    root = ET.fromstring(xml_str)
-                                    if self.debug_mode:
-                                        print("Successfully parsed with minidom")
-                                except Exception as dom_err:
-                                    errors.append(f"minidom failed: {dom_err}")
-                    except Exception as lxml_err:
-                        errors.append(f"lxml failed: {lxml_err}")
-
-                    if not root:
-                        # Last resort: try to fix the specific error by examining the error message
-                        for error in errors:
-                            if "line" in error and "column" in error:
-                                # Extract line and column information
-                                line_match = re.search(r'line (\d+)', error)
-                                col_match = re.search(r'column (\d+)', error)
-
-                                if line_match and col_match:
-                                    line_num = int(line_match.group(1))
-                                    col_num = int(col_match.group(1))
-
-                                    # Get the problematic line
-                                    lines = processed_xml.split('\n')
-                                    if line_num <= len(lines):
-                                        problem_line = lines[line_num - 1]
-                                        if self.debug_mode:
-                                            print(f"Problematic line ({line_num}): {problem_line}")
-
-                                        # Try to fix the specific character
-                                        if col_num <= len(problem_line):
-                                            problem_char = problem_line[col_num - 1]
-                                            if self.debug_mode:
-                                                print(f"Problematic character at column {col_num}: '{problem_char}'")
-
-                                            # Replace the problematic character
-                                            if '"' in problem_line and problem_line.count('"') % 2 == 1:
-                                                # Fix missing quotes
-                                                fixed_line = problem_line + '"'
-                                            else:
-                                                # Replace with space as fallback
-                                                fixed_line = problem_line[:col_num-1] + ' ' + problem_line[col_num:]
-
-                                            lines[line_num - 1] = fixed_line
-
-                                            fixed_xml = '\n'.join(lines)
-                                            try:
-                                                root = ET.fromstring(fixed_xml)
-                                                if self.debug_mode:
-                                                    print("Successfully parsed after fixing specific character!")
-                                            except Exception as fix_err:
-                                                errors.append(f"Character fixing failed: {fix_err}")
-
-                    if not root:
-                        raise Exception(f"Failed to parse XML with multiple methods. Errors: {', '.join(errors)}")
-
-                    # Convert to dictionary
-                    json_data = self.xml_to_dict(root)
-
-                except Exception as et_err:
-                    if self.debug_mode:
-                        print(f"ElementTree parsing failed: {str(et_err)}")
-                    raise Exception(f"All parsing methods failed. Last error: {str(xmltodict_err)}")
-
-            # Validate we have data
-            if not json_data:
-                raise Exception("Failed to extract any data from the XML file")
+                            from xml.sax.saxutils import escape
 
-            # Determine output path
-            if not output_path:
-                output_path = xml_file_path.rsplit('.', 1)[0] + '.json'
+                            # Escape special characters in XML
+                            safe_xml = escape(processed_xml)
 
-            # Write JSON file
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(json_data, f, indent=2, ensure_ascii=False)
+                            # Try again with escaped content
+                            root = ET.fromstring(safe_xml)
+                            if options.debug_mode:
+                                print("Successfully parsed with escaped XML")
+                        except Exception as builder_err:
+                            errors.append(f"XMLBuilder failed: {builder_err}")
 
-            if self.debug_mode:
-                print(f"Successfully converted to: {output_path}")
-            return output_path
-
-        except Exception as e:
-            if self.debug_mode:
-                import traceback
-                print("*** DETAILED ERROR TRACEBACK ***")
-                traceback.print_exc()
-                print(f"Error type: {type(e).__name__}")
-                print(f"Error message: {str(e)}")
-            raise Exception(f"Error converting XML to JSON: {str(e)}")
-
-    def xml_to_dict(self, element: ET.Element) -> Dict[str, Any]:
+                            # Method 4: Try reading directly with minidom
+                            try:
+                                from xml.dom import minidom
+                                dom = minidom.parseString(processed_xml)
+                                # Convert DOM to ElementTree
+                                xml_str = dom.toxml()
+                                root = ET.fromstring(xml_str)
+                                if options.debug_mode:
+                                    print("Successfully parsed with minidom")
+                            except Exception as dom_err:
+                                errors.append(f"minidom failed: {dom_err}")
+                except Exception as lxml_err:
+                    errors.append(f"lxml failed: {lxml_err}")
+
+                if not root:
+                    # Last resort: try to fix the specific error by examining the error message
+                    for error in list(errors):  # errors grows while fixing
+                        if "line" in error and "column" in error:
+                            # Extract line and column information
+                            line_match = re.search(r'line (\d+)', error)
+                            col_match = re.search(r'column (\d+)', error)
+
+                            if line_match and col_match:
+                                line_num = int(line_match.group(1))
+                                col_num = int(col_match.group(1))
+
+                                # Get the problematic line
+                                lines = processed_xml.split('\n')
+                                if line_num <= len(lines):
+                                    problem_line = lines[line_num - 1]
+                                    if options.debug_mode:
+                                        print(f"Problematic line ({line_num}): {problem_line}")
+
+                                    # Try to fix the specific character
+                                    if col_num <= len(problem_line):
+                                        problem_char = problem_line[col_num - 1]
+                                        if options.debug_mode:
+                                            print(f"Problematic character at column {col_num}: '{problem_char}'")
+
+                                        # Replace the problematic character
+                                        if '"' in problem_line and problem_line.count('"') % 2 == 1:
+                                            # Fix missing quotes
+                                            fixed_line = problem_line + '"'
+                                        else:
+                                            # Replace with space as fallback
+                                            fixed_line = problem_line[:col_num-1] + ' ' + problem_line[col_num:]
+
+                                        lines[line_num - 1] = fixed_line
+
+                                        fixed_xml = '\n'.join(lines)
+                                        try:
+                                            root = ET.fromstring(fixed_xml)
+                                            if options.debug_mode:
+                                                print("Successfully parsed after fixing specific character!")
+                                        except Exception as fix_err:
+                                            errors.append(f"Character fixing failed: {fix_err}")
+
+                if not root:
+                    raise Exception(f"Failed to parse XML with multiple methods. Errors: {', '.join(errors)}")
+
+                # Convert to dictionary
+                json_data = self.xml_to_dict(root, options)
+
+            except Exception as et_err:
+                if options.debug_mode:
+                    print(f"ElementTree parsing failed: {str(et_err)}")
+                raise Exception(f"All parsing methods failed. Last error: {str(xmltodict_err)}")
+
+        # Validate we have data
+        if not json_data:
+            raise Exception("Failed to extract any data from the XML file")
+
+        return json_data
+
+    def _raise_conversion_error(self, e: Exception, options: ConversionOptions) -> None:
+        """Report a conversion error and re-raise it with the module's standard message"""
+        if options.debug_mode:
+            import traceback
+            print("*** DETAILED ERROR TRACEBACK ***")
+            traceback.print_exc()
+            print(f"Error type: {type(e).__name__}")
+            print(f"Error message: {str(e)}")
+        raise Exception(f"Error converting XML to JSON: {str(e)}")
+
+    def xml_to_dict(self, element: ET.Element, options: ConversionOptions = None,
+                    interner: StringInterner = None) -> Dict[str, Any]:
         """Convert XML element to dictionary"""
+        options = options or self.options
+        if interner is None:
+            interner = StringInterner.from_options(options)
+        return self._element_to_dict(element, options, interner)
+
+    def _element_to_dict(self, element: ET.Element, options: ConversionOptions,
+                         interner: Optional[StringInterner]) -> Dict[str, Any]:
+        """Recursive part of xml_to_dict, sharing one interner across the whole tree"""
         result = {}
 
         # Handle attributes
-        if self.preserve_attributes and element.attrib:
+        if options.preserve_attributes and element.attrib:
             for key, value in element.attrib.items():
-                result[f"{self.attribute_prefix}{key}"] = value
+                if interner is not None:
+                    result[interner.attribute_name(key)] = interner.value(value)
+                else:
+                    result[f"{options.attribute_prefix}{key}"] = value
 
         # Handle text content
-        if element.text and element.text.strip():
+        text = element.text.strip() if element.text else None
+        if text:
+            if interner is not None:
+                text = interner.value(text)
             if len(element) == 0:  # Leaf node with text
                 if result:  # Has attributes
-                    result[self.text_key] = element.text.strip()
+                    result[options.text_key] = text
                 else:  # Just text
-                    return element.text.strip()
+                    return text
             else:  # Has children and text
-                result[self.text_key] = element.text.strip()
+                result[options.text_key] = text
 
         # Handle child elements
         child_dict = {}
         for child in element:
-            child_data = self.xml_to_dict(child)
+            child_data = self._element_to_dict(child, options, interner)
+            tag = interner.key(child.tag) if interner is not None else child.tag
 
-            if child.tag in child_dict:
+            if tag in child_dict:
                 # Convert to list if multiple children with same tag
-                if not isinstance(child_dict[child.tag], list):
-                    child_dict[child.tag] = [child_dict[child.tag]]
-                child_dict[child.tag].append(child_data)
+                if not isinstance(child_dict[tag], list):
+                    child_dict[tag] = [child_dict[tag]]
+                child_dict[tag].append(child_data)
             else:
                 # Force list for specified tags
-                if child.tag in self.list_tags:
-                    child_dict[child.tag] = [child_data]
+                if tag in options.list_tags:
+                    child_dict[tag] = [child_data]
                 else:
-                    child_dict[child.tag] = child_data
+                    child_dict[tag] = child_data
 
         result.update(child_dict)
 
         # If only one key and it's not an attribute or text, return the value directly
         if len(result) == 1 and not any(
-                k.startswith(self.attribute_prefix) for k in result.keys()) and self.text_key not in result:
+                k.startswith(options.attribute_prefix) for k in result.keys()) and options.text_key not in result:
             return list(result.values())[0]
 
         return result
@@ -414,29 +1136,816 @@ class XMLToJsonConverter:
                     attribute_prefix: str = "@",
                     text_key: str = "#text",
                     list_tags: List[str] = None,
-                    debug_mode: bool = False):
-        """Configure conversion options"""
-        self.preserve_attributes = preserve_attributes
-        self.attribute_prefix = attribute_prefix
-        self.text_key = text_key
-        self.list_tags = list_tags or []
-        self.debug_mode = debug_mode
+                    debug_mode: bool = False,
+                    compression_level: int = None,
+                    intern_strings: bool = True,
+                    intern_max_entries: int = None,
+                    intern_max_value_length: int = None):
+        """
+        Configure the default conversion options by replacing the immutable options object
+
+        Options without a parameter here, and the interning limits unless given, keep the
+        values of the current options object.
+        """
+        limits = {name: value for name, value in (('intern_max_entries', intern_max_entries),
+                                                  ('intern_max_value_length', intern_max_value_length))
+                  if value is not None}
+        self.options = replace(
+            self.options,
+            preserve_attributes=preserve_attributes,
+            attribute_prefix=attribute_prefix,
+            text_key=text_key,
+            list_tags=frozenset(list_tags or ()),
+            debug_mode=debug_mode,
+            compression_level=compression_level,
+            intern_strings=intern_strings,
+            **limits,
+        )
 
 
-def convert(input_files: List[str], output_dir: str = None, additional_files: List[str] = None, **options) -> List[str]:
+@dataclass(frozen=True)
+class FileScan:
+    """Quick pre-scan of an input file, the basis of the execution planner's decision"""
+    path: str
+    size: int  # Bytes on disk
+    compressed: bool
+    estimated_size: int  # Uncompressed size, estimated from the sample for compressed files
+    complete: bool  # True if the sample covered the whole document
+    well_formed: bool  # False if the sample already needs the tolerant in-memory parser
+    max_depth: int
+    record_count: int  # Elements directly below the root, extrapolated to the whole file
+    record_tags: Tuple[str, ...] = ()  # Names of those elements, as written in the file
+    root_tag: str = ''
+    root_start_tag: str = ''  # Raw root start tag, used to wrap shards
+    records_start: int = -1  # Byte offset just after the root start tag
+    records_end: int = -1  # Byte offset of the root end tag
+    shardable: bool = False  # True if records can be cut apart at their start tags
+
+
+def _tag_end(data: bytes, pos: int) -> int:
+    """Return the offset just after the tag starting at pos, skipping '>' inside quoted values"""
+    quote = None
+    for i in range(pos, len(data)):
+        char = data[i]
+        if quote is not None:
+            if char == quote:
+                quote = None
+        elif char in (0x22, 0x27):  # " and '
+            quote = char
+        elif char == 0x3E:  # >
+            return i + 1
+    return -1
+
+
+def prescan_file(path: str, sample_size: int = 1 << 20) -> FileScan:
     """
-    Main conversion function for the module system
+    Take a quick look at a file for the execution planner
+
+    Reads at most sample_size uncompressed bytes from the start of the file and runs them
+    through expat to measure the nesting depth and the number of records below the root,
+    which is then extrapolated to the whole file. For compressed files the uncompressed
+    size is estimated from the compression ratio of the sample.
 
     Args:
-        input_files: List of XML file paths to convert
-        output_dir: Directory for output files
-        additional_files: List of additional files
-        options: Conversion options
+        path: Path to the XML file, optionally compressed
+        sample_size: Number of uncompressed bytes to inspect
 
     Returns:
-        List of generated JSON file paths
+        FileScan describing the file
+    """
+    from xml.parsers import expat
+
+    size = os.path.getsize(path)
+    suffix = _compression_suffix(path)
+    with open(path, 'rb') as raw:
+        if suffix:
+            with importlib.import_module(COMPRESSION_CODECS[suffix]).open(raw, 'rb') as stream:
+                sample = stream.read(sample_size)
+                complete = not stream.read(1)
+            consumed = raw.tell()
+            estimated_size = len(sample) if complete else int(size * len(sample) / max(consumed, 1))
+        else:
+            sample = raw.read(sample_size)
+            complete = len(sample) >= size
+            estimated_size = size
+
+    # Apply the same fixes as preprocess_xml so they do not count as malformed XML
+    text = sample.decode('utf-8', errors='replace')
+    text = _CONTROL_CHARACTERS.sub('', _STANDALONE_AMPERSAND.sub('&amp;', text))
+
+    depth = 0
+    max_depth = 0
+    records = 0
+    root_tag = None
+    record_tags: Dict[str, None] = {}  # Ordered set
+    nested_tags = set()
+    unsafe_to_cut = []  # Constructs that may hide a record start tag from a plain byte search
+
+    def start_element(name, attrs):
+        nonlocal depth, max_depth, records, root_tag
+        depth += 1
+        max_depth = max(max_depth, depth)
+        if depth == 1:
+            root_tag = name
+        elif depth == 2:
+            records += 1
+            record_tags.setdefault(name)
+        else:
+            nested_tags.add(name)
+
+    def end_element(name):
+        nonlocal depth
+        depth -= 1
+
+    def character_data(data):
+        if depth == 1 and data.strip():
+            unsafe_to_cut.append('text in the root element')
+
+    parser = expat.ParserCreate()
+    parser.buffer_text = True
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    parser.CharacterDataHandler = character_data
+    parser.StartDoctypeDeclHandler = lambda *args: unsafe_to_cut.append('doctype')
+    parser.StartCdataSectionHandler = lambda: unsafe_to_cut.append('CDATA section')
+    parser.CommentHandler = lambda data: unsafe_to_cut.append('comment')
+    try:
+        parser.Parse(text, complete)
+        well_formed = True
+    except expat.ExpatError:
+        well_formed = False
+
+    if not complete and len(text):
+        records = int(records * estimated_size / len(sample))
+
+    scan = FileScan(
+        path=path, size=size, compressed=bool(suffix), estimated_size=estimated_size, complete=complete,
+        well_formed=well_formed, max_depth=max_depth, record_count=records,
+        record_tags=tuple(record_tags), root_tag=root_tag or '',
+    )
+    if suffix or not well_formed or root_tag is None or unsafe_to_cut or nested_tags & set(record_tags):
+        return scan
+
+    # Locate the records in the raw file, shards are cut between these offsets
+    match = re.search(b'<' + re.escape(root_tag.encode('utf-8')) + rb'[\s/>]', sample)
+    records_start = _tag_end(sample, match.start()) if match else -1
+    if records_start < 0 or sample[records_start - 2:records_start] == b'/>':
+        return scan
+    with open(path, 'rb') as raw:
+        tail_start = max(records_start, size - 65536)
+        raw.seek(tail_start)
+        root_end = raw.read().rfind(b'</' + root_tag.encode('utf-8'))
+    if root_end < 0:
+        return scan
+
+    return replace(scan, root_start_tag=sample[match.start():records_start].decode('utf-8', errors='replace'),
+                   records_start=records_start, records_end=tail_start + root_end, shardable=records >= 2)
+
+
+@dataclass(frozen=True)
+class ExecutionPlan:
+    """Strategy the execution planner picked for one file, with its predicted cost"""
+    strategy: str  # 'memory', 'streaming' or 'sharded'
+    reason: str
+    predicted_peak_bytes: int
+    predicted_seconds: float
+    shards: int = 1
+    workers: int = 1
+
+
+class ExecutionPlanner:
+    """
+    Picks the cheapest conversion strategy for a file that fits into a memory budget
+
+    'memory' is convert_file: the fastest, but its peak is a multiple of the document size.
+    'streaming' is convert_file_streaming: somewhat slower, with a peak bounded by the
+    largest record. 'sharded' is convert_file_sharded: parallel parsing of huge uncompressed
+    files made of many records. The cost constants were measured with
+    benchmarks/bench_converters.py on synthetic PDI exports and can be adjusted on a subclass.
+    """
+    STRATEGIES = ('memory', 'streaming', 'sharded')
+
+    PROCESS_BASE_PEAK = 32 << 20  # Interpreter, parser and I/O buffers of one process
+    MEMORY_PEAK_FACTOR = 5.5  # Peak bytes per document byte of the in-memory parse
+    MEMORY_BYTES_PER_SECOND = 4e6
+    STREAMING_RECORD_FACTOR = 16.0  # Peak bytes per byte of the average record
+    STREAMING_BYTES_PER_SECOND = 3.6e6
+    SHARD_MIN_SIZE = 64 << 20  # Below this, starting worker processes does not pay off
+    SHARD_MIN_BYTES = 4 << 20
+    SHARD_STARTUP_SECONDS = 0.3
+    SHARD_MERGE_BYTES_PER_SECOND = 200e6  # Main process copying serialized records
+    SHARD_EFFICIENCY = 0.8
+    DECOMPRESSION_BYTES_PER_SECOND = {'.gz': 250e6, '.bz2': 25e6, '.xz': 90e6}
+
+    def __init__(self, memory_budget: int, max_workers: int = None, strategy: str = None):
+        if strategy is not None and strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown strategy: {strategy}")
+        self.memory_budget = int(memory_budget)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.strategy = strategy
+
+    def plan(self, scan: FileScan) -> ExecutionPlan:
+        """Return the plan for a pre-scanned file"""
+        costs = {'memory': self._memory_cost(scan)}
+        if scan.well_formed and scan.record_count > 0:
+            costs['streaming'] = self._streaming_cost(scan)
+        if scan.shardable and (self.strategy == 'sharded' or (
+                self.max_workers > 1 and scan.estimated_size >= self.SHARD_MIN_SIZE)):
+            costs['sharded'] = self._sharded_cost(scan)
+
+        if self.strategy in costs:
+            return replace(costs[self.strategy], reason=f"{self.strategy} strategy requested")
+
+        fitting = [plan for plan in costs.values() if plan.predicted_peak_bytes <= self.memory_budget]
+        if fitting:
+            plan = min(fitting, key=lambda p: p.predicted_seconds)
+            reason = f"fastest of {', '.join(p.strategy for p in fitting)} within the memory budget"
+        else:
+            plan = min(costs.values(), key=lambda p: p.predicted_peak_bytes)
+            reason = "no strategy fits the memory budget, using the lowest predicted peak"
+        if self.strategy is not None:
+            reason += f" ({self.strategy} strategy requested but not possible for this file)"
+        elif not scan.well_formed:
+            reason += " (sample is not well-formed XML, only the tolerant in-memory parser can handle it)"
+        return replace(plan, reason=reason)
+
+    def _decompression_seconds(self, scan: FileScan) -> float:
+        if not scan.compressed:
+            return 0.0
+        return scan.estimated_size / self.DECOMPRESSION_BYTES_PER_SECOND[_compression_suffix(scan.path)]
+
+    def _memory_cost(self, scan: FileScan) -> ExecutionPlan:
+        return ExecutionPlan(
+            'memory', '', int(self.PROCESS_BASE_PEAK + scan.estimated_size * self.MEMORY_PEAK_FACTOR),
+            scan.estimated_size / self.MEMORY_BYTES_PER_SECOND + self._decompression_seconds(scan))
+
+    def _streaming_cost(self, scan: FileScan) -> ExecutionPlan:
+        record_size = scan.estimated_size / scan.record_count
+        return ExecutionPlan(
+            'streaming', '', int(self.PROCESS_BASE_PEAK + record_size * self.STREAMING_RECORD_FACTOR),
+            scan.estimated_size / self.STREAMING_BYTES_PER_SECOND + self._decompression_seconds(scan))
+
+    def _sharded_cost(self, scan: FileScan) -> ExecutionPlan:
+        workers = self.max_workers
+        # Every worker holds one shard in memory, so the budget bounds the shard size
+        shard_size = ((self.memory_budget - (workers + 1) * self.PROCESS_BASE_PEAK)
+                      / (workers * self.MEMORY_PEAK_FACTOR))
+        shard_size = max(self.SHARD_MIN_BYTES, min(shard_size, scan.estimated_size / workers))
+        shards = min(max(workers, -(-scan.estimated_size // int(shard_size))), scan.record_count)
+        workers = min(workers, shards)
+        return ExecutionPlan(
+            'sharded', '', int((workers + 1) * self.PROCESS_BASE_PEAK + workers * shard_size * self.MEMORY_PEAK_FACTOR),
+            self.SHARD_STARTUP_SECONDS
+            + scan.estimated_size / (self.MEMORY_BYTES_PER_SECOND * workers * self.SHARD_EFFICIENCY)
+            + scan.estimated_size / self.SHARD_MERGE_BYTES_PER_SECOND,
+            shards=shards, workers=workers)
+
+
+class _PreprocessingReader:
+    """
+    Binary file-like object applying the fixes of preprocess_xml while a parser reads from it
+
+    The declaration is normalised, standalone ampersands are escaped and control characters
+    removed chunk by chunk; a trailing ampersand is held back until the next chunk shows
+    whether it starts an entity.
+    """
 
+    def __init__(self, raw: IO, chunk_size: int = 1 << 20):
+        import codecs
+        self._raw = raw
+        self._chunk_size = chunk_size
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._carry = ''
+        self._started = False
+        self._eof = False
+        self._buffer = b''
+        self._pos = 0
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._eof and (size < 0 or len(self._buffer) - self._pos < size):
+            self._fill()
+        end = len(self._buffer) if size < 0 else self._pos + size
+        data = self._buffer[self._pos:end]
+        self._pos = min(end, len(self._buffer))
+        return data
+
+    def _fill(self) -> None:
+        chunk = self._raw.read(self._chunk_size)
+        if chunk:
+            text = self._carry + self._decoder.decode(chunk)
+        else:
+            text = self._carry + self._decoder.decode(b'', final=True)
+            self._eof = True
+        self._carry = ''
+
+        if not self._started:
+            # The declaration has to be complete before it can be replaced
+            if not self._eof and (len(text) < 5 or (text.startswith('<?xml') and '?>' not in text)):
+                self._carry = text
+                return
+            text = self._normalize_declaration(text)
+            self._started = True
+
+        if not self._eof:
+            last_ampersand = text.rfind('&')
+            if last_ampersand >= 0 and len(text) - last_ampersand < 16:
+                text, self._carry = text[:last_ampersand], text[last_ampersand:]
+
+        text = _CONTROL_CHARACTERS.sub('', _STANDALONE_AMPERSAND.sub('&amp;', text))
+        self._buffer = self._buffer[self._pos:] + text.encode('utf-8')
+        self._pos = 0
+
+    @staticmethod
+    def _normalize_declaration(text: str) -> str:
+        """Replace or add the XML declaration the way preprocess_xml does"""
+        if not text.startswith('<?xml'):
+            return _XML_DECLARATION + '\n' + text
+        decl_end = text.find('?>')
+        if decl_end > 0:
+            return _XML_DECLARATION + text[decl_end + 2:]
+        possible_end = text.find('<', 5)
+        if possible_end > 5:
+            return _XML_DECLARATION + text[possible_end:]
+        return _XML_DECLARATION + '\n' + text[5:]
+
+
+class _RecordLevelExpat:
+    """
+    Stand-in for the expat module that xmltodict.parse uses when streaming records
+
+    With item_depth=2 xmltodict keeps the character data of the root element, i.e. the
+    whitespace between all records, until the document ends. The parsers created here keep
+    that data away from xmltodict and collect only the root's real text.
+    """
+
+    def __init__(self):
+        self.root_text: List[str] = []
+
+    def ParserCreate(self, *args, **kwargs) -> '_RecordLevelParser':
+        from xml.parsers import expat
+        return _RecordLevelParser(expat.ParserCreate(*args, **kwargs), self.root_text)
+
+
+class _RecordLevelParser:
+    """expat parser wrapper that tracks the element depth and filters the root's character data"""
+
+    def __init__(self, parser: Any, root_text: List[str]):
+        object.__setattr__(self, '_parser', parser)
+        object.__setattr__(self, '_root_text', root_text)
+        object.__setattr__(self, '_depth', [0])
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._parser, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        depth, root_text = self._depth, self._root_text
+        if name == 'StartElementHandler':
+            def start_element(name, attrs, handler=value):
+                depth[0] += 1
+                handler(name, attrs)
+            value = start_element
+        elif name == 'EndElementHandler':
+            def end_element(name, handler=value):
+                handler(name)
+                depth[0] -= 1
+            value = end_element
+        elif name == 'CharacterDataHandler':
+            def character_data(data, handler=value):
+                if depth[0] != 1:
+                    handler(data)
+                elif root_text or data.strip():
+                    root_text.append(data)
+            value = character_data
+        setattr(self._parser, name, value)
+
+
+class _RecordSpill:
     """
+    Serialized records of one document, kept in a temporary file per tag
+
+    write() emits the records grouped by tag in order of first appearance, with exactly the
+    layout json.dump(..., indent=2, ensure_ascii=False) gives the equivalent dictionary.
+    """
+    _SEPARATOR = '\x1e\n'  # JSON output never contains it, control characters are escaped
+
+    def __init__(self):
+        self._files: Dict[str, IO] = {}
+        self._counts: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return sum(self._counts.values())
+
+    def add(self, tag: str, item: Any) -> None:
+        self.add_serialized(tag, json.dumps(item, indent=2, ensure_ascii=False))
+
+    def add_serialized(self, tag: str, text: str) -> None:
+        spill = self._files.get(tag)
+        if spill is None:
+            import tempfile
+            spill = self._files[tag] = tempfile.TemporaryFile('w+', encoding='utf-8', newline='\n')
+            self._counts[tag] = 0
+        spill.write(text)
+        spill.write('\n')
+        spill.write(self._SEPARATOR)
+        self._counts[tag] += 1
+
+    def write(self, output: IO, root_key: Optional[str], head: List[Tuple[str, Any]],
+              force_list: FrozenSet[str] = frozenset()) -> None:
+        """
+        Write the document to a text stream
+
+        Args:
+            output: Text stream to write the JSON to
+            root_key: Key wrapping the root's content (xmltodict layout), None for the xml_to_dict layout
+            head: Entries of the root written before the records (attributes, text)
+            force_list: Tags written as arrays even if they occur only once
+        """
+        if root_key is not None:
+            output.write('{\n  ' + json.dumps(root_key, ensure_ascii=False) + ': ')
+            self._write_object(output, head, 4, force_list)
+            output.write('\n}')
+        elif not head and len(self._files) == 1:
+            # xml_to_dict returns the value directly when the root holds a single tag
+            tag = next(iter(self._files))
+            self._write_records(output, tag, 0, tag in force_list or self._counts[tag] > 1)
+        else:
+            self._write_object(output, head, 2, force_list)
+
+    def write_binary(self, writer: BinaryWriter, root_key: Optional[str], head: List[Tuple[str, Any]],
+                     force_list: FrozenSet[str] = frozenset()) -> None:
+        """Write the document in the binary intermediate format, with the same structure as write()"""
+        if root_key is not None:
+            writer.begin_dict(1)
+            writer.write_string(root_key)
+            self._write_binary_object(writer, head, force_list)
+        elif not head and len(self._files) == 1:
+            tag = next(iter(self._files))
+            self._write_binary_records(writer, tag, tag in force_list or self._counts[tag] > 1)
+        else:
+            self._write_binary_object(writer, head, force_list)
+
+    def close(self) -> None:
+        for spill in self._files.values():
+            spill.close()
+
+    def _write_binary_object(self, writer: BinaryWriter, head: List[Tuple[str, Any]],
+                             force_list: FrozenSet[str]) -> None:
+        writer.begin_dict(len(head) + len(self._counts))
+        for key, value in head:
+            writer.write_string(key)
+            writer.write(value)
+        for tag, count in self._counts.items():
+            writer.write_string(tag)
+            self._write_binary_records(writer, tag, tag in force_list or count > 1)
+
+    def _write_binary_records(self, writer: BinaryWriter, tag: str, as_list: bool) -> None:
+        if as_list:
+            writer.begin_list(self._counts[tag])
+        spill = self._files[tag]
+        spill.flush()
+        spill.seek(0)
+        lines = []
+        for line in spill:
+            if line == self._SEPARATOR:
+                writer.write(json.loads(''.join(lines)))
+                lines = []
+            else:
+                lines.append(line)
+
+    def _write_object(self, output: IO, head: List[Tuple[str, Any]], indent: int,
+                      force_list: FrozenSet[str]) -> None:
+        pad = ' ' * indent
+        separator = '{\n'
+        for key, value in head:
+            output.write(separator + pad + json.dumps(key, ensure_ascii=False) + ': ')
+            output.write(json.dumps(value, indent=2, ensure_ascii=False).replace('\n', '\n' + pad))
+            separator = ',\n'
+        for tag, count in self._counts.items():
+            output.write(separator + pad + json.dumps(tag, ensure_ascii=False) + ': ')
+            self._write_records(output, tag, indent, tag in force_list or count > 1)
+            separator = ',\n'
+        output.write('\n' + pad[:-2] + '}')
+
+    def _write_records(self, output: IO, tag: str, indent: int, as_list: bool) -> None:
+        spill = self._files[tag]
+        spill.flush()
+        spill.seek(0)
+        pad = ' ' * indent
+        if not as_list:
+            for i, line in enumerate(spill):
+                if line != self._SEPARATOR:
+                    output.write(line[:-1] if i == 0 else '\n' + pad + line[:-1])
+            return
+
+        item_pad = pad + '  '
+        separator = '[\n'
+        for line in spill:
+            if line == self._SEPARATOR:
+                separator = ',\n'
+                continue
+            output.write(separator + item_pad + line[:-1])
+            separator = '\n'
+        output.write('\n' + pad + ']')
+
+
+def _shard_ranges(path: str, scan: FileScan, shards: int) -> List[Tuple[int, int]]:
+    """Cut the records of a shardable file into about `shards` byte ranges starting at record start tags"""
+    record_start = re.compile(b'<(?:' + b'|'.join(re.escape(tag.encode('utf-8')) for tag in scan.record_tags)
+                              + rb')[\s/>]')
+    start, end = scan.records_start, scan.records_end
+    span = (end - start) / max(1, shards)
+    bounds = [start]
+    with open(path, 'rb') as f:
+        for i in range(1, shards):
+            pos = max(int(start + i * span), bounds[-1] + 1)
+            while pos < end:
+                f.seek(pos)
+                window = f.read(min(1 << 20, end - pos))
+                match = record_start.search(window)
+                if match:
+                    bounds.append(pos + match.start())
+                    break
+                # Keep an overlap so a start tag cut by the window end is found next time
+                pos += max(1, len(window) - 256)
+            else:
+                break
+    bounds.append(end)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def _convert_shard(path: str, start: int, end: int, root_start_tag: str, root_tag: str, use_xmltodict: bool,
+                   head_keys: FrozenSet[str], options: ConversionOptions) -> List[Tuple[str, str]]:
+    """Worker of convert_file_sharded: parse one byte range and return its records serialized as JSON"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        chunk = f.read(end - start).decode('utf-8', errors='replace')
+
+    converter = XMLToJsonConverter(options)
+    xml_content = converter.preprocess_xml(f"{_XML_DECLARATION}\n{root_start_tag}{chunk}</{root_tag}>", options)
+    del chunk
+    interner = StringInterner.from_options(options)
+
+    records = []
+    if use_xmltodict:
+        parsed = _optional_module('xmltodict').parse(xml_content, **_xmltodict_arguments(options, interner))
+        for key, value in (next(iter(parsed.values())) or {}).items():
+            if key in head_keys:
+                continue
+            for item in (value if isinstance(value, list) else [value]):
+                records.append((key, json.dumps(item, indent=2, ensure_ascii=False)))
+    else:
+        for child in ET.fromstring(xml_content):
+            tag = interner.key(child.tag) if interner is not None else child.tag
+            records.append((tag, json.dumps(converter._element_to_dict(child, options, interner),
+                                            indent=2, ensure_ascii=False)))
+    return records
+
+
+def _map_shards(tasks: List[tuple], workers: int, debug_mode: bool = False) -> Iterator[List[Tuple[str, str]]]:
+    """
+    Run _convert_shard over the tasks in worker processes and yield the results in file order
+
+    At most two shards per worker are in flight. If the pool cannot be used, e.g. because the
+    module was loaded under a name worker processes cannot import, the remaining shards are
+    converted in this process, one at a time. Workers are not forked from this process: it
+    may be running threads (the peak memory sampler of convert()), and a fork taken while
+    one of them holds a lock can deadlock the worker.
+    """
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+    import pickle
+    import site
+
+    pool = None
+    if workers > 1 and len(tasks) > 1:
+        try:
+            # Workers look the function up by module name, which fails if this module was
+            # loaded from its path without being registered in sys.modules
+            pickle.dumps(_convert_shard)
+            # Workers import this module by name, so its directory has to be on their path
+            start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(start_method),
+                                       initializer=site.addsitedir,
+                                       initargs=(os.path.dirname(os.path.abspath(__file__)),))
+        except (pickle.PicklingError, OSError, ImportError, NotImplementedError, ValueError) as e:
+            if debug_mode:
+                print(f"Worker processes unavailable ({e}), converting shards in this process")
+
+    pending = deque()
+    next_task = 0
+    try:
+        while next_task < len(tasks) or pending:
+            if pool is None:
+                yield _convert_shard(*tasks[next_task])
+                next_task += 1
+                continue
+            try:
+                while next_task < len(tasks) and len(pending) < 2 * workers:
+                    pending.append((next_task, pool.submit(_convert_shard, *tasks[next_task])))
+                    next_task += 1
+                result = pending[0][1].result()
+            except Exception as e:
+                # Shards that really cannot be parsed fail again below, with their own error
+                if debug_mode:
+                    print(f"Worker pool failed ({e}), converting the remaining shards in this process")
+                if pending:
+                    next_task = pending[0][0]
+                pending.clear()
+                # Waiting could block forever on a pool whose queue feeder failed
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = None
+                continue
+            pending.popleft()
+            yield result
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def _process_tree_rss() -> Optional[int]:
+    """Return the resident set size of this process and its child processes in bytes, None without /proc"""
+    page_size = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            total = int(f.read().split()[1]) * page_size
+    except (OSError, ValueError, IndexError):
+        return None
+    pending = [os.getpid()]
+    while pending:
+        pid = pending.pop()
+        try:
+            for tid in os.listdir(f'/proc/{pid}/task'):
+                with open(f'/proc/{pid}/task/{tid}/children', 'rb') as f:
+                    children = [int(child) for child in f.read().split()]
+                for child in children:
+                    with open(f'/proc/{child}/statm', 'rb') as f:
+                        total += int(f.read().split()[1]) * page_size
+                pending.extend(children)
+        except (OSError, ValueError, IndexError):
+            continue  # A process (or thread) that ended while it was read
+    return total
+
+
+class _PeakMemory(threading.Thread):
+    """
+    Measures how far memory use rises above its level at the start of the enclosed block
+
+    By default the resident set size of this process and its worker processes is sampled
+    every few milliseconds, which is cheap and includes the workers of a sharded
+    conversion. trace=True (and systems without /proc) use tracemalloc instead, which
+    counts Python allocations exactly but slows the conversion down. A tracemalloc peak
+    already being tracked (by the profiling hooks) is left as it is.
+    """
+
+    def __init__(self, trace: bool = False, interval: float = 0.005):
+        super().__init__(daemon=True)
+        self.trace = trace
+        self.interval = interval
+        self.peak_bytes = None
+        self.source = None
+        self._baseline = 0
+        self._peak_rss = 0
+        self._was_tracing = False
+        self._stop_event = threading.Event()
+
+    def __enter__(self) -> '_PeakMemory':
+        if not self.trace:
+            baseline = _process_tree_rss()
+            if baseline is not None:
+                self._baseline = self._peak_rss = baseline
+                self.start()
+                return self
+            self.trace = True
+        import tracemalloc
+        self._was_tracing = tracemalloc.is_tracing()
+        if not self._was_tracing:
+            tracemalloc.start()
+        self._baseline = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self._sample()
+
+    def _sample(self) -> None:
+        rss = _process_tree_rss()
+        if rss is not None and rss > self._peak_rss:
+            self._peak_rss = rss
+
+    def __exit__(self, *exc_info) -> None:
+        if not self.trace:
+            self._stop_event.set()
+            self.join()
+            self._sample()
+            self.peak_bytes = self._peak_rss - self._baseline
+            self.source = 'rss'
+            return
+        import tracemalloc
+        self.peak_bytes = max(0, tracemalloc.get_traced_memory()[1] - self._baseline)
+        self.source = 'tracemalloc'
+        if not self._was_tracing:
+            tracemalloc.stop()
+
+
+def _create_planner(options: Dict[str, Any]) -> Optional[ExecutionPlanner]:
+    """Create the execution planner if a memory_budget option is given"""
+    if not options.get('memory_budget'):
+        return None
+    return ExecutionPlanner(options['memory_budget'], options.get('max_workers'), options.get('plan_strategy'))
+
+
+def _convert_planned(converter: XMLToJsonConverter, planner: ExecutionPlanner, input_file: str,
+                     output_path: Optional[str], options: Dict[str, Any]) -> str:
+    """Convert one file with the strategy the planner picks and record the predicted and actual cost"""
+    import time
+
+    scan = prescan_file(input_file)
+    plan = planner.plan(scan)
+    print(f"Plan for {input_file}: {plan.strategy}, {plan.reason} "
+          f"(predicted {plan.predicted_seconds:.2f}s, peak {plan.predicted_peak_bytes / 2 ** 20:.1f} MiB)")
+
+    strategy = plan.strategy
+    fallbacks = []
+    start_time = time.perf_counter()
+    with _PeakMemory(options.get('trace_memory', False)) as peak:
+        while True:
+            try:
+                if strategy == 'sharded':
+                    result_path = converter.convert_file_sharded(input_file, output_path, scan, plan.shards,
+                                                                 plan.workers)
+                elif strategy == 'streaming':
+                    result_path = converter.convert_file_streaming(input_file, output_path)
+                else:
+                    result_path = converter.convert_file(input_file, output_path)
+                break
+            except Exception as e:
+                if strategy == 'memory':
+                    raise
+                # Streaming has no recovery for malformed XML, the in-memory parser does
+                fallback = 'streaming' if strategy == 'sharded' else 'memory'
+                print(f"{strategy} conversion of {input_file} failed ({e}), retrying with {fallback}")
+                fallbacks.append(f"{strategy}: {e}")
+                strategy = fallback
+    elapsed = time.perf_counter() - start_time
+
+    metrics = {
+        'input_file': input_file,
+        'output_file': result_path,
+        'strategy': strategy,
+        'planned_strategy': plan.strategy,
+        'reason': plan.reason,
+        'fallbacks': fallbacks,
+        'memory_budget': planner.memory_budget,
+        'predicted_seconds': plan.predicted_seconds,
+        'actual_seconds': elapsed,
+        'predicted_peak_bytes': plan.predicted_peak_bytes,
+        'actual_peak_bytes': peak.peak_bytes,
+        'peak_source': peak.source,
+        'shards': plan.shards,
+        'workers': plan.workers,
+        'scan': asdict(scan),
+    }
+    print(f"Converted {input_file} with {strategy} in {elapsed:.2f}s (predicted {plan.predicted_seconds:.2f}s)")
+    if options.get('run_metrics') is not None:
+        options['run_metrics'].append(metrics)
+    return result_path
+
+
+def _read_bytes(path: str) -> bytes:
+    with _open_file(path, 'rb') as f:
+        return f.read()
+
+
+def _write_bytes(path: str, data: bytes, compression_level: int = None) -> None:
+    with _open_file(path, 'wb', compression_level=compression_level) as f:
+        f.write(data)
+
+
+def _encode_output(json_data: Dict[str, Any], output_path: str) -> bytes:
+    """Serialize converted data as JSON or, if the output path asks for it, in the binary format"""
+    if _is_binary_path(output_path):
+        buffer = io.BytesIO()
+        dump_binary(json_data, buffer)
+        return buffer.getvalue()
+    return json.dumps(json_data, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def _write_spill(spill: _RecordSpill, output_path: str, root_key: Optional[str], head: List[Tuple[str, Any]],
+                 force_list: FrozenSet[str], compression_level: int = None) -> None:
+    """Write a record spill as JSON or, if the output path asks for it, in the binary format"""
+    if _is_binary_path(output_path):
+        with _open_file(output_path, 'wb', compression_level=compression_level) as f:
+            writer = BinaryWriter(f)
+            spill.write_binary(writer, root_key, head, force_list)
+            writer.flush()
+    else:
+        with _open_file(output_path, 'w', encoding='utf-8', compression_level=compression_level) as f:
+            spill.write(f, root_key, head, force_list)
+
+
+def _create_converter(options: Dict[str, Any]) -> XMLToJsonConverter:
+    """Create a converter configured from the module system's option dictionary"""
     converter = XMLToJsonConverter()
 
     # Apply options
@@ -446,34 +1955,207 @@ def convert(input_files: List[str], output_dir: str = None, additional_files: Li
             attribute_prefix=options.get('attribute_prefix', '@'),
             text_key=options.get('text_key', '#text'),
             list_tags=options.get('list_tags', []),
-            debug_mode=options.get('debug_mode', True)  # Enable debug by default
+            debug_mode=options.get('debug_mode', True),  # Enable debug by default
+            compression_level=options.get('compression_level'),
+            intern_strings=options.get('intern_strings', True),
+            intern_max_entries=options.get('intern_max_entries'),
+            intern_max_value_length=options.get('intern_max_value_length'),
         )
 
+    return converter
+
+
+def _normalize_compression(compression: Optional[str]) -> str:
+    """Map an output_compression option ('gz', 'bz2', 'xz' or None) to a file suffix"""
+    if not compression:
+        return ''
+    suffix = '.' + compression.lower().lstrip('.')
+    if suffix == '.gzip':
+        suffix = '.gz'
+    if suffix not in COMPRESSION_CODECS:
+        raise ValueError(f"Unsupported output compression: {compression}")
+    return suffix
+
+
+def _is_supported_input(input_file: str) -> bool:
+    """Check the input suffix, looking through any compression suffix"""
+    return _strip_compression_suffix(input_file).lower().endswith(('.xml', '.pdi'))
+
+
+def _output_suffix(output_format: Optional[str]) -> str:
+    """Map an output_format option ('json' or 'binary') to a file suffix"""
+    if output_format in (None, 'json'):
+        return '.json'
+    if output_format == 'binary':
+        return BINARY_SUFFIX
+    raise ValueError(f"Unsupported output format: {output_format}")
+
+
+def _output_path_for(input_file: str, output_dir: Optional[str], compression_suffix: str = '',
+                     output_suffix: str = '.json') -> Optional[str]:
+    """Return the output path for an input file, or None to write JSON next to it"""
+    if not output_dir and not compression_suffix and output_suffix == '.json':
+        return None
+    filename = os.path.basename(_strip_compression_suffix(input_file)).rsplit('.', 1)[0] + output_suffix
+    return os.path.join(output_dir or os.path.dirname(input_file), filename + compression_suffix)
+
+
+def _profiling_hooks() -> Any:
+    """Import modules/profiling_hooks.py (shared by the converter modules) by path on first use"""
+    import importlib.util
+    module = sys.modules.get('profiling_hooks')
+    if module is None:
+        path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'profiling_hooks.py')
+        spec = importlib.util.spec_from_file_location('profiling_hooks', path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules['profiling_hooks'] = module
+    return module
+
+
+def convert(input_files: List[str], output_dir: str = None, additional_files: List[str] = None, **options) -> List[str]:
+    """
+    Main conversion function for the module system
+
+    Profiling (off by default) is enabled with the profile_dir option. Selected files are
+    converted under cProfile and tracemalloc and get a .prof dump and an .alloc.txt report
+    in that directory; profile_every=N selects every Nth file, profile_min_size only files
+    of at least that many bytes and profile_top sets the length of the allocation report.
+
+    Execution planning (off by default) is enabled with the memory_budget option, in bytes.
+    Each file is then pre-scanned and converted in memory, streamed record by record or
+    split into shards parsed by max_workers processes, whichever is predicted to be fastest
+    within the budget; plan_strategy forces one of 'memory', 'streaming' or 'sharded'. The
+    decision with its predicted and actual time and memory peak is printed and appended to
+    the run_metrics list if one is passed. The actual peak is how far the resident memory
+    of the process and its workers rose above its level at the start of the file (the
+    prediction also counts PROCESS_BASE_PEAK per process); trace_memory=True measures it
+    with tracemalloc instead.
+
+    output_format='binary' writes the compact binary intermediate format (.bjson) instead
+    of pretty-printed JSON, for handing the data straight to the Old-Pdi_to_New-Pdi module.
+
+    Input files that fail to convert (or are skipped) are appended to the failed_files
+    list if one is passed.
+
+    Args:
+        input_files: List of XML file paths to convert
+        output_dir: Directory for output files
+        additional_files: List of additional files
+        options: Conversion options
+
+    Returns:
+        List of generated JSON file paths
+
+    """
+    converter = _create_converter(options)
+    compression_suffix = _normalize_compression(options.get('output_compression'))
+    output_suffix = _output_suffix(options.get('output_format'))
+    planner = _create_planner(options)
+
     output_files = []
+    file_index = 0
 
     for input_file in input_files:
         try:
-            if not input_file.lower().endswith(('.xml', '.pdi')):
+            if not _is_supported_input(input_file):
                 print(f"Skipping {input_file} - not an XML or PDI file")
+                if options.get('failed_files') is not None:
+                    options['failed_files'].append(input_file)
                 continue
 
-            if output_dir:
-                filename = os.path.basename(input_file).rsplit('.', 1)[0] + '.json'
-                output_path = os.path.join(output_dir, filename)
-            else:
-                output_path = None
+            output_path = _output_path_for(input_file, output_dir, compression_suffix, output_suffix)
 
             print(f"Processing {input_file}...")
-            result_path = converter.convert_file(input_file, output_path)
+            profiling = _profiling_hooks().profiling_context(input_file, file_index, options)
+            file_index += 1
+            with profiling:
+                if planner is None:
+                    result_path = converter.convert_file(input_file, output_path)
+                else:
+                    result_path = _convert_planned(converter, planner, input_file, output_path, options)
             output_files.append(result_path)
             print(f"Successfully converted to {result_path}")
 
         except Exception as e:
             print(f"Error converting {input_file}: {str(e)}")
+            if options.get('failed_files') is not None:
+                options['failed_files'].append(input_file)
 
     return output_files
 
 
+async def convert_async(input_files: Iterable[str], output_dir: str = None, additional_files: List[str] = None,
+                        executor: 'Executor' = None, max_concurrency: int = 4,
+                        **options) -> AsyncIterator[Tuple[str, Optional[str]]]:
+    """
+    Asynchronous conversion function for asyncio based callers
+
+    At most max_concurrency files are in flight at any time. New files are only started
+    while the caller keeps consuming results, so a slow consumer applies backpressure.
+    Cancelling the consumer or closing the generator cancels all files still in flight.
+
+    Args:
+        input_files: Iterable of XML file paths to convert
+        output_dir: Directory for output files
+        additional_files: List of additional files
+        executor: Executor for the CPU-bound parsing work (defaults to the loop's executor)
+        max_concurrency: Maximum number of files converted at the same time
+        options: Conversion options
+
+    Yields:
+        (input_file, result_path) tuples in completion order; result_path is None if
+        the file failed to convert
+    """
+    import asyncio
+
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+
+    converter = _create_converter(options)
+    compression_suffix = _normalize_compression(options.get('output_compression'))
+    output_suffix = _output_suffix(options.get('output_format'))
+    remaining = iter(input_files)
+    pending: Dict[asyncio.Future, str] = {}
+
+    try:
+        while True:
+            # Top up the in-flight set from the input
+            while len(pending) < max_concurrency:
+                input_file = next(remaining, None)
+                if input_file is None:
+                    break
+                if not _is_supported_input(input_file):
+                    print(f"Skipping {input_file} - not an XML or PDI file")
+                    continue
+
+                print(f"Processing {input_file}...")
+                task = asyncio.ensure_future(converter.convert_file_async(
+                    input_file, _output_path_for(input_file, output_dir, compression_suffix, output_suffix),
+                    executor=executor))
+                pending[task] = input_file
+
+            if not pending:
+                break
+
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                input_file = pending.pop(task)
+                try:
+                    result_path = task.result()
+                    print(f"Successfully converted to {result_path}")
+                except Exception as e:
+                    print(f"Error converting {input_file}: {str(e)}")
+                    result_path = None
+                yield input_file, result_path
+
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
 if __name__ == "__main__":
     # Test the converter
     test_files = ["test.xml"]
@@ -0,0 +1,431 @@
+"""
+Long-running converter service on a local Unix socket
+
+Starting a new process per job pays for interpreter startup, the converter imports and,
+for the PDI module, finding and parsing the template again. The daemon keeps all of that
+warm: modules are loaded once through the module registry and PDI converters are cached
+per template, so a request only pays for the conversion itself. A template file that
+changes on disk is picked up by the next request that uses it; requests already running
+finish with the converter they started with.
+
+Protocol: every message is a 4-byte big-endian length followed by that many bytes of
+UTF-8 JSON. A connection can carry any number of request/response pairs, and every
+connection is served by its own thread, so requests on different connections run
+concurrently. Requests are either a conversion
+
+    {"module": "XML_to_Json", "input_files": [...], "output_dir": "...", "options": {...}}
+
+(optionally with "template_path" and "additional_files" for modules that take them) or a
+command: {"command": "ping" | "stats" | "reload" | "shutdown"}. Every response carries
+"ok" and, if that is false, an "error" message. Paths are resolved by the daemon, so
+clients should send absolute paths.
+
+Usage:
+    python modules/converter_daemon.py serve
+    python modules/converter_daemon.py convert Old-Pdi_to_New-Pdi form.json -o out/
+    python modules/converter_daemon.py stats
+"""
+import argparse
+import json
+import os
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+_HEADER = struct.Struct(">I")
+MAX_MESSAGE_SIZE = 64 << 20
+
+
+def default_socket_path() -> str:
+    """Return the socket path from CONVERTER_DAEMON_SOCKET, or a per-user path in the temp directory"""
+    return os.environ.get("CONVERTER_DAEMON_SOCKET") or os.path.join(
+        tempfile.gettempdir(), f"converter_daemon-{os.getuid()}.sock")
+
+
+class ProtocolError(Exception):
+    """Raised for malformed or oversized messages"""
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Connection closed in the middle of a message")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def send_message(sock: socket.socket, message: Dict[str, Any]) -> None:
+    """Send one length-prefixed JSON message"""
+    body = json.dumps(message).encode("utf-8")
+    if len(body) > MAX_MESSAGE_SIZE:
+        raise ProtocolError(f"Message of {len(body)} bytes exceeds the limit of {MAX_MESSAGE_SIZE} bytes")
+    sock.sendall(_HEADER.pack(len(body)) + body)
+
+
+def receive_message(sock: socket.socket) -> Optional[Dict[str, Any]]:
+    """Receive one length-prefixed JSON message, or None if the peer closed the connection before it"""
+    first = sock.recv(_HEADER.size)
+    if not first:
+        return None
+    header = first + _recv_exact(sock, _HEADER.size - len(first))
+    size, = _HEADER.unpack(header)
+    if size > MAX_MESSAGE_SIZE:
+        raise ProtocolError(f"Message of {size} bytes exceeds the limit of {MAX_MESSAGE_SIZE} bytes")
+    try:
+        message = json.loads(_recv_exact(sock, size))
+    except ValueError as e:
+        raise ProtocolError(f"Invalid message: {e}")
+    if not isinstance(message, dict):
+        raise ProtocolError("A message must be a JSON object")
+    return message
+
+
+def _file_stamp(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+class WarmConverters:
+    """
+    Converters kept between requests, keyed by the arguments they were built from
+
+    Only modules that take a template (a template_path argument and a converter class
+    loading it) are cached; the other modules are cheap to set up once imported. An
+    entry is rebuilt when the template it loaded changes on disk. The converters
+    themselves are safe to share between threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[tuple, Tuple[Any, Optional[Tuple[int, int, int]]]] = {}
+        self._building: Dict[tuple, threading.Lock] = {}
+        self.reloads = 0
+
+    def get(self, module: Any, template_path: Optional[str], additional_files: Optional[List[str]],
+            compression_level: Optional[int], validation: Optional[str] = None) -> Optional[Any]:
+        """Return a warm converter for a template module, or None if the module does not take a template"""
+        converter_class = getattr(module, "JsonToListLabelConverter", None)
+        if converter_class is None:
+            return None
+        key = (module.__name__, template_path, tuple(additional_files or ()), compression_level, validation)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            building = self._building.setdefault(key, threading.Lock())
+        if entry is not None and _file_stamp(entry[0].template_path) == entry[1]:
+            return entry[0]
+
+        # One thread loads the template, concurrent requests for the same key wait for it
+        with building:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None and _file_stamp(entry[0].template_path) == entry[1]:
+                return entry[0]
+            args = [template_path] if template_path else []
+            converter = converter_class(*args, additional_files=additional_files,
+                                        compression_level=compression_level, validation=validation)
+            stamp = _file_stamp(converter.template_path)
+            with self._lock:
+                self._entries[key] = (converter, stamp)
+                if entry is not None:
+                    self.reloads += 1
+            if entry is not None:
+                print(f"[DAEMON] Reloaded changed template {converter.template_path}")
+            return converter
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def templates(self) -> List[str]:
+        with self._lock:
+            return sorted({converter.template_path for converter, _ in self._entries.values()})
+
+
+class ConverterDaemon:
+    """
+    Serve conversion requests on a Unix socket until shutdown() is called
+
+    At most max_concurrency conversions run at the same time; further requests wait
+    for a free slot. Shutting down stops accepting connections and waits for the
+    requests in progress to finish.
+    """
+
+    def __init__(self, socket_path: str = None, max_concurrency: int = 4, registry: Any = None,
+                 idle_poll: float = 0.5):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if registry is None:
+            from module_registry import get_registry
+            registry = get_registry()
+        self.socket_path = socket_path or default_socket_path()
+        self.registry = registry
+        self.converters = WarmConverters()
+        self.idle_poll = idle_poll
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._stopping = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "failed": 0, "active": 0}
+        self._handlers: List[threading.Thread] = []
+        self._listener: Optional[socket.socket] = None
+        self._started = time.time()
+
+    def _bind(self) -> socket.socket:
+        if os.path.exists(self.socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+            except OSError:
+                os.unlink(self.socket_path)  # Left behind by a daemon that did not shut down cleanly
+            else:
+                raise RuntimeError(f"A daemon is already listening on {self.socket_path}")
+            finally:
+                probe.close()
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)  # Socket accessible to the owner only
+        try:
+            listener.bind(self.socket_path)
+        finally:
+            os.umask(old_umask)
+        listener.listen(64)
+        listener.settimeout(self.idle_poll)
+        return listener
+
+    def serve_forever(self) -> None:
+        """Accept connections until shutdown() is called, then wait for running requests"""
+        self._listener = self._bind()
+        print(f"[DAEMON] Listening on {self.socket_path} (pid {os.getpid()})")
+        try:
+            while not self._stopping.is_set():
+                try:
+                    connection, _ = self._listener.accept()
+                except socket.timeout:
+                    continue
+                handler = threading.Thread(target=self._handle_connection, args=(connection,), daemon=True)
+                handler.start()
+                self._handlers = [thread for thread in self._handlers if thread.is_alive()] + [handler]
+        finally:
+            self._listener.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            for handler in self._handlers:
+                handler.join()
+            print("[DAEMON] Stopped")
+
+    def shutdown(self) -> None:
+        """Stop accepting requests; serve_forever() returns once the running ones are done"""
+        self._stopping.set()
+
+    def _handle_connection(self, connection: socket.socket) -> None:
+        with connection:
+            while not self._stopping.is_set():
+                # Wait for the next request in short intervals so idle connections notice a shutdown
+                connection.settimeout(self.idle_poll)
+                try:
+                    first = connection.recv(1, socket.MSG_PEEK)
+                except socket.timeout:
+                    continue
+                except OSError:
+                    return
+                if not first:
+                    return
+                connection.settimeout(None)
+                try:
+                    request = receive_message(connection)
+                except (ProtocolError, ConnectionError) as e:
+                    try:
+                        send_message(connection, {"ok": False, "error": str(e)})
+                    except OSError:
+                        pass
+                    return
+                if request is None:
+                    return
+                response = self.handle_request(request)
+                try:
+                    send_message(connection, response)
+                except OSError:
+                    return
+
+    def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute one request and return its response"""
+        command = request.get("command", "convert")
+        try:
+            if command == "convert":
+                return self._convert(request)
+            if command == "ping":
+                return {"ok": True, "pid": os.getpid(), "uptime": time.time() - self._started}
+            if command == "stats":
+                with self._stats_lock:
+                    stats = dict(self._stats)
+                return {"ok": True, **stats, "reloads": self.converters.reloads,
+                        "templates": self.converters.templates(),
+                        "modules": [info.key for info in self.registry.modules()]}
+            if command == "reload":
+                self.registry.refresh(force=True)
+                self.converters.clear()
+                return {"ok": True}
+            if command == "shutdown":
+                self.shutdown()
+                return {"ok": True}
+            return {"ok": False, "error": f"Unknown command: {command}"}
+        except Exception as e:
+            print(f"[DAEMON] Error in {command} request: {str(e)}")
+            return {"ok": False, "error": str(e)}
+
+    def _convert(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        module_key = request.get("module")
+        input_files = request.get("input_files")
+        if not module_key or not isinstance(input_files, list):
+            return {"ok": False, "error": "A conversion request needs 'module' and an 'input_files' list"}
+        options = dict(request.get("options") or {})
+        if "options" in options or "failed_files" in options:
+            return {"ok": False, "error": "'options' cannot be nested or set 'failed_files'"}
+
+        module = self.registry.load(module_key)
+        kwargs = {}
+        if request.get("additional_files"):
+            kwargs["additional_files"] = request["additional_files"]
+        if request.get("template_path"):
+            kwargs["template_path"] = request["template_path"]
+        converter = self.converters.get(module, request.get("template_path"), request.get("additional_files"),
+                                        options.get("compression_level"), options.get("validation"))
+        if converter is not None:
+            kwargs["converter"] = converter
+
+        with self._stats_lock:
+            self._stats["requests"] += 1
+        start = time.perf_counter()
+        # One input can legitimately give several outputs (bulk_mode), so failures are taken
+        # from the inputs the module reports, not from the number of outputs
+        failed_files: List[str] = []
+        with self._slots:
+            with self._stats_lock:
+                self._stats["active"] += 1
+            try:
+                output_files = module.convert(input_files, output_dir=request.get("output_dir"),
+                                              failed_files=failed_files, **kwargs, **options)
+            finally:
+                with self._stats_lock:
+                    self._stats["active"] -= 1
+        if failed_files:
+            with self._stats_lock:
+                self._stats["failed"] += 1
+        return {"ok": True, "output_files": output_files, "failed_files": failed_files,
+                "seconds": time.perf_counter() - start}
+
+
+class DaemonClient:
+    """Client for a running converter daemon; one connection, reused for all requests"""
+
+    def __init__(self, socket_path: str = None, timeout: float = None):
+        self.socket_path = socket_path or default_socket_path()
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(self.socket_path)
+
+    def request(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a request and return the daemon's response"""
+        send_message(self._socket, message)
+        response = receive_message(self._socket)
+        if response is None:
+            raise ConnectionError("The daemon closed the connection")
+        return response
+
+    def convert(self, module: str, input_files: List[str], output_dir: str = None, template_path: str = None,
+                additional_files: List[str] = None, failed_files: List[str] = None, **options: Any) -> List[str]:
+        """
+        Convert files with a module, like ModuleRegistry.convert but in the daemon
+
+        The input files that failed to convert are appended to failed_files if it is given.
+        """
+        message = {"module": module, "input_files": [os.path.abspath(path) for path in input_files],
+                   "output_dir": os.path.abspath(output_dir) if output_dir else None, "options": options}
+        if template_path:
+            message["template_path"] = os.path.abspath(template_path)
+        if additional_files:
+            message["additional_files"] = [os.path.abspath(path) for path in additional_files]
+        response = self.request(message)
+        if not response.get("ok"):
+            raise Exception(f"Daemon failed to convert: {response.get('error')}")
+        if failed_files is not None:
+            failed_files.extend(response.get("failed_files", ()))
+        return response["output_files"]
+
+    def close(self) -> None:
+        self._socket.close()
+
+    def __enter__(self) -> "DaemonClient":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def _parse_option(text: str) -> Tuple[str, Any]:
+    if "=" not in text:
+        raise argparse.ArgumentTypeError(f"Expected key=value, got {text!r}")
+    key, value = text.split("=", 1)
+    try:
+        return key, json.loads(value)
+    except ValueError:
+        return key, value
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run or talk to the converter daemon")
+    parser.add_argument("--socket", default=None, help=f"socket path (default: {default_socket_path()})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="run the daemon in the foreground")
+    serve_parser.add_argument("--max-concurrency", type=int, default=4)
+    convert_parser = commands.add_parser("convert", help="convert files with a module in the daemon")
+    convert_parser.add_argument("module", help="module directory name or name from info.txt")
+    convert_parser.add_argument("input_files", nargs="+")
+    convert_parser.add_argument("-o", "--output-dir")
+    convert_parser.add_argument("--template-path")
+    convert_parser.add_argument("--additional-file", action="append", dest="additional_files")
+    convert_parser.add_argument("--option", action="append", type=_parse_option, default=[],
+                                help="conversion option as key=value, the value parsed as JSON if possible")
+    for command in ("ping", "stats", "reload", "shutdown"):
+        commands.add_parser(command, help=f"send a {command} command")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        import signal
+        daemon = ConverterDaemon(args.socket, max_concurrency=args.max_concurrency)
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: daemon.shutdown())
+        signal.signal(signal.SIGHUP, lambda *_: daemon.handle_request({"command": "reload"}))
+        daemon.serve_forever()
+        return 0
+
+    try:
+        client = DaemonClient(args.socket)
+    except OSError as e:
+        print(f"[ERROR] Cannot connect to the daemon at {args.socket or default_socket_path()}: {e}")
+        return 2
+    with client:
+        if args.command == "convert":
+            failed_files: List[str] = []
+            output_files = client.convert(args.module, args.input_files, output_dir=args.output_dir,
+                                          template_path=args.template_path, additional_files=args.additional_files,
+                                          failed_files=failed_files, **dict(args.option))
+            for path in output_files:
+                print(path)
+            return 0 if not failed_files else 1
+        response = client.request({"command": args.command})
+        print(json.dumps(response, indent=2))
+        return 0 if response.get("ok") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+"""
+Registry of the converter modules in this directory
+
+Every module lives in its own directory and is described by an info.txt with
+key=value lines (name, version, entry_point, supported_formats, output_format, ...).
+The registry parses that metadata once, caches it, and imports a module's entry
+point only when it is first used, so listing or selecting modules stays cheap.
+
+Usage:
+    python modules/module_registry.py list
+    python modules/module_registry.py convert XML_to_Json input.xml -o out/
+"""
+import argparse
+import importlib.util
+import os
+import sys
+import threading
+from dataclasses import dataclass, field
+from types import ModuleType
+from typing import Any, Dict, List, Optional, Tuple
+
+MODULES_DIR = os.path.dirname(os.path.abspath(__file__))
+INFO_FILE = "info.txt"
+
+
+@dataclass(frozen=True)
+class ModuleInfo:
+    """Metadata of one converter module, parsed from its info.txt"""
+    key: str  # Directory name, the stable identifier of a module
+    directory: str
+    name: str
+    version: str
+    entry_point: str
+    supported_formats: Tuple[str, ...]
+    output_format: str
+    description: str = ""
+    author: str = ""
+    category: str = ""
+    extra: Dict[str, str] = field(default_factory=dict, compare=False)
+
+    @property
+    def entry_path(self) -> str:
+        return os.path.join(self.directory, self.entry_point)
+
+    @property
+    def module_name(self) -> str:
+        return os.path.splitext(self.entry_point)[0]
+
+
+def parse_info_file(path: str) -> Dict[str, str]:
+    """Parse an info.txt file into a dictionary of its key=value lines"""
+    values = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#") or "=" not in line:
+                continue
+            key, value = line.split("=", 1)
+            values[key.strip()] = value.strip()
+    return values
+
+
+def _module_info_from_file(path: str) -> ModuleInfo:
+    values = parse_info_file(path)
+    directory = os.path.dirname(path)
+    known = {"name", "version", "entry_point", "supported_formats", "output_format",
+             "description", "author", "category"}
+    return ModuleInfo(
+        key=os.path.basename(directory),
+        directory=directory,
+        name=values.get("name", os.path.basename(directory)),
+        version=values.get("version", ""),
+        entry_point=values["entry_point"],
+        supported_formats=tuple(fmt.strip().lower() for fmt in values.get("supported_formats", "").split(",")
+                                if fmt.strip()),
+        output_format=values.get("output_format", "").lower(),
+        description=values.get("description", ""),
+        author=values.get("author", ""),
+        category=values.get("category", ""),
+        extra={k: v for k, v in values.items() if k not in known},
+    )
+
+
+class ModuleRegistry:
+    """
+    Cached view of all converter modules below a directory
+
+    Metadata is read on first access; later accesses only compare the modification times
+    of the info.txt files and re-read those that changed (or appeared). Entry points are
+    imported lazily and shared by all callers; an entry point is executed again when its
+    file or its info.txt changed since it was loaded.
+    The registry is safe to use from several threads.
+    """
+
+    def __init__(self, modules_dir: str = MODULES_DIR):
+        self.modules_dir = modules_dir
+        self._lock = threading.RLock()
+        self._infos: Dict[str, ModuleInfo] = {}
+        self._mtimes: Dict[str, float] = {}
+        # Loaded entry point and the stamp of its file, None once its info.txt changed
+        self._loaded: Dict[str, Tuple[ModuleType, Optional[Tuple[int, int]]]] = {}
+
+    def _info_paths(self) -> List[str]:
+        paths = []
+        for entry in sorted(os.listdir(self.modules_dir)):
+            path = os.path.join(self.modules_dir, entry, INFO_FILE)
+            if os.path.isfile(path):
+                paths.append(path)
+        return paths
+
+    def refresh(self, force: bool = False) -> None:
+        """Re-read info.txt files that changed since the last scan (all of them if force is set)"""
+        with self._lock:
+            infos, mtimes = {}, {}
+            for path in self._info_paths():
+                mtime = os.path.getmtime(path)
+                key = os.path.basename(os.path.dirname(path))
+                if not force and self._mtimes.get(key) == mtime:
+                    infos[key] = self._infos[key]
+                else:
+                    infos[key] = _module_info_from_file(path)
+                    if key in self._loaded:
+                        self._loaded[key] = (self._loaded[key][0], None)
+                mtimes[key] = mtime
+            self._infos, self._mtimes = infos, mtimes
+
+    def modules(self) -> List[ModuleInfo]:
+        """Return the metadata of all modules, re-reading the info.txt files that changed since the last call"""
+        with self._lock:
+            self.refresh()
+            return list(self._infos.values())
+
+    def get(self, key: str) -> ModuleInfo:
+        """Return a module by directory name or by the name given in its info.txt"""
+        for info in self.modules():
+            if key in (info.key, info.name):
+                return info
+        raise KeyError(f"Unknown converter module: {key}")
+
+    def for_format(self, input_format: str, output_format: str = None) -> List[ModuleInfo]:
+        """Return all modules accepting an input format, optionally restricted to an output format"""
+        input_format = input_format.lower().lstrip(".")
+        return [info for info in self.modules()
+                if input_format in info.supported_formats
+                and (output_format is None or info.output_format == output_format.lower().lstrip("."))]
+
+    def load(self, key: str) -> ModuleType:
+        """Import a module's entry point on first use and return the cached module until its files change"""
+        info = self.get(key)
+        with self._lock:
+            stat = os.stat(info.entry_path)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            module, loaded_stamp = self._loaded.get(info.key, (None, None))
+            if module is not None and loaded_stamp == stamp:
+                return module
+
+            # On first use, share a module the process already imported from the same file
+            shared = sys.modules.get(info.module_name) if module is None else None
+            if shared is not None and os.path.abspath(getattr(shared, "__file__", "")) == info.entry_path:
+                module = shared
+            else:
+                spec = importlib.util.spec_from_file_location(info.module_name, info.entry_path)
+                module = importlib.util.module_from_spec(spec)
+                previous = sys.modules.get(info.module_name)
+                # Registered before execution so dataclasses and pickling can resolve the module
+                sys.modules[info.module_name] = module
+                try:
+                    spec.loader.exec_module(module)
+                except BaseException:
+                    if previous is None:
+                        del sys.modules[info.module_name]
+                    else:
+                        sys.modules[info.module_name] = previous
+                    raise
+            self._loaded[info.key] = (module, stamp)
+            return module
+
+    def convert(self, key: str, input_files: List[str], output_dir: str = None, **kwargs: Any) -> List[str]:
+        """Run a module's convert() function"""
+        return self.load(key).convert(input_files, output_dir=output_dir, **kwargs)
+
+
+_default_registry: Optional[ModuleRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def get_registry() -> ModuleRegistry:
+    """Return the process-wide registry for this directory"""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = ModuleRegistry()
+        return _default_registry
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="List and run the converter modules")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="list the available modules")
+    convert_parser = commands.add_parser("convert", help="convert files with a module")
+    convert_parser.add_argument("module", help="module directory name or name from info.txt")
+    convert_parser.add_argument("input_files", nargs="+")
+    convert_parser.add_argument("-o", "--output-dir")
+    convert_parser.add_argument("--additional-file", action="append", dest="additional_files")
+    args = parser.parse_args(argv)
+
+    registry = get_registry()
+    if args.command == "list":
+        for info in registry.modules():
+            print(f"{info.key:<22} {info.version:<8} {','.join(info.supported_formats)} -> {info.output_format}"
+                  f"  ({info.name})")
+        return 0
+
+    failed_files: List[str] = []
+    registry.convert(args.module, args.input_files, output_dir=args.output_dir,
+                     additional_files=args.additional_files, failed_files=failed_files)
+    return 0 if not failed_files else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
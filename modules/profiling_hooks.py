@@ -0,0 +1,118 @@
+"""
+Opt-in profiling of single conversions, shared by the converter modules
+
+A converter's convert() wraps every file in profiling_context(); unless the profile_dir
+option is set that is a no-op. Selected files run under cProfile and tracemalloc and get
+a .prof dump and an .alloc.txt report with the allocation sites near the memory peak.
+The converters import this module by path on first use (see _profiling_hooks in each
+converter); cProfile and tracemalloc are only imported once a file is actually profiled.
+
+Options:
+    profile_dir: Directory for the reports; profiling is off without it
+    profile_every: Profile every Nth file only (default 1)
+    profile_min_size: Profile only files of at least this many bytes
+    profile_top: Number of allocation sites in the report (default 25)
+"""
+import contextlib
+import os
+import threading
+from typing import Any, ContextManager, Dict, Iterator
+
+
+class _PeakSnapshotSampler(threading.Thread):
+    """Background thread that keeps a tracemalloc snapshot taken close to the memory peak"""
+
+    def __init__(self, interval: float = 0.01):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.snapshot = None
+        self.snapshot_size = 0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        import tracemalloc
+        current = tracemalloc.get_traced_memory()[0]
+        # Only snapshot on real growth, snapshots of large heaps are expensive
+        if current > self.snapshot_size * 1.1:
+            self.snapshot = tracemalloc.take_snapshot()
+            self.snapshot_size = current
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+        self.sample()
+
+
+def should_profile(input_file: str, index: int, options: Dict[str, Any]) -> bool:
+    """Decide from the profile_* options whether a file is profiled (off unless profile_dir is set)"""
+    if not options.get('profile_dir'):
+        return False
+    if index % max(1, options.get('profile_every', 1)) != 0:
+        return False
+    min_size = options.get('profile_min_size', 0)
+    return not min_size or os.path.getsize(input_file) >= min_size
+
+
+@contextlib.contextmanager
+def profile_file(input_file: str, report_base: str, top: int = 25) -> Iterator[None]:
+    """
+    Run the enclosed conversion under cProfile and tracemalloc
+
+    Writes <report_base>.prof (cProfile stats, readable with pstats or snakeviz) and
+    <report_base>.alloc.txt (peak traced memory and the top allocation sites near the peak).
+    """
+    import cProfile
+    import tracemalloc
+
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    sampler = _PeakSnapshotSampler()
+    sampler.snapshot_size = baseline
+    sampler.start()
+    profiler = cProfile.Profile()
+
+    try:
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+    finally:
+        sampler.stop()
+        peak = tracemalloc.get_traced_memory()[1]
+        if not was_tracing:
+            tracemalloc.stop()
+
+        profiler.dump_stats(report_base + '.prof')
+        with open(report_base + '.alloc.txt', 'w', encoding='utf-8') as f:
+            f.write(f"Allocation report for {input_file}\n")
+            f.write(f"Peak traced memory: {(peak - baseline) / 1024:.1f} KiB above start\n\n")
+            if sampler.snapshot is not None:
+                stats = sampler.snapshot.filter_traces([
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, '<frozen *>'),  # Import machinery, not the conversion
+                ]).statistics('lineno')
+                f.write(f"Top {top} allocation sites near the peak "
+                        f"({sampler.snapshot_size / 1024:.1f} KiB traced):\n")
+                for stat in stats[:top]:
+                    f.write(f"  {stat}\n")
+            else:
+                f.write("No allocation peak sampled, the conversion finished within the sampling interval\n")
+
+
+def profiling_context(input_file: str, index: int, options: Dict[str, Any]) -> ContextManager:
+    """Return a profiling context if the profile_* options select this file, else a no-op context"""
+    if not should_profile(input_file, index, options):
+        return contextlib.nullcontext()
+
+    profile_dir = options['profile_dir']
+    os.makedirs(profile_dir, exist_ok=True)
+    report_base = os.path.join(profile_dir, f"{index:05d}_{os.path.basename(input_file)}")
+    return profile_file(input_file, report_base, options.get('profile_top', 25))
@@ -0,0 +1,465 @@
+"""
+Watch drop directories and convert files as soon as they are complete
+
+New or changed .xml/.pdi files go through the XML_to_Json stage and .json files through
+the PDI stage. By default the JSON data of an XML file is handed straight to the PDI
+stage in memory, so a drop of an old PDI export comes out as a new .pdi without an
+intermediate file (pass --json-dir to keep the JSON as well, or --no-chain to stop
+after the XML stage).
+
+Changes are picked up through Linux inotify, or by polling the directories where
+inotify is not available. A file is converted once its size and modification time have
+stayed the same for the settle time, so files still being written are not picked up
+half-done; hidden files (e.g. rsync's temporary .name.XXXXXX files) are ignored. Every
+file is only converted again when it changes, and on startup files whose output is
+newer than the input are skipped. Outputs are written to a temporary name and renamed,
+so consumers of the output directory never see partial files either.
+
+Usage:
+    python modules/watch_folder.py /data/drop -o /data/out --template-path template.pdi
+    python modules/watch_folder.py /data/drop -o /data/out --once   # convert the backlog and exit
+"""
+import argparse
+import io
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from converter_daemon import WarmConverters, _file_stamp
+from module_registry import get_registry
+
+XML_MODULE = "XML_to_Json"
+PDI_MODULE = "Old-Pdi_to_New-Pdi"
+XML_SUFFIXES = (".xml", ".pdi")
+JSON_SUFFIXES = (".json",)
+
+# inotify(7) constants
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_ONLYDIR = 0x01000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_IN_EVENT = struct.Struct("iIII")
+
+
+class _InotifyWatcher:
+    """Changed file paths of a set of directories, from Linux inotify through ctypes"""
+
+    MASK = (_IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+            | _IN_ONLYDIR)
+
+    def __init__(self, directories: List[str]):
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available on this platform")
+        self._fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._directories: Dict[int, str] = {}
+        try:
+            for directory in directories:
+                wd = libc.inotify_add_watch(self._fd, os.fsencode(directory), self.MASK)
+                if wd < 0:
+                    errno = ctypes.get_errno()
+                    raise OSError(errno, f"Cannot watch {directory}: {os.strerror(errno)}")
+                self._directories[wd] = directory
+        except OSError:
+            os.close(self._fd)
+            raise
+
+    def read(self, timeout: float) -> Optional[List[str]]:
+        """Wait up to timeout seconds and return the changed (or removed) paths, or None if events were lost"""
+        readable, _, _ = select.select([self._fd], [], [], max(timeout, 0))
+        if not readable:
+            return []
+        try:
+            data = os.read(self._fd, 1 << 16)
+        except BlockingIOError:
+            return []
+        paths = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _IN_EVENT.unpack_from(data, offset)
+            offset += _IN_EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & _IN_Q_OVERFLOW:
+                return None
+            if name and wd in self._directories:
+                paths.append(os.path.join(self._directories[wd], os.fsdecode(name)))
+        return paths
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class _PollingWatcher:
+    """Changed file paths of a set of directories, found by comparing periodic listings"""
+
+    def __init__(self, directories: List[str], interval: float):
+        self._directories = directories
+        self._interval = interval
+        self._stamps: Dict[str, Tuple[int, int, int]] = {}
+        self._next_scan = time.monotonic() + interval
+        self._stamps = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int, int]]:
+        stamps = {}
+        for directory in self._directories:
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                stamps[entry.path] = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        return stamps
+
+    def read(self, timeout: float) -> Optional[List[str]]:
+        """Wait up to timeout seconds and return the paths that changed or disappeared since the previous scan"""
+        wait = self._next_scan - time.monotonic()
+        if wait > timeout:
+            time.sleep(max(timeout, 0))
+            return []
+        time.sleep(max(wait, 0))
+        self._next_scan = time.monotonic() + self._interval
+        stamps = self._scan()
+        changed = [path for path, stamp in stamps.items() if self._stamps.get(path) != stamp]
+        changed.extend(path for path in self._stamps if path not in stamps)
+        self._stamps = stamps
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class FolderWatcher:
+    """
+    Convert files dropped into watched directories, with a pool of worker threads
+
+    The watcher loop runs in the thread calling run() and owns all bookkeeping; the
+    workers only convert. Both converters are shared by all workers, and a template
+    that changes on disk is reloaded before the next conversion that needs it.
+
+    Outputs are named after the input's stem, so two inputs can map to the same output
+    (a.xml and a.pdi, or a.xml in two watched directories). The first input seen keeps
+    the output; the other is reported and skipped until the first one is removed.
+    """
+
+    def __init__(self, directories: List[str], output_dir: str, json_dir: str = None, chain: bool = True,
+                 template_path: str = None, additional_files: List[str] = None, workers: int = 4,
+                 settle: float = 1.0, poll_interval: float = 2.0, use_inotify: bool = True,
+                 validation: str = None, xml_module: str = XML_MODULE, pdi_module: str = PDI_MODULE,
+                 registry: Any = None, **xml_options: Any):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.directories = [os.path.abspath(directory) for directory in directories]
+        self.output_dir = os.path.abspath(output_dir)
+        self.json_dir = os.path.abspath(json_dir) if json_dir else None
+        for directory in (self.output_dir, self.json_dir):
+            if directory and any(os.path.realpath(directory) == os.path.realpath(watched)
+                                 for watched in self.directories):
+                raise ValueError(f"Output directory {directory} must not be one of the watched directories")
+        self.chain = chain
+        self.template_path = template_path
+        self.additional_files = additional_files
+        self.workers = workers
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.validation = validation  # Schema validation of the generated .pdi rows, off if None
+
+        registry = registry or get_registry()
+        self._xml_module = registry.load(xml_module)
+        self._pdi_module = registry.load(pdi_module)
+        self._xml_converter = self._xml_module.XMLToJsonConverter()
+        self._xml_converter.set_options(**xml_options)
+        self._pdi_converters = WarmConverters()
+
+        self._converted: Dict[str, Tuple[int, int, int]] = {}  # Stamp of the input at its last conversion
+        self._pending: Dict[str, Tuple[Tuple[int, int, int], float]] = {}  # Stamp and settle deadline
+        self._running: Dict[str, Tuple[Future, Tuple[int, int, int]]] = {}
+        self._claims: Dict[str, str] = {}  # Output path -> the input file writing it
+        self._blocked: Dict[str, str] = {}  # Input file -> the input holding one of its output paths
+        self._stop_event = threading.Event()
+        self.converted_count = 0
+        self.failed_count = 0
+
+    def stop(self) -> None:
+        """Ask run() to return after the conversions in progress"""
+        self._stop_event.set()
+
+    def _is_input(self, path: str) -> bool:
+        name = os.path.basename(path)
+        return not name.startswith(".") and name.lower().endswith(XML_SUFFIXES + JSON_SUFFIXES)
+
+    def _list_inputs(self) -> List[str]:
+        paths = []
+        for directory in self.directories:
+            for name in sorted(os.listdir(directory)):
+                path = os.path.join(directory, name)
+                if self._is_input(path) and os.path.isfile(path):
+                    paths.append(path)
+        return paths
+
+    def _output_paths(self, path: str) -> Tuple[Optional[str], Optional[str]]:
+        """Return the (JSON, PDI) output paths of an input file, None for outputs it does not get"""
+        stem = os.path.splitext(os.path.basename(path))[0]
+        if path.lower().endswith(JSON_SUFFIXES):
+            return None, os.path.join(self.output_dir, stem + ".pdi")
+        json_dir = self.json_dir if self.chain else self.output_dir
+        json_path = os.path.join(json_dir, stem + ".json") if json_dir else None
+        pdi_path = os.path.join(self.output_dir, stem + ".pdi") if self.chain else None
+        return json_path, pdi_path
+
+    def _is_up_to_date(self, path: str, stamp: Tuple[int, int, int]) -> bool:
+        for output_path in self._output_paths(path):
+            if output_path is None:
+                continue
+            output_stamp = _file_stamp(output_path)
+            if output_stamp is None or output_stamp[0] < stamp[0]:
+                return False
+        return True
+
+    def _claim_outputs(self, path: str) -> Optional[Tuple[str, str]]:
+        """Reserve the output paths of an input, returning (output, owner) if another input holds one"""
+        outputs = [output_path for output_path in self._output_paths(path) if output_path is not None]
+        for output_path in outputs:
+            owner = self._claims.get(output_path, path)
+            if owner != path:
+                return output_path, owner
+        for output_path in outputs:
+            self._claims[output_path] = path
+        return None
+
+    def _forget(self, path: str) -> None:
+        """Drop all bookkeeping of an input file that was removed"""
+        self._pending.pop(path, None)
+        self._converted.pop(path, None)
+        self._blocked.pop(path, None)
+        for output_path in [output for output, owner in self._claims.items() if owner == path]:
+            del self._claims[output_path]
+        # Inputs that were skipped for colliding with this one get their turn
+        for blocked_path in [blocked for blocked, owner in self._blocked.items() if owner == path]:
+            del self._blocked[blocked_path]
+            self._converted.pop(blocked_path, None)
+            self._observe(blocked_path)
+
+    def _prune(self) -> None:
+        """Forget inputs that no longer exist, for when their removal was not reported"""
+        for path in [path for path in self._converted if path not in self._running and not os.path.exists(path)]:
+            self._forget(path)
+
+    def _observe(self, path: str, startup: bool = False) -> None:
+        """Note a possibly changed file; it is converted once it has settled"""
+        if not self._is_input(path):
+            return
+        stamp = _file_stamp(path)
+        if stamp is None:
+            if path not in self._running:
+                self._forget(path)
+            return
+        if stamp == self._converted.get(path):
+            return
+        collision = self._claim_outputs(path)
+        if collision is not None:
+            output_path, owner = collision
+            self._pending.pop(path, None)
+            self._converted[path] = stamp  # Reported once per version of the file
+            self._blocked[path] = owner
+            self.failed_count += 1
+            print(f"[WATCH] Skipping {path}: its output {output_path} is already written for {owner}")
+            return
+        if startup and self._is_up_to_date(path, stamp):
+            self._converted[path] = stamp
+            return
+        pending = self._pending.get(path)
+        if pending is None or pending[0] != stamp:
+            self._pending[path] = (stamp, time.monotonic() + self.settle)
+
+    def _submit_settled(self, pool: ThreadPoolExecutor) -> None:
+        now = time.monotonic()
+        for path, (stamp, deadline) in list(self._pending.items()):
+            if deadline > now or path in self._running:
+                continue
+            current = _file_stamp(path)
+            if current != stamp:
+                # Still being written (or gone), wait for it to settle again
+                if current is None:
+                    self._forget(path)
+                else:
+                    self._pending[path] = (current, now + self.settle)
+                continue
+            del self._pending[path]
+            self._running[path] = (pool.submit(self._convert, path), stamp)
+
+    def _collect_finished(self) -> None:
+        for path, (future, stamp) in list(self._running.items()):
+            if not future.done():
+                continue
+            del self._running[path]
+            # Failed files are not retried until they change again
+            if _file_stamp(path) is None:
+                self._forget(path)
+            else:
+                self._converted[path] = stamp
+            try:
+                outputs = future.result()
+                self.converted_count += 1
+                print(f"[WATCH] Converted {path} -> {', '.join(outputs)}")
+            except Exception as e:
+                self.failed_count += 1
+                print(f"[WATCH] Error converting {path}: {str(e)}")
+
+    def _next_timeout(self) -> float:
+        timeout = self.poll_interval
+        if self._pending:
+            timeout = min(timeout, min(deadline for _, deadline in self._pending.values()) - time.monotonic())
+        if self._running:
+            timeout = min(timeout, 0.05)
+        return max(timeout, 0)
+
+    def _create_watcher(self) -> Any:
+        if self.use_inotify:
+            try:
+                return _InotifyWatcher(self.directories)
+            except (OSError, AttributeError) as e:
+                print(f"[WATCH] inotify not available ({str(e)}), polling every {self.poll_interval}s")
+        return _PollingWatcher(self.directories, self.poll_interval)
+
+    def run(self, once: bool = False) -> None:
+        """
+        Watch the directories until stop() is called
+
+        Args:
+            once: Return as soon as the files present at startup are converted
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self.json_dir:
+            os.makedirs(self.json_dir, exist_ok=True)
+
+        watcher = None if once else self._create_watcher()
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="watch") as pool:
+                # The watcher is set up first, so files dropped during the initial listing are not missed
+                for path in self._list_inputs():
+                    self._observe(path, startup=True)
+                if once:
+                    # Files present at startup are taken as complete
+                    self._pending = {path: (stamp, 0.0) for path, (stamp, _) in self._pending.items()}
+
+                while not self._stop_event.is_set():
+                    self._collect_finished()
+                    self._submit_settled(pool)
+                    if once and not self._pending and not self._running:
+                        break
+                    timeout = self._next_timeout()
+                    if watcher is None:
+                        time.sleep(min(timeout, 0.05))
+                        continue
+                    changed = watcher.read(timeout)
+                    if changed is None:
+                        print("[WATCH] Change events were lost, rescanning")
+                        self._prune()
+                        changed = self._list_inputs()
+                    for path in changed:
+                        self._observe(path)
+
+            # Leaving the pool waited for the conversions still running
+            self._collect_finished()
+        finally:
+            if watcher is not None:
+                watcher.close()
+
+    def _convert(self, path: str) -> List[str]:
+        """Convert one input file (runs in a worker thread) and return the written outputs"""
+        json_path, pdi_path = self._output_paths(path)
+        with open(path, "rb") as f:
+            content = f.read()
+
+        outputs = []
+        if path.lower().endswith(JSON_SUFFIXES):
+            pdi_bytes = self._pdi_converter().convert_stream(io.BytesIO(content))
+        else:
+            data = self._xml_converter.convert_bytes(content, source_name=path)
+            if json_path:
+                buffer = io.BytesIO()
+                self._xml_converter.write_json(data, buffer)
+                _write_atomic(json_path, buffer.getvalue())
+                outputs.append(json_path)
+            if not pdi_path:
+                return outputs
+            pdi_bytes = self._pdi_converter().convert_dict(data)
+        _write_atomic(pdi_path, pdi_bytes)
+        outputs.append(pdi_path)
+        return outputs
+
+    def _pdi_converter(self) -> Any:
+        return self._pdi_converters.get(self._pdi_module, self.template_path, self.additional_files, None,
+                                        self.validation)
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    """Write a file under a temporary name and rename it, so readers never see it half-written"""
+    temp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{os.getpid()}.{threading.get_ident()}")
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Convert files dropped into directories as they arrive")
+    parser.add_argument("directories", nargs="+", help="drop directories to watch")
+    parser.add_argument("-o", "--output-dir", required=True)
+    parser.add_argument("--json-dir", help="also keep the JSON of XML inputs in this directory")
+    parser.add_argument("--no-chain", dest="chain", action="store_false",
+                        help="stop XML inputs after the JSON stage (written to the output directory)")
+    parser.add_argument("--template-path")
+    parser.add_argument("--additional-file", action="append", dest="additional_files")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--settle", type=float, default=1.0,
+                        help="seconds a file must stay unchanged before it is converted")
+    parser.add_argument("--poll-interval", type=float, default=2.0)
+    parser.add_argument("--force-polling", dest="use_inotify", action="store_false")
+    parser.add_argument("--validate", dest="validation", choices=("fail_fast", "collect"),
+                        help="check generated .pdi rows against the template schema")
+    parser.add_argument("--once", action="store_true", help="convert the files present now and exit")
+    parser.add_argument("--debug", dest="debug_mode", action="store_true", help="verbose XML conversion output")
+    args = parser.parse_args(argv)
+
+    watcher = FolderWatcher(args.directories, args.output_dir, json_dir=args.json_dir, chain=args.chain,
+                            template_path=args.template_path, additional_files=args.additional_files,
+                            workers=args.workers, settle=args.settle, poll_interval=args.poll_interval,
+                            use_inotify=args.use_inotify, validation=args.validation, debug_mode=args.debug_mode)
+    if not args.once:
+        import signal
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: watcher.stop())
+    watcher.run(once=args.once)
+    return 0 if watcher.failed_count == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+Shared fixtures of the converter tests
+
+The module directories are not packages, so the converters are loaded by path through
+the module registry, exactly as the pipeline and the daemon load them.
+"""
+import copy
+import os
+import re
+import sys
+import xml.etree.ElementTree as ET
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES_DIR = os.path.join(REPO_ROOT, "modules")
+TEMPLATE_PATH = os.path.join(MODULES_DIR, "Old-Pdi_to_New-Pdi", "Empty_List_Label.pdi")
+
+sys.path.insert(0, MODULES_DIR)
+
+from module_registry import get_registry  # noqa: E402
+
+FORM_DOCUMENT = {
+    "form": {"Firma": "1", "Formular": "ABC", "FormularNr": 7, "Anzahl_Zeilen": 70, "Generatortyp": "L"},
+    "descriptions": [{"language": "D", "text": "Rechnung"}, {"language": "F", "text": "Facture"}],
+    "sections": [{"id": "K", "fruehester_Beginn": 1, "spaetester_Beginn": 2, "spaetestes_Ende": 10}],
+    "fields": [{"id": "f1", "section": "K", "subsection": "A", "FeldNummer": 1, "FeldTyp": "F",
+                "TabellenName": "Kunde", "SpaltenName": "Name", "Zeile": 3, "Spalte": 5, "FeldFormat": "x(30)",
+                "translations": [{"language": "D", "text": "Name", "format": "x(10)"},
+                                 {"language": "E", "text": "Name"}]}],
+    "texts": [{"TextArt": "KT", "Schluessel": "S1", "content": {"D": "Hallo & Tschuess", "E": "Hi"}}],
+}
+
+
+@pytest.fixture(scope="session")
+def pdi_module():
+    return get_registry().load("Old-Pdi_to_New-Pdi")
+
+
+@pytest.fixture(scope="session")
+def xml_module():
+    return get_registry().load("XML_to_Json")
+
+
+@pytest.fixture(scope="session")
+def converter(pdi_module):
+    return pdi_module.JsonToListLabelConverter(TEMPLATE_PATH)
+
+
+@pytest.fixture
+def form_document():
+    """A form document that converts to a schema-valid .pdi"""
+    return copy.deepcopy(FORM_DOCUMENT)
+
+
+def parse_pdi(content: bytes) -> ET.Element:
+    """Parse converter output; the prefix of a few prodata attributes is left unbound by the converter"""
+    return ET.fromstring(re.sub(rb"\bns\d+:", b"prodata:", content))
+
+
+def data_rows(root: ET.Element):
+    """Return the table rows of a parsed .pdi, without the embedded schema"""
+    return [row for row in root if not row.tag.startswith("{")]
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import TEMPLATE_PATH
+
+
+class _CountingExecutor(ThreadPoolExecutor):
+    """Thread pool recording the largest number of calls running at the same time"""
+
+    def __init__(self):
+        super().__init__(max_workers=8)
+        self.running = self.max_running = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        def counted():
+            with self._lock:
+                self.running += 1
+                self.max_running = max(self.max_running, self.running)
+            try:
+                threading.Event().wait(0.02)  # Long enough for the calls to overlap
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.running -= 1
+        return super().submit(counted)
+
+
+def _collect(results):
+    async def collect():
+        return [result async for result in results]
+    return asyncio.run(collect())
+
+
+def _write_forms(directory, form_document, count):
+    forms = {}
+    for index in range(count):
+        form = dict(form_document, form=dict(form_document["form"], Formular=f"F{index}"))
+        path = directory / f"form{index}.json"
+        path.write_text(json.dumps(form), encoding="utf-8")
+        forms[str(path)] = form
+    return forms
+
+
+def test_pdi_convert_async_bounds_concurrency(pdi_module, converter, form_document, tmp_path):
+    forms = _write_forms(tmp_path, form_document, 6)
+    broken_path = str(tmp_path / "broken.json")
+    (tmp_path / "broken.json").write_text("{", encoding="utf-8")
+    executor = _CountingExecutor()
+
+    with executor:
+        results = dict(_collect(pdi_module.convert_async(
+            list(forms) + [broken_path, str(tmp_path / "notes.txt")], str(tmp_path / "out"), TEMPLATE_PATH,
+            executor=executor, max_concurrency=2)))
+
+    assert executor.max_running == 2
+    assert sorted(results) == sorted(list(forms) + [broken_path])
+    assert results.pop(broken_path) is None
+    for path, result_path in results.items():
+        with open(result_path, "rb") as f:
+            assert f.read() == converter.convert_dict(forms[path])
+
+
+def test_xml_convert_async_reports_failed_files(xml_module, tmp_path):
+    xml_path = tmp_path / "sample.xml"
+    xml_path.write_text('<root><item id="x">A &amp; B</item></root>', encoding="utf-8")
+    missing_path = str(tmp_path / "missing.xml")
+
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+
+    results = dict(_collect(xml_module.convert_async([str(xml_path), missing_path], str(output_dir),
+                                                     debug_mode=False)))
+
+    assert results == {str(xml_path): str(output_dir / "sample.json"), missing_path: None}
+    converter = xml_module.XMLToJsonConverter(xml_module.ConversionOptions(debug_mode=False))
+    expected_path = converter.convert_file(str(xml_path), str(tmp_path / "expected.json"))
+    with open(expected_path, "rb") as expected, open(results[str(xml_path)], "rb") as f:
+        assert f.read() == expected.read()
+
+
+def test_convert_file_async_raises_module_errors(xml_module, converter, tmp_path):
+    broken_path = tmp_path / "broken.json"
+    broken_path.write_text("{", encoding="utf-8")
+    xml_converter = xml_module.XMLToJsonConverter(xml_module.ConversionOptions(debug_mode=False))
+
+    with pytest.raises(Exception, match="Failed to parse JSON"):
+        asyncio.run(converter.convert_file_async(str(broken_path)))
+    with pytest.raises(Exception, match="Error converting XML to JSON"):
+        asyncio.run(xml_converter.convert_file_async(str(tmp_path / "missing.xml")))
+
+
+def test_closing_the_results_cancels_files_in_flight(pdi_module, form_document, tmp_path):
+    paths = list(_write_forms(tmp_path, form_document, 8))
+
+    async def first_result():
+        results = pdi_module.convert_async(paths, str(tmp_path / "out"), TEMPLATE_PATH, max_concurrency=3)
+        result = await results.__anext__()
+        await results.aclose()
+        return result, [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+    (input_file, result_path), left_over = asyncio.run(first_result())
+
+    assert result_path is not None and input_file in paths
+    assert left_over == []
+    assert len(os.listdir(tmp_path / "out")) < len(paths)
+
+
+def test_convert_async_rejects_invalid_concurrency(pdi_module, xml_module):
+    for results in (pdi_module.convert_async([], max_concurrency=0), xml_module.convert_async([], max_concurrency=0)):
+        with pytest.raises(ValueError):
+            _collect(results)
@@ -0,0 +1,99 @@
+import io
+import json
+import random
+
+import pytest
+
+DOCUMENT = {
+    "rows": [{"Firma": "1", "Formular": f"F{i % 3}", "Nr": i, "Preis": i / 4, "Aktiv": i % 2 == 0, "Notiz": None}
+             for i in range(300)],
+    "texts": ["Grüße & Ärger", "€" * 200, "x" * 300, "", "Grüße & Ärger"],
+    "numbers": [0, -1, 1 << 62, -(1 << 63), 1 << 80, -(1 << 70), 1.5e-300, -0.0],
+    "nested": {"empty_dict": {}, "empty_list": [], "single": {"only": [[], [{}], [[1, [2, [3]]]]]}},
+    "wide": {f"key{i}": i for i in range(300)},
+    "Firma": "1",
+}
+
+
+def _dump(xml_module, document, **writer_options):
+    stream = io.BytesIO()
+    if writer_options:
+        writer = xml_module.BinaryWriter(stream, **writer_options)
+        writer.write(document)
+        writer.flush()
+    else:
+        xml_module.dump_binary(document, stream)
+    return stream.getvalue()
+
+
+def test_round_trip(xml_module, pdi_module):
+    data = _dump(xml_module, DOCUMENT)
+
+    assert data.startswith(xml_module.BINARY_MAGIC)
+    assert pdi_module.load_binary(io.BytesIO(data)) == DOCUMENT
+    for chunk_size in (1, 3, 64):
+        assert pdi_module.BinaryReader(io.BytesIO(data), chunk_size=chunk_size).load() == DOCUMENT
+
+
+def test_round_trip_with_full_tables(xml_module, pdi_module):
+    # Strings and shapes beyond the table limits are written inline
+    data = _dump(xml_module, DOCUMENT, flush_size=16, max_table_entries=4, max_table_string_length=2)
+
+    assert pdi_module.load_binary(io.BytesIO(data)) == DOCUMENT
+
+
+def test_round_trip_converts_keys_like_json(xml_module, pdi_module):
+    document = {"mixed": {1: "a", "b": 2}, "single": {2.5: None}}
+
+    assert pdi_module.load_binary(io.BytesIO(_dump(xml_module, document))) == json.loads(json.dumps(document))
+
+
+def test_corrupt_input_is_rejected(xml_module, pdi_module):
+    data = _dump(xml_module, DOCUMENT)
+
+    for corrupt in (data[:len(data) // 2], data[:len(xml_module.BINARY_MAGIC)], b"CVB0" + data[4:], data + b"\x00"):
+        with pytest.raises(pdi_module.BinaryFormatError):
+            pdi_module.load_binary(io.BytesIO(corrupt))
+
+
+def test_every_truncation_is_rejected(xml_module, pdi_module, form_document):
+    data = _dump(xml_module, form_document)
+
+    for chunk_size in (1, 1 << 16):
+        for end in range(len(data)):
+            with pytest.raises(pdi_module.BinaryFormatError):
+                pdi_module.BinaryReader(io.BytesIO(data[:end]), chunk_size=chunk_size).load()
+
+
+def test_corruption_raises_only_format_errors(xml_module, pdi_module, form_document):
+    data = _dump(xml_module, form_document)
+    rng = random.Random(0)
+
+    for _ in range(2000):
+        corrupt = bytearray(data)
+        corrupt[rng.randrange(len(xml_module.BINARY_MAGIC), len(corrupt))] = rng.randrange(256)
+        try:
+            pdi_module.load_binary(io.BytesIO(bytes(corrupt)))
+        except pdi_module.BinaryFormatError:
+            pass  # Corrupted strings and numbers may still decode, anything else must be this error
+
+
+def test_xml_binary_output_matches_json_output(xml_module, pdi_module, tmp_path):
+    xml_path = tmp_path / "sample.xml"
+    xml_path.write_text('<?xml version="1.0" encoding="UTF-8"?>\n'
+                        '<root a="1"><item id="x">A &amp; B</item><item id="y">Ä</item><n>text</n></root>',
+                        encoding="utf-8")
+    converter = xml_module.XMLToJsonConverter()
+
+    json_path = converter.convert_file(str(xml_path), str(tmp_path / "sample.json"))
+    binary_path = converter.convert_file(str(xml_path), str(tmp_path / ("sample" + xml_module.BINARY_SUFFIX)))
+
+    with open(json_path, encoding="utf-8") as json_file, open(binary_path, "rb") as binary_file:
+        assert pdi_module.load_binary(binary_file) == json.load(json_file)
+
+
+def test_pdi_converter_accepts_binary_input(xml_module, converter, form_document):
+    expected = converter.convert_dict(form_document)
+
+    assert converter.convert_stream(io.BytesIO(_dump(xml_module, form_document))) == expected
+    assert converter.convert_stream(io.BytesIO(json.dumps(form_document).encode("utf-8"))) == expected
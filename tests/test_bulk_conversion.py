@@ -0,0 +1,104 @@
+import asyncio
+import copy
+import io
+import json
+import os
+
+import pytest
+
+from conftest import TEMPLATE_PATH, data_rows, parse_pdi
+
+
+def _forms(form_document, *formulare):
+    forms = []
+    for formular in formulare:
+        form = copy.deepcopy(form_document)
+        form["form"]["Formular"] = formular
+        forms.append(form)
+    return forms
+
+
+def test_per_form_output_matches_single_conversion(converter, form_document):
+    forms = _forms(form_document, "ABC", "DEF")
+    forms[1]["fields"].append(dict(forms[1]["fields"][0], id="f2", FeldNummer=2, Zeile=4))
+
+    results = list(converter.convert_documents(forms))
+
+    assert [name for name, _ in results] == ["1_ABC_7", "1_DEF_7"]
+    for form, (_, content) in zip(forms, results):
+        assert content == converter.convert_dict(form)
+
+
+def test_iter_documents_reads_arrays_and_ndjson_in_small_chunks(pdi_module, form_document):
+    forms = _forms(form_document, "ABC", "DEF", "GHI")
+    array = json.dumps(forms).encode("utf-8")
+    ndjson = b"\n".join(json.dumps(form).encode("utf-8") for form in forms) + b"\n"
+
+    for payload in (array, ndjson):
+        assert list(pdi_module.iter_documents(io.BytesIO(payload), chunk_size=7)) == forms
+
+
+def test_iter_documents_rejects_invalid_arrays(pdi_module):
+    for payload in (b"[1,]", b"[1, ]", b'[{"a": 1},\n]', b"[,1]", b"[1 2]", b"[1", b"[1] 2"):
+        for chunk_size in (1, 1 << 16):
+            with pytest.raises(json.JSONDecodeError):
+                list(pdi_module.iter_documents(io.BytesIO(payload), chunk_size=chunk_size))
+
+    assert list(pdi_module.iter_documents(io.BytesIO(b" [ ] "))) == []
+
+
+def test_combined_document_satisfies_template_schema(pdi_module, converter, form_document):
+    forms = _forms(form_document, "ABC", "DEF", "GHI")
+
+    (name, content), = converter.convert_documents(forms, group_by_firma=True)
+
+    assert name == "1"
+    root = parse_pdi(content)
+    headers = root.findall("ttBG_FKopf")
+    assert [header.findtext("BG_FKopf_Obj") for header in headers] == [
+        "PA0173:zWLD:1_ABC_7", "PA0173:zWLD:1_DEF_7", "PA0173:zWLD:1_GHI_7"]
+
+    validation = pdi_module.SchemaValidator.from_template(converter.template_root).start(fail_fast=False)
+    for row in data_rows(root):
+        validation.check_row(row)
+    assert validation.errors == []
+
+
+def test_combined_document_refuses_repeated_form(converter, form_document):
+    forms = _forms(form_document, "ABC", "DEF", "ABC")
+
+    failed_forms = []
+
+    (_, content), = converter.convert_documents(forms, group_by_firma=True, failed_forms=failed_forms)
+
+    headers = parse_pdi(content).findall("ttBG_FKopf")
+    assert [header.findtext("Formular") for header in headers] == ["ABC", "DEF"]
+    assert [index for index, _ in failed_forms] == [3]
+
+
+def test_bulk_file_with_failed_forms_is_reported(pdi_module, form_document, tmp_path):
+    forms = _forms(form_document, "ABC", "DEF")
+    bulk_path = tmp_path / "forms.ndjson"
+    bulk_path.write_text("\n".join(json.dumps(form) for form in [forms[0], 42, forms[1]]), encoding="utf-8")
+
+    for bulk_mode, outputs in (("per_form", 2), ("per_firma", 1)):
+        failed_files = []
+        output_files = pdi_module.convert([str(bulk_path)], str(tmp_path / bulk_mode), TEMPLATE_PATH,
+                                          bulk_mode=bulk_mode, failed_files=failed_files)
+        assert len(output_files) == outputs
+        assert failed_files == [str(bulk_path)]
+
+
+def test_convert_async_reads_bulk_inputs(pdi_module, form_document, tmp_path):
+    forms = _forms(form_document, "ABC", "DEF")
+    bulk_path = tmp_path / "forms.ndjson"
+    bulk_path.write_text("\n".join(json.dumps(form) for form in [forms[0], 42, forms[1]]), encoding="utf-8")
+
+    async def collect():
+        results = pdi_module.convert_async([str(bulk_path)], str(tmp_path / "out"), TEMPLATE_PATH, bulk_mode="per_form")
+        return [result async for result in results]
+
+    results = asyncio.run(collect())
+
+    assert [(input_file, os.path.basename(path) if path else None) for input_file, path in results] == [
+        (str(bulk_path), "forms_1_ABC_7.pdi"), (str(bulk_path), "forms_1_DEF_7.pdi"), (str(bulk_path), None)]
@@ -0,0 +1,81 @@
+import bz2
+import gzip
+import json
+import lzma
+
+import pytest
+
+from conftest import TEMPLATE_PATH
+
+CODECS = {".gz": gzip, ".bz2": bz2, ".xz": lzma}
+TEXT = "Grüße & Ärger\n" * 500
+
+
+@pytest.fixture(params=["pdi_module", "xml_module"])
+def module(request):
+    return request.getfixturevalue(request.param)
+
+
+@pytest.mark.parametrize("suffix", sorted(CODECS))
+def test_open_file_round_trip(module, tmp_path, suffix):
+    text_path = str(tmp_path / ("text.txt" + suffix))
+    binary_path = str(tmp_path / ("binary.bin" + suffix))
+
+    with module._open_file(text_path, "w", encoding="utf-8", compression_level=1) as f:
+        f.write(TEXT)
+    with module._open_file(binary_path, "wb", compression_level=9) as f:
+        f.write(TEXT.encode("utf-8"))
+
+    # The files are really compressed with the codec belonging to the suffix
+    for path in (text_path, binary_path):
+        with CODECS[suffix].open(path, "rb") as f:
+            assert f.read() == TEXT.encode("utf-8")
+    with module._open_file(text_path, "r", encoding="utf-8") as f:
+        assert f.read() == TEXT
+    with module._open_file(binary_path, "rb") as f:
+        assert f.read() == TEXT.encode("utf-8")
+
+
+def test_open_file_leaves_other_suffixes_alone(module, tmp_path):
+    path = str(tmp_path / "plain.json")
+
+    with module._open_file(path, "w", encoding="utf-8", compression_level=9) as f:
+        f.write(TEXT)
+
+    assert (tmp_path / "plain.json").read_text(encoding="utf-8") == TEXT
+
+
+def test_unsupported_output_compression_is_rejected(module):
+    assert module._normalize_compression("gzip") == module._normalize_compression(".GZ") == ".gz"
+    with pytest.raises(ValueError):
+        module._normalize_compression("zip")
+
+
+def test_pdi_convert_reads_and_writes_compressed_files(pdi_module, converter, form_document, tmp_path):
+    input_path = tmp_path / "form.json.gz"
+    with gzip.open(input_path, "wt", encoding="utf-8") as f:
+        json.dump(form_document, f)
+
+    output_files = pdi_module.convert([str(input_path)], str(tmp_path / "out"), TEMPLATE_PATH,
+                                      output_compression="xz", compression_level=1)
+
+    assert output_files == [str(tmp_path / "out" / "form.pdi.xz")]
+    with lzma.open(output_files[0], "rb") as f:
+        assert f.read() == converter.convert_dict(form_document)
+
+
+def test_xml_convert_reads_and_writes_compressed_files(xml_module, tmp_path):
+    xml = '<?xml version="1.0" encoding="UTF-8"?>\n<root a="1"><item id="x">A &amp; B</item><n>Ä</n></root>'
+    with bz2.open(tmp_path / "sample.xml.bz2", "wt", encoding="utf-8") as f:
+        f.write(xml)
+    (tmp_path / "plain").mkdir()
+    (tmp_path / "plain" / "sample.xml").write_text(xml, encoding="utf-8")
+    (tmp_path / "out").mkdir()
+
+    expected_files = xml_module.convert([str(tmp_path / "plain" / "sample.xml")], str(tmp_path / "plain"))
+    output_files = xml_module.convert([str(tmp_path / "sample.xml.bz2")], str(tmp_path / "out"),
+                                      output_compression="gz")
+
+    assert output_files == [str(tmp_path / "out" / "sample.json.gz")]
+    with gzip.open(output_files[0], "rb") as f, open(expected_files[0], "rb") as expected:
+        assert f.read() == expected.read()
@@ -0,0 +1,13 @@
+def test_set_options_keeps_interning_limits(xml_module):
+    converter = xml_module.XMLToJsonConverter(xml_module.ConversionOptions(intern_max_entries=8,
+                                                                           intern_max_value_length=4))
+
+    converter.set_options(attribute_prefix="_", list_tags=["item"])
+
+    assert converter.options == xml_module.ConversionOptions(attribute_prefix="_", list_tags=frozenset({"item"}),
+                                                             debug_mode=False, intern_max_entries=8,
+                                                             intern_max_value_length=4)
+
+    converter.set_options(intern_max_entries=16)
+
+    assert (converter.options.intern_max_entries, converter.options.intern_max_value_length) == (16, 4)
@@ -0,0 +1,77 @@
+import json
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+from conftest import TEMPLATE_PATH
+
+import converter_daemon
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    server = converter_daemon.ConverterDaemon(str(tmp_path / "daemon.sock"), idle_poll=0.05)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while not os.path.exists(server.socket_path):
+        assert time.monotonic() < deadline, "daemon did not start"
+        time.sleep(0.01)
+    yield server
+    server.shutdown()
+    thread.join(5)
+
+
+def test_framing_round_trip():
+    left, right = socket.socketpair()
+    with left, right:
+        converter_daemon.send_message(left, {"command": "ping", "text": "ä" * 1000})
+        assert converter_daemon.receive_message(right) == {"command": "ping", "text": "ä" * 1000}
+        left.close()
+        assert converter_daemon.receive_message(right) is None
+
+
+def test_ping_convert_shutdown(daemon, tmp_path, converter, form_document):
+    form_path = tmp_path / "form.json"
+    form_path.write_text(json.dumps(form_document), encoding="utf-8")
+
+    with converter_daemon.DaemonClient(daemon.socket_path, timeout=30) as client:
+        assert client.request({"command": "ping"})["ok"]
+        output_files = client.convert("Old-Pdi_to_New-Pdi", [str(form_path)], output_dir=str(tmp_path / "out"),
+                                      template_path=TEMPLATE_PATH)
+        assert [os.path.basename(path) for path in output_files] == ["form.pdi"]
+        with open(output_files[0], "rb") as f:
+            assert f.read() == converter.convert_dict(form_document)
+        assert client.request({"command": "shutdown"})["ok"]
+
+    deadline = time.monotonic() + 5
+    while os.path.exists(daemon.socket_path):
+        assert time.monotonic() < deadline, "daemon did not shut down"
+        time.sleep(0.01)
+
+
+def test_bulk_outputs_are_not_counted_as_failures(daemon, tmp_path, form_document):
+    forms = []
+    for formular in ("ABC", "DEF", "GHI"):
+        form = json.loads(json.dumps(form_document))
+        form["form"]["Formular"] = formular
+        forms.append(form)
+    bulk_path = tmp_path / "forms.ndjson"
+    bulk_path.write_text("\n".join(json.dumps(form) for form in forms), encoding="utf-8")
+    broken_path = tmp_path / "broken.json"
+    broken_path.write_text("{", encoding="utf-8")
+
+    with converter_daemon.DaemonClient(daemon.socket_path, timeout=30) as client:
+        failed_files = []
+        output_files = client.convert("Old-Pdi_to_New-Pdi", [str(bulk_path)], output_dir=str(tmp_path / "out"),
+                                      template_path=TEMPLATE_PATH, failed_files=failed_files, bulk_mode="per_form")
+        assert len(output_files) == 3 and failed_files == []
+        assert client.request({"command": "stats"})["failed"] == 0
+
+        client.convert("Old-Pdi_to_New-Pdi", [str(broken_path)], output_dir=str(tmp_path / "out"),
+                       template_path=TEMPLATE_PATH, failed_files=failed_files)
+        assert failed_files == [str(broken_path)]
+        assert client.request({"command": "stats"})["failed"] == 1
@@ -0,0 +1,88 @@
+import json
+import warnings
+
+import pytest
+
+
+def _write_export(path, records=400):
+    """Write a PDI-like export: many records of a few repeating tables below one root"""
+    rows = []
+    for i in range(records):
+        rows.append(f'<ttBG_FKopf><Firma>1</Firma><Formular>F{i}</Formular><FormularNr>{i}</FormularNr>'
+                    f'<Bezeichnung>Grüße &amp; Ärger {i}</Bezeichnung></ttBG_FKopf>')
+        rows.append(f'<ttBG_FFeld Nr="{i}"><FeldNummer>{i}</FeldNummer><FeldTyp>F</FeldTyp>'
+                    f'<Leer/><Text>  Feld {i}  </Text></ttBG_FFeld>')
+    path.write_text('<?xml version="1.0" encoding="UTF-8"?>\n'
+                    '<dsBG_Form xmlns:prodata="urn:schemas-progress-com:xml-prodata:0001">'
+                    + "\n".join(rows) + '</dsBG_Form>\n', encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def export(tmp_path):
+    return _write_export(tmp_path / "export.xml")
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_streaming_and_sharded_output_match_in_memory(xml_module, export, tmp_path):
+    converter = xml_module.XMLToJsonConverter()
+    scan = xml_module.prescan_file(export)
+    assert scan.shardable and scan.record_count == 800
+
+    expected = _read(converter.convert_file(export, str(tmp_path / "memory.json")))
+    assert _read(converter.convert_file_streaming(export, str(tmp_path / "streaming.json"))) == expected
+    for shards in (1, 3, 7):
+        output = converter.convert_file_sharded(export, str(tmp_path / f"sharded{shards}.json"), scan=scan,
+                                                shards=shards, max_workers=2)
+        assert _read(output) == expected
+
+
+def test_strategies_write_equivalent_binary_output(xml_module, pdi_module, export, tmp_path):
+    # The streamed writers do not use the shape table, so only the decoded documents are compared
+    converter = xml_module.XMLToJsonConverter()
+    suffix = xml_module.BINARY_SUFFIX
+    with open(converter.convert_file(export, str(tmp_path / "memory.json")), encoding="utf-8") as f:
+        expected = json.load(f)
+
+    outputs = [converter.convert_file(export, str(tmp_path / ("memory" + suffix))),
+               converter.convert_file_streaming(export, str(tmp_path / ("streaming" + suffix))),
+               converter.convert_file_sharded(export, str(tmp_path / ("sharded" + suffix)), shards=3, max_workers=2)]
+    for output in outputs:
+        with open(output, "rb") as f:
+            assert pdi_module.load_binary(f) == expected
+
+
+@pytest.mark.parametrize("strategy", ["memory", "streaming", "sharded"])
+def test_convert_runs_requested_strategy(xml_module, export, tmp_path, strategy):
+    expected = _read(xml_module.XMLToJsonConverter().convert_file(export, str(tmp_path / "expected.json")))
+    output_dir = tmp_path / strategy
+    output_dir.mkdir()
+    run_metrics = []
+
+    output_files = xml_module.convert([export], str(output_dir), memory_budget=1 << 30,
+                                      plan_strategy=strategy, max_workers=2, run_metrics=run_metrics)
+
+    assert [(metrics["strategy"], metrics["fallbacks"]) for metrics in run_metrics] == [(strategy, [])]
+    assert [_read(path) for path in output_files] == [expected]
+
+
+def test_sharded_workers_are_not_forked_from_the_sampling_process(xml_module, export, tmp_path, capsys):
+    with warnings.catch_warnings(record=True) as caught:
+        # fork() warns when it is called in a process that runs threads, here the peak memory sampler
+        warnings.simplefilter("always", DeprecationWarning)
+        xml_module.convert([export], str(tmp_path), memory_budget=1 << 30, plan_strategy="sharded", max_workers=2)
+
+    assert [str(warning.message) for warning in caught if "fork" in str(warning.message)] == []
+    assert "Worker pool failed" not in capsys.readouterr().out
+
+
+def test_planner_streams_when_memory_does_not_fit(xml_module, export):
+    scan = xml_module.prescan_file(export)
+    planner = xml_module.ExecutionPlanner
+
+    assert planner(1 << 34).plan(scan).strategy == "memory"
+    assert planner(planner.PROCESS_BASE_PEAK + 1).plan(scan).strategy == "streaming"
@@ -0,0 +1,55 @@
+import os
+import sys
+
+import pytest
+
+from module_registry import ModuleRegistry
+
+
+@pytest.fixture
+def modules_dir(tmp_path):
+    module_dir = tmp_path / "Sample"
+    module_dir.mkdir()
+    (module_dir / "info.txt").write_text("name=Sample\nversion=1.0\nentry_point=registry_sample.py\n"
+                                         "supported_formats=txt\noutput_format=txt\n", encoding="utf-8")
+    (module_dir / "registry_sample.py").write_text("VALUE = 1\n", encoding="utf-8")
+    yield tmp_path
+    sys.modules.pop("registry_sample", None)
+
+
+def _touch(path, offset):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + offset))
+
+
+def test_load_executes_edited_entry_point_again(modules_dir):
+    registry = ModuleRegistry(str(modules_dir))
+    module = registry.load("Sample")
+    assert module.VALUE == 1
+    assert registry.load("Sample") is module
+
+    entry_path = modules_dir / "Sample" / "registry_sample.py"
+    entry_path.write_text("VALUE = 22\n", encoding="utf-8")
+    _touch(entry_path, 2 * 10 ** 9)
+
+    reloaded = registry.load("Sample")
+    assert reloaded.VALUE == 22
+    assert sys.modules["registry_sample"] is reloaded
+
+
+def test_changed_info_file_executes_entry_point_again(modules_dir):
+    registry = ModuleRegistry(str(modules_dir))
+    module = registry.load("Sample")
+    module.VALUE = 3  # Lost once the entry point is executed again
+
+    info_path = modules_dir / "Sample" / "info.txt"
+    info_path.write_text(info_path.read_text(encoding="utf-8").replace("1.0", "1.1"), encoding="utf-8")
+    _touch(info_path, 2 * 10 ** 9)
+
+    assert registry.get("Sample").version == "1.1"
+    assert registry.load("Sample").VALUE == 1
+
+
+def test_first_load_shares_module_imported_from_the_same_file(pdi_module):
+    registry = ModuleRegistry()
+    assert registry.load("Old-Pdi_to_New-Pdi") is pdi_module
@@ -0,0 +1,23 @@
+import json
+import sys
+
+from conftest import TEMPLATE_PATH
+
+
+def test_converters_share_the_profiling_hooks(pdi_module, xml_module, form_document, tmp_path):
+    xml_path = tmp_path / "sample.xml"
+    xml_path.write_text('<root><item id="x">A &amp; B</item></root>', encoding="utf-8")
+    form_paths = [tmp_path / f"form{index}.json" for index in range(3)]
+    for form_path in form_paths:
+        form_path.write_text(json.dumps(form_document), encoding="utf-8")
+    profile_dir = tmp_path / "profiles"
+
+    assert xml_module.convert([str(xml_path)], str(tmp_path), profile_dir=str(profile_dir))
+    assert len(pdi_module.convert([str(path) for path in form_paths], str(tmp_path / "pdi"), TEMPLATE_PATH,
+                                  profile_dir=str(profile_dir), profile_every=2)) == 3
+
+    assert sorted(path.name for path in profile_dir.iterdir()) == [
+        "00000_form0.json.alloc.txt", "00000_form0.json.prof", "00000_sample.xml.alloc.txt", "00000_sample.xml.prof",
+        "00002_form2.json.alloc.txt", "00002_form2.json.prof"]
+    assert "<frozen" not in (profile_dir / "00000_form0.json.alloc.txt").read_text(encoding="utf-8")
+    assert xml_module._profiling_hooks() is pdi_module._profiling_hooks() is sys.modules["profiling_hooks"]
@@ -0,0 +1,52 @@
+import io
+import json
+
+XML = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+       '<root a="1"><item id="x">A &amp; Ä</item><item id="y">C</item><n>text</n></root>')
+
+
+def test_xml_streams_match_file_conversion(xml_module, tmp_path):
+    xml_path = tmp_path / "sample.xml"
+    xml_path.write_text(XML, encoding="utf-8")
+    converter = xml_module.XMLToJsonConverter(xml_module.ConversionOptions(debug_mode=False))
+    with open(converter.convert_file(str(xml_path)), "rb") as f:
+        expected = f.read()
+
+    binary_output = io.BytesIO()
+    data = converter.convert_stream(io.BytesIO(XML.encode("utf-8")), binary_output)
+    text_output = io.StringIO()
+    converter.convert_stream(io.StringIO(XML), text_output)
+
+    assert binary_output.getvalue() == expected
+    assert text_output.getvalue().encode("utf-8") == expected
+    assert data == converter.convert_bytes(XML.encode("utf-8")) == json.loads(expected)
+
+
+def test_xml_options_apply_per_call(xml_module, tmp_path):
+    converter = xml_module.XMLToJsonConverter(xml_module.ConversionOptions(debug_mode=False))
+    options = xml_module.ConversionOptions(attribute_prefix="_", text_key="$", debug_mode=False)
+
+    assert converter.convert_bytes(XML, options=options) == {
+        "root": {"_a": "1", "item": [{"_id": "x", "$": "A & Ä"}, {"_id": "y", "$": "C"}], "n": "text"}}
+    assert converter.convert_bytes(XML)["root"]["item"][0] == {"@id": "x", "#text": "A & Ä"}
+
+    xml_path = tmp_path / "sample.xml"
+    xml_path.write_text(XML, encoding="utf-8")
+    output_path, = xml_module.convert([str(xml_path)], str(tmp_path), attribute_prefix="_", debug_mode=False)
+    with open(output_path, encoding="utf-8") as f:
+        assert json.load(f)["root"]["_a"] == "1"
+
+
+def test_pdi_streams_match_file_conversion(converter, form_document, tmp_path):
+    json_path = tmp_path / "form.json"
+    json_path.write_text(json.dumps(form_document), encoding="utf-8")
+    with open(converter.convert_file(str(json_path), str(tmp_path / "form.pdi")), "rb") as f:
+        expected = f.read()
+
+    binary_output = io.BytesIO()
+    text_output = io.StringIO()
+
+    assert converter.convert_dict(form_document, binary_output) == expected
+    assert converter.convert_stream(io.StringIO(json.dumps(form_document)), text_output) == expected
+    assert binary_output.getvalue() == expected
+    assert text_output.getvalue().encode("utf-8") == expected
@@ -0,0 +1,62 @@
+import json
+
+
+def _fresh(text):
+    """Return an equal string that is a different object than text"""
+    return "".join(list(text))
+
+
+def test_table_stops_growing_at_the_limit(xml_module):
+    interner = xml_module.StringInterner(max_entries=2)
+    first, second = interner.key(_fresh("Firma")), interner.key(_fresh("Formular"))
+
+    third = _fresh("FormularNr")
+    assert interner.key(third) is third
+    assert interner.key(_fresh("FormularNr")) is not third  # Passed through, not added
+    assert len(interner) == 2
+
+    # Strings interned before the table filled up are still shared
+    assert interner.key(_fresh("Firma")) is first
+    assert interner.value(_fresh("Formular")) is second
+
+
+def test_long_values_are_not_interned(xml_module):
+    interner = xml_module.StringInterner(max_value_length=4)
+
+    assert interner.value(_fresh("abcd")) is interner.value(_fresh("abcd"))
+    assert interner.value(_fresh("abcde")) is not interner.value(_fresh("abcde"))
+    assert interner.key(_fresh("abcde")) is interner.key(_fresh("abcde"))  # The limit only applies to values
+    assert len(interner) == 2
+
+
+def test_attribute_names_share_the_table_limit(xml_module):
+    interner = xml_module.StringInterner(attribute_prefix="_", max_entries=1)
+
+    name = interner.attribute_name("Nr")
+    assert name == "_Nr" and interner.attribute_name(_fresh("Nr")) is name
+    assert interner.attribute_name("id") == "_id"
+    assert len(interner) == 1
+
+
+def test_from_options(xml_module):
+    options = xml_module.ConversionOptions(attribute_prefix="_", intern_max_entries=8, intern_max_value_length=4)
+    interner = xml_module.StringInterner.from_options(options)
+
+    assert (interner.attribute_prefix, interner.max_entries, interner.max_value_length) == ("_", 8, 4)
+    assert xml_module.StringInterner.from_options(xml_module.ConversionOptions(intern_strings=False)) is None
+
+
+def test_conversion_output_does_not_depend_on_the_limits(xml_module, tmp_path):
+    xml_path = tmp_path / "sample.xml"
+    xml_path.write_text('<root>' + ''.join(f'<row Nr="{i % 5}"><Firma>1</Firma><Text>Text {i} {"x" * i}</Text>'
+                                           f'</row>' for i in range(20)) + '</root>', encoding="utf-8")
+    outputs = []
+
+    for index, options in enumerate([dict(intern_strings=False), dict(intern_max_entries=3, intern_max_value_length=6),
+                                     dict()]):
+        converter = xml_module.XMLToJsonConverter(xml_module.ConversionOptions(**options))
+        with open(converter.convert_file(str(xml_path), str(tmp_path / f"out{index}.json")), encoding="utf-8") as f:
+            outputs.append(json.load(f))
+
+    assert outputs[0] == outputs[1] == outputs[2]
+    assert len(outputs[0]["root"]["row"]) == 20
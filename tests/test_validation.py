@@ -0,0 +1,78 @@
+import copy
+import json
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from conftest import TEMPLATE_PATH
+
+
+@pytest.fixture(scope="module")
+def validating_converters(pdi_module):
+    return {mode: pdi_module.JsonToListLabelConverter(TEMPLATE_PATH, validation=mode)
+            for mode in pdi_module.VALIDATION_MODES}
+
+
+def test_valid_form_converts_unchanged(converter, validating_converters, form_document):
+    expected = converter.convert_dict(form_document)
+    for validating in validating_converters.values():
+        assert validating.convert_dict(form_document) == expected
+
+
+def test_collect_reports_every_invalid_row(pdi_module, validating_converters, form_document):
+    del form_document["fields"][0]["FeldNummer"]  # Falls back to the id "f1", not an xsd:int
+
+    with pytest.raises(pdi_module.SchemaValidationError) as raised:
+        validating_converters["collect"]._build_tree(form_document)
+
+    assert [(error.table, error.column, error.value) for error in raised.value.errors] == [
+        ("ttBG_FFeldSpr", "FeldNummer", "f1"), ("ttBG_FFeldSpr", "FeldNummer", "f1"),
+        ("ttBG_FFeld", "FeldNummer", "f1")]
+
+
+def test_fail_fast_stops_at_first_invalid_row(pdi_module, validating_converters, form_document):
+    form_document["form"]["Formular"] = "x" * 40
+
+    with pytest.raises(pdi_module.SchemaValidationError) as raised:
+        validating_converters["fail_fast"]._build_tree(form_document)
+
+    assert len(raised.value.errors) == 1
+    assert raised.value.errors[0].column == "Formular"
+
+
+def test_keys_of_template_rows_are_taken(pdi_module, validating_converters, form_document):
+    # Same form key as the template's sample form, whose section K is part of every output
+    form_document["form"].update(Formular="VNA", FormularNr=62)
+
+    with pytest.raises(pdi_module.SchemaValidationError) as raised:
+        validating_converters["collect"]._build_tree(form_document)
+
+    assert [(error.table, error.value) for error in raised.value.errors] == [("ttBG_FAbschnitt", "1/VNA/62/K")]
+
+
+@pytest.mark.parametrize("xsd_type, valid, invalid", [
+    ("date", ["2024-01-01", "2024-02-29", "2024-01-01Z", "2024-01-01+02:00", "-0044-03-15", "12024-01-01"],
+     ["20240101", "2024-W01-1", "2024-001", "2023-02-29", "2024-13-01", "0000-01-01", "2024-01-01+15:00",
+      "2024-01-01T00:00:00", "", None]),
+    ("dateTime", ["2024-01-01T10:00:00", "2024-01-01T10:00:00.5Z", "2024-01-01T24:00:00", "2024-01-01T10:00:00-05:30"],
+     ["2024-01-01 10:00:00", "2024-01-01T10:00", "2024-01-01", "20240101T100000", "2024-01-01T25:00:00"]),
+])
+def test_dates_follow_the_xsd_lexical_forms(pdi_module, xsd_type, valid, invalid):
+    check = pdi_module._compile_column_check(ET.Element("xsd:element", type=f"xsd:{xsd_type}"))
+
+    assert [value for value in valid if check(value) is not None] == []
+    assert [value for value in invalid if check(value) is None] == []
+
+
+def test_invalid_forms_of_a_bulk_file_are_reported(pdi_module, form_document, tmp_path):
+    invalid = copy.deepcopy(form_document)
+    invalid["form"]["Formular"] = "x" * 40
+    bulk_path = tmp_path / "forms.json"
+    bulk_path.write_text(json.dumps([form_document, invalid]), encoding="utf-8")
+    failed_files = []
+
+    output_files = pdi_module.convert([str(bulk_path)], str(tmp_path / "out"), TEMPLATE_PATH, validation="collect",
+                                      bulk_mode="per_form", failed_files=failed_files)
+
+    assert len(output_files) == 1
+    assert failed_files == [str(bulk_path)]
@@ -0,0 +1,106 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from conftest import TEMPLATE_PATH
+
+import watch_folder
+
+
+def _wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached in time"
+        time.sleep(0.02)
+
+
+@pytest.fixture
+def start_watcher(tmp_path):
+    running = []
+
+    def start(directories, **options):
+        watcher = watch_folder.FolderWatcher([str(directory) for directory in directories], str(tmp_path / "out"),
+                                             template_path=TEMPLATE_PATH, use_inotify=False, poll_interval=0.05,
+                                             settle=options.pop("settle", 0.2), debug_mode=False, **options)
+        thread = threading.Thread(target=watcher.run, daemon=True)
+        thread.start()
+        running.append((watcher, thread))
+        return watcher
+
+    yield start
+    for watcher, thread in running:
+        watcher.stop()
+        thread.join(10)
+
+
+def test_polling_converts_dropped_file_once_it_settled(start_watcher, tmp_path, converter, form_document):
+    drop = tmp_path / "drop"
+    drop.mkdir()
+    watcher = start_watcher([drop], settle=0.3)
+
+    content = json.dumps(form_document).encode("utf-8")
+    with open(drop / "form.json", "wb") as f:
+        # Written in pieces, each well within the settle time of the previous one
+        for start in range(0, len(content), len(content) // 4 + 1):
+            f.write(content[start:start + len(content) // 4 + 1])
+            f.flush()
+            time.sleep(0.1)
+    _wait_for(lambda: watcher.converted_count + watcher.failed_count > 0)
+    time.sleep(0.3)
+
+    assert (watcher.converted_count, watcher.failed_count) == (1, 0)
+    assert (tmp_path / "out" / "form.pdi").read_bytes() == converter.convert_dict(form_document)
+
+
+def test_changed_file_is_converted_again(start_watcher, tmp_path, converter, form_document):
+    drop = tmp_path / "drop"
+    drop.mkdir()
+    (drop / "form.json").write_text(json.dumps(form_document), encoding="utf-8")
+    watcher = start_watcher([drop])
+    _wait_for(lambda: watcher.converted_count == 1)
+
+    form_document["form"]["Formular"] = "XYZ"
+    (drop / "form.json").write_text(json.dumps(form_document), encoding="utf-8")
+    _wait_for(lambda: watcher.converted_count == 2)
+
+    assert (tmp_path / "out" / "form.pdi").read_bytes() == converter.convert_dict(form_document)
+
+
+def test_deleted_input_releases_its_output(start_watcher, tmp_path, converter, form_document):
+    first, second = tmp_path / "first", tmp_path / "second"
+    first.mkdir()
+    second.mkdir()
+    (first / "form.json").write_text(json.dumps(form_document), encoding="utf-8")
+    watcher = start_watcher([first, second])
+    _wait_for(lambda: watcher.converted_count == 1)
+
+    other = dict(form_document, form=dict(form_document["form"], Formular="DEF"))
+    (second / "form.json").write_text(json.dumps(other), encoding="utf-8")
+    _wait_for(lambda: watcher.failed_count == 1)  # Same output name, skipped while the first input exists
+    assert (tmp_path / "out" / "form.pdi").read_bytes() == converter.convert_dict(form_document)
+
+    os.unlink(first / "form.json")
+    _wait_for(lambda: watcher.converted_count == 2)
+
+    assert (tmp_path / "out" / "form.pdi").read_bytes() == converter.convert_dict(other)
+    assert str(first / "form.json") not in watcher._converted
+
+
+def test_once_skips_inputs_with_newer_outputs(tmp_path, form_document):
+    drop = tmp_path / "drop"
+    drop.mkdir()
+    for name in ("old", "new"):
+        (drop / f"{name}.json").write_text(json.dumps(form_document), encoding="utf-8")
+    (tmp_path / "out").mkdir()
+    (tmp_path / "out" / "old.pdi").write_bytes(b"converted before")
+    os.utime(drop / "old.json", (0, 0))
+
+    watcher = watch_folder.FolderWatcher([str(drop)], str(tmp_path / "out"), template_path=TEMPLATE_PATH,
+                                         debug_mode=False)
+    watcher.run(once=True)
+
+    assert watcher.converted_count == 1
+    assert (tmp_path / "out" / "old.pdi").read_bytes() == b"converted before"